@@ -9,7 +9,7 @@ if __name__ == '__main__':
     import time
     from pathlib import Path
 
-    from flask import Flask, request, jsonify
+    from flask import Flask, Response, request, jsonify, stream_with_context
     from waitress import serve
 
 
@@ -17,6 +17,7 @@ if __name__ == '__main__':
     from videotrans.task._dubbing import DubbingSrt
     from videotrans.task._speech2text import SpeechToText
     from videotrans.task._translate_srt import TranslateSrt
+    from videotrans.task._status import TaskStatusStore
     from videotrans.task.job import start_thread
     from videotrans.task.trans_create import TransCreate
     from videotrans.util import tools
@@ -40,11 +41,21 @@ if __name__ == '__main__':
     API_RESOURCE='apidata'
     TARGET_DIR = ROOT_DIR + f'/{API_RESOURCE}'
     Path(TARGET_DIR).mkdir(parents=True, exist_ok=True)
-    # 进度日志
-    PROCESS_INFO = TARGET_DIR + '/processinfo'
-    if Path(PROCESS_INFO).is_dir():
-        shutil.rmtree(PROCESS_INFO)
-    Path(PROCESS_INFO).mkdir(parents=True, exist_ok=True)
+    # 旧版本逐个任务保存进度的目录，已改为 task_status.db
+    if Path(TARGET_DIR + '/processinfo').is_dir():
+        shutil.rmtree(TARGET_DIR + '/processinfo')
+    # 任务状态保存在内存中，每隔2秒将有变化的写入 task_status.db，重启后仍可查询已结束的任务
+    task_store = TaskStatusStore(TARGET_DIR + '/task_status.db', snapshot_interval=2).start()
+    # 服务线程数，每个 /task_events 连接断开前一直占用一个线程，因此限制同时连接数，至少为其他请求保留2个线程
+    try:
+        API_THREADS = max(4, int(config.settings.get('api_threads', 16)))
+    except (TypeError, ValueError):
+        API_THREADS = 16
+    try:
+        API_MAX_STREAMS = max(1, min(int(config.settings.get('api_max_streams', 8)), API_THREADS - 2))
+    except (TypeError, ValueError):
+        API_MAX_STREAMS = min(8, API_THREADS - 2)
+    _stream_slots = threading.BoundedSemaphore(API_MAX_STREAMS)
     # url前缀
     URL_PREFIX = f"http://{HOST}:{PORT}/{API_RESOURCE}"
     config.exit_soft = False
@@ -146,6 +157,7 @@ if __name__ == '__main__':
 
         config.box_tts = 'ing'
         trk = DubbingSrt(cfg)
+        task_store.register(trk)
         config.dubb_queue.append(trk)
         tools.set_process(text=f"Currently in queue No.{len(config.dubb_queue)}",uuid=obj['uuid'])
         return jsonify({'code': 0, 'task_id': obj['uuid']})
@@ -218,11 +230,60 @@ if __name__ == '__main__':
 
         config.box_trans = 'ing'
         trk = TranslateSrt(cfg)
+        task_store.register(trk)
         config.trans_queue.append(trk)
         tools.set_process(text=f"Currently in queue No.{len(config.trans_queue)}",uuid=obj['uuid'])
         return jsonify({'code': 0, 'task_id': obj['uuid']})
 
 
+    # 翻译记忆库导出/导入，用于多台机器共享已翻译过的字幕行
+    """
+    导出：GET /translate_memory/export  返回 jsonl 文件，每行一条记录
+    导入：POST /translate_memory/import  以 multipart 上传导出的文件(字段名 file)，或 json {"name":"jsonl文件绝对路径"}
+
+    返回数据
+    成功 {"code":0,"msg":"ok","count":导入行数}
+    失败 {"code":1,"msg":"错误信息"}
+
+    示例
+    def test_translate_memory():
+        res=requests.get("http://127.0.0.1:9011/translate_memory/export")
+        Path('tm.jsonl').write_bytes(res.content)
+        res=requests.post("http://127.0.0.1:9011/translate_memory/import",files={"file":open('tm.jsonl','rb')})
+        print(res.json())
+    """
+    @app.route('/translate_memory/export', methods=['GET'])
+    def translate_memory_export():
+        from videotrans.translator._memory import get_translation_memory
+        try:
+            memory = get_translation_memory()
+        except Exception as e:
+            return jsonify({"code": 1, "msg": str(e)})
+        # 逐行读取数据库发送，不在磁盘上生成导出文件
+        return Response(memory.iter_jsonl(), mimetype='application/x-ndjson', headers={
+            'Content-Disposition': 'attachment; filename=translate_memory.jsonl'})
+
+    @app.route('/translate_memory/import', methods=['POST'])
+    def translate_memory_import():
+        from videotrans.translator._memory import get_translation_memory
+        uploaded = 'file' in request.files
+        if uploaded:
+            name = config.TEMP_DIR + f'/translate_memory-{time.time()}-{random.randint(1, 9999)}.jsonl'
+            request.files['file'].save(name)
+        else:
+            name = (request.json or {}).get('name', '').strip() if request.is_json else ''
+        if not name or not Path(name).is_file():
+            return jsonify({"code": 1, "msg": "The parameter file or name is not set"})
+        try:
+            count = get_translation_memory().import_jsonl(name)
+        except Exception as e:
+            return jsonify({"code": 1, "msg": str(e)})
+        finally:
+            if uploaded:
+                Path(name).unlink(missing_ok=True)
+        return jsonify({"code": 0, "msg": "ok", "count": count})
+
+
     # 第3个接口 /recogn
     """
     语音识别、音视频转字幕接口
@@ -293,6 +354,7 @@ if __name__ == '__main__':
         cfg.update(obj)
         config.box_recogn = 'ing'
         trk = SpeechToText(cfg)
+        task_store.register(trk)
         config.prepare_queue.append(trk)
         tools.set_process(text=f"Currently in queue No.{len(config.prepare_queue)}",uuid=obj['uuid'])
         return jsonify({'code': 0, 'task_id': obj['uuid']})
@@ -445,6 +507,7 @@ if __name__ == '__main__':
 
         config.current_status = 'ing'
         trk = TransCreate(cfg)
+        task_store.register(trk)
         config.prepare_queue.append(trk)
         tools.set_process(text=f"Currently in queue No.{len(config.prepare_queue)}",uuid=obj['uuid'])
         #
@@ -538,24 +601,21 @@ if __name__ == '__main__':
         return jsonify({"code": 0, "msg": "ok","data":return_data})
     
     def _get_task_data(task_id):
-        file = PROCESS_INFO + f'/{task_id}.json'
-        if not Path(file).is_file():
-            if task_id in config.uuid_logs_queue:
-                return {"code": -1, "msg": _get_order(task_id)}
-
+        data = task_store.get(task_id)
+        if data is None:
             return {"code": 1, "msg": f"该任务 {task_id} 不存在"}
+        return _format_task_data(task_id, data)
 
-        try:
-            data = json.loads(Path(file).read_text(encoding='utf-8'))
-        except Exception as e:
-            return {"code": -1, "msg": Path(file).read_text(encoding='utf-8')}
-
+    def _format_task_data(task_id, data):
         if data['type'] == 'error':
             return {"code": 3, "msg": data["text"]}
-        if data['type'] in logs_status_list:
+        if data['type'] not in end_status_list:
+            # 仍在排队时返回当前位置
+            if data['position'] > 0:
+                return {"code": -1, "msg": _get_order(data['stage'], data['position'])}
             text=data.get('text','').strip()
             return {"code": -1, "msg": text if text else '等待处理中'}
-        # 完成，输出所有文件
+        # 完成，输出所有文件，查询时读取目录，只返回仍然存在的文件
         file_list = _get_files_in_directory(f'{TARGET_DIR}/{task_id}')
         if len(file_list) < 1:
             return {"code": 4, "msg": '未生成任何结果文件，可能出错了'}
@@ -569,40 +629,135 @@ if __name__ == '__main__':
             }
         }
 
-    # 排队
-    def _get_order(task_id):
-        order_num=0
-        for it in config.prepare_queue:
-            order_num+=1
-            if it.uuid == task_id:
-                return f'当前处于预处理队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on perpare queue"
-        
-        order_num=0
-        for it in config.regcon_queue:
-            order_num+=1
-            if it.uuid == task_id:
-                return f'当前处于语音识别队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on perpare queue"
-        order_num=0
-        for it in config.trans_queue:
-            order_num+=1
-            if it.uuid == task_id:
-                return f'当前处于字幕翻译队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on perpare queue"
-        order_num=0
-        for it in config.dubb_queue:
-            order_num+=1
-            if it.uuid == task_id:
-                return f'当前处于配音队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on perpare queue"
-        order_num=0
-        for it in config.align_queue:
-            order_num+=1
-            if it.uuid == task_id:
-                return f'当前处于声画对齐队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on perpare queue"
-        order_num=0
-        for it in config.assemb_queue:
-            order_num+=1
-            if it.uuid == task_id:
-                return f'当前处于输出整理队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on perpare queue"
-        return '正在排队等待执行中，请稍后' if config.defaulelang=='zh' else f"Waiting in queue"
+
+    # 以 Server-Sent Events 推送任务进度
+    """
+    无需轮询 /task_status，连接后服务端在任务进度、所处阶段或排队位置变化时立即推送
+
+    /task_events/<task_id>  单个任务
+    /task_events_list       多个任务，GET 参数 task_id_list=id1,id2 或 POST json {"task_id_list":[id1,id2,....]}
+
+    返回类型: text/event-stream，每条消息为
+        event: progress|succeed|error|end
+        data: json，格式同 /task_status 的返回值，另含 task_id,stage(所在阶段队列),position(排队位置，0=正在执行),precent(进度)
+    连接后先推送各任务当前状态，之后推送变化，全部任务结束后推送 event: end 并断开
+    无消息时每15秒发送一次 `: ping` 注释行保持连接
+    每个连接占用一个服务线程，同时连接数超过设置中的 api_max_streams(默认8) 时返回 HTTP 503，此时可改用 /task_status 轮询
+
+    示例
+    def test_task_events():
+        with requests.get("http://127.0.0.1:9011/task_events/06c238d250f0b51248563c405f1d7294", stream=True) as res:
+            for line in res.iter_lines(decode_unicode=True):
+                if line.startswith('data:'):
+                    print(json.loads(line[5:]))
+    """
+    @app.route('/task_events/<task_id>', methods=['GET'])
+    def task_events(task_id):
+        return _event_response([task_id])
+
+    @app.route('/task_events_list', methods=['POST', 'GET'])
+    def task_events_list():
+        task_ids = request.args.get('task_id_list')
+        task_ids = task_ids.split(',') if task_ids else (request.json.get('task_id_list', []) if request.is_json else [])
+        task_ids = [it.strip() for it in task_ids if it and it.strip()]
+        if not task_ids:
+            return jsonify({"code": 1, "msg": "缺少任务id"})
+        return _event_response(list(dict.fromkeys(task_ids)))
+
+    def _event_response(task_ids):
+        if not _stream_slots.acquire(blocking=False):
+            res = jsonify({"code": 1, "msg": f"进度推送连接数已达上限 {API_MAX_STREAMS}，请稍后重试或使用 /task_status 查询" if config.defaulelang == 'zh' else f"Too many progress streams (max {API_MAX_STREAMS}), retry later or poll /task_status"})
+            res.status_code = 503
+            res.headers['Retry-After'] = '5'
+            return res
+        # 需要 serve(channel_request_lookahead>0)，客户端断开后流及时结束并释放线程
+        disconnected = request.environ.get('waitress.client_disconnected')
+        response = Response(stream_with_context(_event_stream(task_ids, disconnected)), mimetype='text/event-stream', headers={
+            "Cache-Control": "no-cache",
+            # 禁止 nginx 等反向代理缓冲
+            "X-Accel-Buffering": "no",
+        })
+        # 连接关闭时释放，生成器未开始执行时也会调用
+        response.call_on_close(_stream_slots.release)
+        return response
+
+    def _sse(event, data):
+        return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+    def _event_stream(task_ids, disconnected=None):
+        # 先订阅再读取当前状态，两者之间产生的消息不会遗漏
+        subscription = config.progress_bus.subscribe(task_ids)
+        pending = set(task_ids)
+        last_sent = {}
+        last_time = time.time()
+
+        def _emit(task_id, data):
+            # 只在状态有变化时推送
+            key = (data['type'], data['text'], data['stage'], data['position'], data['precent'])
+            if data['type'] in end_status_list:
+                pending.discard(task_id)
+            if last_sent.get(task_id) == key:
+                return None
+            last_sent[task_id] = key
+            res = _format_task_data(task_id, data)
+            res.update(task_id=task_id, stage=data['stage'], position=data['position'], precent=data['precent'])
+            return _sse('progress' if res['code'] == -1 else ('succeed' if res['code'] == 0 else 'error'), res)
+
+        try:
+            for task_id in task_ids:
+                data = task_store.get(task_id)
+                if data is None:
+                    pending.discard(task_id)
+                    yield _sse('error', {"code": 1, "msg": f"该任务 {task_id} 不存在", "task_id": task_id})
+                    continue
+                msg = _emit(task_id, data)
+                if msg:
+                    yield msg
+            while pending and not config.exit_soft:
+                if disconnected is not None and disconnected():
+                    return
+                events = {}
+                # 同一任务只取最新一条，总线中连续的日志已合并
+                for event in subscription.get(timeout=1):
+                    if event.uuid in pending and event.type in end_status_list + logs_status_list:
+                        events[event.uuid] = event
+                messages = []
+                for task_id in list(pending):
+                    data = task_store.get(task_id)
+                    if data is None:
+                        continue
+                    event = events.get(task_id)
+                    # 进度消息直接来自总线，不依赖 _listen_queue 是否已更新 task_store
+                    if event is not None and data['type'] not in end_status_list:
+                        data.update(type=event.type, text=event.text)
+                    msg = _emit(task_id, data)
+                    if msg:
+                        messages.append(msg)
+                if messages:
+                    last_time = time.time()
+                    yield ''.join(messages)
+                elif time.time() - last_time >= 15:
+                    last_time = time.time()
+                    yield ': ping\n\n'
+            yield _sse('end', {"task_id_list": task_ids})
+        finally:
+            subscription.close()
+
+    # 排队，阶段队列名: (中文名, 英文名)
+    _STAGE_NAMES = {
+        'prepare_queue': ('预处理', 'perpare'),
+        'regcon_queue': ('语音识别', 'speech recognition'),
+        'trans_queue': ('字幕翻译', 'translation'),
+        'dubb_queue': ('配音', 'dubbing'),
+        'align_queue': ('声画对齐', 'align'),
+        'assemb_queue': ('输出整理', 'assembling'),
+    }
+
+    def _get_order(stage, order_num):
+        if stage not in _STAGE_NAMES:
+            return '正在排队等待执行中，请稍后' if config.defaulelang=='zh' else f"Waiting in queue"
+        zh, en = _STAGE_NAMES[stage]
+        return f'当前处于{zh}队列第{order_num}位' if config.defaulelang=='zh' else f"No.{order_num} on {en} queue"
     
     def _get_files_in_directory(dirname):
         """
@@ -625,38 +780,19 @@ if __name__ == '__main__':
 
 
     def _listen_queue():
-        # 监听队列日志 uuid_logs_queue 不在停止中的 stoped_uuid_set
-        Path(TARGET_DIR + f'/processinfo').mkdir(parents=True, exist_ok=True)
-        while 1:
-            # 找出未停止的
-            uuid_list = list(config.uuid_logs_queue.keys())
-            uuid_list = [uuid for uuid in uuid_list if uuid not in config.stoped_uuid_set]
-            # 全部结束
-            if len(uuid_list) < 1:
-                time.sleep(1)
-                continue
-            while len(uuid_list) > 0:
-                uuid = uuid_list.pop(0)
-                if uuid in config.stoped_uuid_set:
+        # 订阅全部任务的进度消息，更新 task_store，已停止的任务(stoped_uuid_set)由总线直接丢弃
+        subscription = config.progress_bus.subscribe()
+        while not config.exit_soft:
+            # 同一任务连续的日志在总线中已合并，这里只会取到最新一条
+            for event in subscription.get(timeout=1):
+                uuid = event.uuid
+                if not uuid or uuid in config.stoped_uuid_set:
                     continue
-                try:
-                    q = config.uuid_logs_queue.get(uuid)
-                    if not q:
-                        continue
-                    data = q.get(block=False)
-                    if not data:
-                        continue
-
-                    if data['type'] not in end_status_list + logs_status_list:
-                        continue
-                    with open(PROCESS_INFO + f'/{uuid}.json', 'w', encoding='utf-8') as f:
-                        f.write(json.dumps(data))
-                    if data['type'] in end_status_list:
-                        config.stoped_uuid_set.add(uuid)
-                        del config.uuid_logs_queue[uuid]
-                except Exception:
-                    pass
-            time.sleep(0.1)
+                if event.type not in end_status_list + logs_status_list:
+                    continue
+                task_store.update(uuid, event.type, event.text)
+                if event.type in end_status_list:
+                    config.stoped_uuid_set.add(uuid)
 
     multiprocessing.freeze_support()  # Windows 上需要这个来避免子进程的递归执行问题
     print(f'Starting... API URL is   http://{HOST}:{PORT}')
@@ -665,7 +801,10 @@ if __name__ == '__main__':
     threading.Thread(target=_listen_queue).start()
     try:
         print(f'\nAPI URL is   http://{HOST}:{PORT}')
-        serve(app, host=HOST, port=int(PORT))
+        # 每个 /task_events 连接占用一个线程，默认的4个线程不够用，由 api_threads 设置
+        serve(app, host=HOST, port=int(PORT), threads=API_THREADS, channel_request_lookahead=1)
     except Exception as e:
         import traceback
         traceback.print_exc()
+    finally:
+        task_store.close()
@@ -0,0 +1,100 @@
+"""
+Edge-TTS 配音并发基准测试：旧方式(保存中间 mp3 后在事件循环中同步转换) 与 新方式(内存收集后交给解码线程池) 对比
+
+用本地模拟的 Communicate 代替网络请求：每条字幕分 4 块返回同一段 1.5 秒 MP3，共耗时 --latency 秒，
+因此结果只反映事件循环是否被转换阻塞，不受网络波动影响
+
+需要 ffmpeg 在 PATH 中，在项目根目录执行:
+    python benchmarks/bench_edgetts.py --lines 500 --concurrency 5,10,20
+"""
+import argparse
+import asyncio
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, Path(__file__).resolve().parent.parent.as_posix())
+
+from videotrans.configure import config
+from videotrans.tts import _edgetts
+from videotrans.util import tools
+
+_CHUNKS = 4
+
+
+class FakeCommunicate:
+    mp3 = b''
+    latency = 0.15
+
+    def __init__(self, text, voice=None, rate=None, volume=None, proxy=None, pitch=None):
+        pass
+
+    async def stream(self):
+        step = len(self.mp3) // _CHUNKS + 1
+        for i in range(_CHUNKS):
+            await asyncio.sleep(self.latency / _CHUNKS)
+            yield {"type": "audio", "data": self.mp3[i * step:(i + 1) * step]}
+        yield {"type": "WordBoundary"}
+
+    async def save(self, audio_fname):
+        with open(audio_fname, 'wb') as f:
+            async for chunk in self.stream():
+                if chunk["type"] == "audio":
+                    f.write(chunk["data"])
+
+
+class OldEdgeTTS(_edgetts.EdgeTTS):
+    # 改动前的做法：写出中间 mp3，再在协程中同步转换为 wav
+    async def _create_audio_with_retry(self, item, index, total_tasks, semaphore):
+        async with semaphore:
+            communicate = _edgetts.Communicate(item['text'], voice=item['role'])
+            await communicate.save(item['filename'] + ".mp3")
+            self.convert_to_wav(item['filename'] + ".mp3", item['filename'])
+
+
+def make_mp3(file):
+    if not Path(file).exists():
+        subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-f', 'lavfi', '-i',
+                        'sine=frequency=440:sample_rate=24000:duration=1.5', '-c:a', 'libmp3lame', '-b:a', '48k',
+                        file], check=True)
+    return Path(file).read_bytes()
+
+
+def run(cls, lines, folder):
+    shutil.rmtree(folder, ignore_errors=True)
+    Path(folder).mkdir(parents=True)
+    queue_tts = [{"text": f"line {i}", "role": "zh-CN-XiaoxiaoNeural", "filename": f"{folder}/{i}.wav"}
+                 for i in range(lines)]
+    tts = cls(queue_tts=queue_tts, language='zh-cn')
+    tts._signal = lambda **kwargs: None
+    tts.wait_sec = 0
+    start = time.time()
+    asyncio.run(tts._task_queue())
+    elapsed = time.time() - start
+    return elapsed, all(tools.is_dubbing_wav(it['filename']) for it in queue_tts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=500)
+    parser.add_argument('--concurrency', default='5,10,20')
+    parser.add_argument('--latency', type=float, default=0.15, help='模拟每条字幕的流式接收耗时/秒')
+    parser.add_argument('--workdir', default=f'{config.TEMP_DIR}/bench_edgetts')
+    args = parser.parse_args()
+
+    Path(args.workdir).mkdir(parents=True, exist_ok=True)
+    FakeCommunicate.mp3 = make_mp3(f'{args.workdir}/line.mp3')
+    FakeCommunicate.latency = args.latency
+    _edgetts.Communicate = FakeCommunicate
+    print(f'{args.lines} lines, {args.latency}s simulated streaming per line')
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        _edgetts.MAX_CONCURRENT_TASKS = concurrency
+        old, old_ok = run(OldEdgeTTS, args.lines, f'{args.workdir}/old')
+        new, new_ok = run(_edgetts.EdgeTTS, args.lines, f'{args.workdir}/new')
+        print(f'concurrency {concurrency:>2}: old {old:.1f}s (ok={old_ok}) -> new {new:.1f}s (ok={new_ok})')
+
+
+if __name__ == '__main__':
+    main()
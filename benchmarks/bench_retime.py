@@ -0,0 +1,90 @@
+"""
+视频慢速重定时基准测试：video_rate_engine=concat(逐片段裁切后拼接) 与 filter(单次滤镜图) 对比
+
+用 lavfi testsrc2 生成固定测试视频，按 --subs 条字幕均匀分布生成字幕队列，每3条中1条慢放 1.3 倍，
+字幕之间留有间隙，片段数约为字幕数的2倍，分别用两种方式执行 SpeedRate._execute_video_processing 并计时
+
+需要 ffmpeg/ffprobe 在 PATH 中，在项目根目录执行:
+    python benchmarks/bench_retime.py --duration 1200 --subs 1000
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, Path(__file__).resolve().parent.parent.as_posix())
+
+from videotrans.configure import config
+from videotrans.task._rate import SpeedRate
+
+
+def make_fixture(file, duration, size, fps):
+    if Path(file).exists():
+        return
+    subprocess.run(['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-f', 'lavfi', '-i',
+                    f'testsrc2=size={size}:rate={fps}', '-t', str(duration), '-c:v', 'libx264', '-preset',
+                    'ultrafast', '-pix_fmt', 'yuv420p', file], check=True)
+
+
+def make_queue(duration_ms, subs):
+    step = duration_ms / subs
+    queue = []
+    for i in range(subs):
+        start = int(i * step + step * 0.3)
+        end = int((i + 1) * step)
+        source = end - start
+        queue.append({
+            "line": i + 1,
+            "start_time_source": start,
+            "end_time_source": end,
+            "source_duration": source,
+            "final_video_duration_theoretical": int(source * 1.3) if i % 3 == 0 else source,
+            "final_video_duration_real": source,
+        })
+    return queue
+
+
+def run(engine, src, workdir, duration_ms, subs, fps):
+    folder = Path(workdir) / engine
+    shutil.rmtree(folder, ignore_errors=True)
+    folder.mkdir(parents=True)
+    # 处理结果会覆盖输入的无声视频，因此每次复制一份
+    video = (folder / 'novoice.mp4').as_posix()
+    shutil.copy2(src, video)
+    rate = SpeedRate(queue_tts=make_queue(duration_ms, subs), shoud_videorate=True, uuid=None, novoice_mp4=video,
+                     raw_total_time=duration_ms, noextname='bench', target_audio=(folder / 'a.wav').as_posix(),
+                     cache_folder=folder.as_posix())
+    rate.source_video_fps = fps
+    config.settings['video_rate_engine'] = engine
+    start = time.time()
+    clips = rate._execute_video_processing()
+    elapsed = time.time() - start
+    return elapsed, len(clips or []), sum(int(it.get('real_duration_ms', 0)) for it in clips or [])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=int, default=600, help='测试视频时长/秒')
+    parser.add_argument('--subs', type=int, default=500, help='字幕条数')
+    parser.add_argument('--size', default='640x360')
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--engines', default='concat,filter')
+    parser.add_argument('--workdir', default=f'{config.TEMP_DIR}/bench_retime')
+    args = parser.parse_args()
+
+    Path(args.workdir).mkdir(parents=True, exist_ok=True)
+    src = f'{args.workdir}/src-{args.duration}s-{args.size}-{args.fps}.mp4'
+    make_fixture(src, args.duration, args.size, args.fps)
+    # 固定使用 libx264 软编码，避免硬件编码器影响对比
+    config.video_codec = 'libx264'
+    config.settings['video_codec'] = 264
+    print(f'{args.duration}s {args.size}@{args.fps}fps, {args.subs} subtitles')
+    for engine in args.engines.split(','):
+        elapsed, clips, total_ms = run(engine, src, args.workdir, args.duration * 1000, args.subs, args.fps)
+        print(f'{engine:>7}: {clips} clips, {elapsed:.1f}s, retimed duration {total_ms}ms')
+
+
+if __name__ == '__main__':
+    main()
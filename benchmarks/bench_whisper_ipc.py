@@ -0,0 +1,104 @@
+"""
+识别子进程回传结果的进程间通信基准测试：Manager().list 代理 + Queue 与 批量长度前缀管道(pack_batch/unpack_batch) 对比
+
+子进程(spawn)生成 --segments 个带 --words 个词级时间戳的片段，每个片段另发送一条 subtitle 和一条 logs 消息，
+计时包含子进程启动，直到主进程收齐全部结果，不含子进程退出
+
+在项目根目录执行:
+    python benchmarks/bench_whisper_ipc.py --segments 5000
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, Path(__file__).resolve().parent.parent.as_posix())
+
+from videotrans.process._server import _ResultWriter, _JobChannel, unpack_batch
+
+
+def make_segment(i, words):
+    start = i * 2.0
+    return {
+        "line": i + 1,
+        "start_time": int(start * 1000),
+        "end_time": int((start + 1.8) * 1000),
+        "text": " ".join(f"word{n}" for n in range(words)),
+        "words": [{"word": f"word{n}", "start": start + n * 0.1, "end": start + n * 0.1 + 0.08} for n in range(words)]
+    }
+
+
+def manager_worker(raws, q, segments, words):
+    # 旧方式：每个片段追加到 Manager 代理列表，再发送两条队列消息
+    for i in range(segments):
+        seg = make_segment(i, words)
+        raws.append(seg)
+        q.put_nowait({"text": seg['text'], "type": "subtitle"})
+        q.put_nowait({"text": f"{i + 1}/{segments}", "type": "logs"})
+    q.put_nowait(None)
+
+
+def pipe_worker(conn, segments, words):
+    # 新方式：全部消息经 _ResultWriter 按批写入单向管道
+    channel = _JobChannel(_ResultWriter(conn), 1)
+    for i in range(segments):
+        seg = make_segment(i, words)
+        channel.put_nowait({"type": "segment", "data": seg})
+        channel.put_nowait({"text": seg['text'], "type": "subtitle"})
+        channel.put_nowait({"text": f"{i + 1}/{segments}", "type": "logs"})
+    channel.put_nowait(None)
+
+
+def bench_manager(ctx, segments, words):
+    start = time.time()
+    with ctx.Manager() as manager:
+        raws = manager.list()
+        q = ctx.Queue()
+        p = ctx.Process(target=manager_worker, args=(raws, q, segments, words))
+        p.start()
+        messages = 0
+        while q.get() is not None:
+            messages += 1
+        result = list(raws)
+        elapsed = time.time() - start
+        p.join()
+    return elapsed, len(result), messages
+
+
+def bench_pipe(ctx, segments, words):
+    start = time.time()
+    reader, writer = ctx.Pipe(duplex=False)
+    p = ctx.Process(target=pipe_worker, args=(writer, segments, words))
+    p.start()
+    writer.close()
+    result = []
+    messages = 0
+    done = False
+    while not done:
+        for _, data in unpack_batch(reader.recv_bytes()):
+            if data is None:
+                done = True
+            elif data['type'] == 'segment':
+                result.append(data['data'])
+            else:
+                messages += 1
+    elapsed = time.time() - start
+    p.join()
+    return elapsed, len(result), messages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segments', type=int, default=5000)
+    parser.add_argument('--words', type=int, default=12, help='每个片段的词数')
+    args = parser.parse_args()
+    ctx = multiprocessing.get_context('spawn')
+    print(f'{args.segments} segments x {args.words} words, spawn start included')
+    for name, func in (('Manager list + Queue', bench_manager), ('batched pipe', bench_pipe)):
+        elapsed, segs, messages = func(ctx, args.segments, args.words)
+        print(f'{name:>20}: {elapsed:.2f}s, {segs} segments, {messages} messages')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,8 @@ application.
 """
 from __future__ import annotations
 
-import contextlib
 import time
 from pathlib import Path
-from queue import Empty
 from typing import Dict, List, Optional, Tuple, Union
 
 from videotrans.configure import config
@@ -75,21 +73,8 @@ def _resolve_recogn_backend(value: Union[str, int]) -> int:
     return _RECOGN_NAME_TO_INDEX[key]
 
 
-def _consume_logs(uuid: str) -> List[Dict[str, str]]:
-    queue = config.uuid_logs_queue.get(uuid)
-    if queue is None:
-        return []
-    messages: List[Dict[str, str]] = []
-    with contextlib.suppress(Exception):
-        while True:
-            try:
-                item = queue.get_nowait()
-            except Empty:
-                break
-            else:
-                if isinstance(item, dict):
-                    messages.append(item)
-    return messages
+def _consume_logs(subscription) -> List[Dict[str, str]]:
+    return [event.to_dict() for event in subscription.get(timeout=0)]
 
 
 def _prepare_environment(output_root: Path) -> None:
@@ -101,7 +86,6 @@ def _prepare_environment(output_root: Path) -> None:
     config.box_recogn = 'ing'
     config.box_trans = 'ing'
     config.box_tts = 'ing'
-    config.global_msg.clear()
 
 
 def _restore_environment(previous_status: Dict[str, str]) -> None:
@@ -229,40 +213,44 @@ def run_speech_to_speech(
     }
     cfg.update(obj)
 
+    # 任务创建前订阅，之后各阶段结束时取出期间产生的日志
+    subscription = config.progress_bus.subscribe([obj['uuid']]) if collect_logs else None
     task = TransCreate(cfg=cfg)
     logs: List[Dict[str, str]] = []
 
     try:
         task.prepare()
         if collect_logs:
-            logs.extend(_consume_logs(task.uuid))
+            logs.extend(_consume_logs(subscription))
 
         task.recogn()
         if collect_logs:
-            logs.extend(_consume_logs(task.uuid))
+            logs.extend(_consume_logs(subscription))
 
         if task.shoud_trans:
             task.trans()
             if collect_logs:
-                logs.extend(_consume_logs(task.uuid))
+                logs.extend(_consume_logs(subscription))
 
         if task.shoud_dubbing:
             task.dubbing()
             if collect_logs:
-                logs.extend(_consume_logs(task.uuid))
+                logs.extend(_consume_logs(subscription))
 
         task.align()
         if collect_logs:
-            logs.extend(_consume_logs(task.uuid))
+            logs.extend(_consume_logs(subscription))
 
         task.assembling()
         if collect_logs:
-            logs.extend(_consume_logs(task.uuid))
+            logs.extend(_consume_logs(subscription))
 
         task.task_done()
         if collect_logs:
-            logs.extend(_consume_logs(task.uuid))
+            logs.extend(_consume_logs(subscription))
     finally:
+        if subscription:
+            subscription.close()
         config.params['f5tts_url'] = prev_params.get('f5tts_url', '')
         config.params['f5tts_ttstype'] = prev_params.get('f5tts_ttstype', 'F5-TTS')
         config.params['f5tts_is_whisper'] = prev_params.get('f5tts_is_whisper', False)
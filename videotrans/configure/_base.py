@@ -85,7 +85,11 @@ class BaseCon:
             raise
         '''
 
-    def convert_to_wav(self, mp3_file_path: str, output_wav_file_path: str, extra=None):
+    def convert_to_wav(self, mp3_file_path, output_wav_file_path: str, extra=None):
+        # 转为配音统一格式 44100Hz 双声道 pcm_s16le，mp3_file_path 也可以是内存中的音频数据 bytes
+        # 无额外 ffmpeg 参数时在进程内解码重采样，不再为每行字幕启动 ffmpeg
+        if not extra:
+            return tools.decode_to_wav(mp3_file_path, output_wav_file_path)
         cmd = [
             "-y",
             "-i",
@@ -8,7 +8,9 @@ import re
 import sys
 import tempfile
 from pathlib import Path
-from queue import Queue
+
+from videotrans.configure._progress import ProgressBus
+from videotrans.configure._queue import StageQueue
 
 MAINWIN = None
 
@@ -85,28 +87,11 @@ else:  # 原有逻辑
 if defaulelang == 'zh' and not Path(ROOT_DIR+"/huggingface.lock").exists():
     os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
 ####################################
-# 存储所有任务的进度队列，以uuid为键
-# 根据uuid将日志进度等信息存入队列，如果不存在则创建
-uuid_logs_queue = {}
-
-
-def push_queue(uuid, jsondata):
-    if uuid in stoped_uuid_set:
-        return
-    if uuid not in uuid_logs_queue:
-        uuid_logs_queue[uuid] = Queue()
-    try:
-        # 暂停时会重设为字符串 stop
-        if isinstance(uuid_logs_queue[uuid], Queue):
-            uuid_logs_queue[uuid].put_nowait(jsondata)
-    except Exception:
-        pass
-
-
 # 存储已停止/暂停的任务
 stoped_uuid_set = set()
-# 全局消息，不存在uuid，用于控制软件
-global_msg = []
+# 进度消息总线，set_process 发布的日志进度(含无uuid的全局消息)经它分发给界面、api等订阅者
+# 已停止任务的消息直接丢弃
+progress_bus = ProgressBus(stoped_uuid_set)
 # 软件退出
 exit_soft = False
 # 所有设置窗口和子窗口
@@ -128,17 +113,17 @@ box_recogn = 'stop'
 task_countdown = 0
 #####################################
 # 预先处理队列
-prepare_queue = []
+prepare_queue = StageQueue('prepare')
 # 识别队列
-regcon_queue = []
+regcon_queue = StageQueue('regcon')
 # 翻译队列
-trans_queue = []
+trans_queue = StageQueue('trans')
 # 配音队列
-dubb_queue = []
+dubb_queue = StageQueue('dubb')
 # 音视频画面对齐
-align_queue = []
+align_queue = StageQueue('align')
 # 合成队列
-assemb_queue = []
+assemb_queue = StageQueue('assemb')
 # 执行模式 gui 或 api
 exec_mode = "gui"
 # funasr模型
@@ -222,18 +207,36 @@ def parse_init(update_data=None):
         "voice_silence": 200,
         "interval_split": 10,
         "bgm_split_time": 300,
+        "separate_batch": 1,  # 人声分离时每次推理的窗口数，1=逐窗口推理，0=根据可用内存自动决定
         "trans_thread": 20,
         "aitrans_thread": 50,
+        "trans_concurrent": 1,  # 传统翻译同时发送的批次数
+        "aitrans_concurrent": 1,  # AI翻译同时发送的批次数
+        "http_pool_size": 10,  # 翻译和配音接口每个主机保持的最大连接数
+        "trans_memory": True,  # 是否使用翻译记忆库，已翻译过的字幕行不再发送
+        "trans_memory_max": 200000,  # 翻译记忆库最多保存的行数，超出后删除最久未使用的
         "retries": 2,
         "translation_wait": 0,
         "dubbing_wait": 1,
         "dubbing_thread": 5,
+        "dubbing_cache_size": 1024,  # 配音结果缓存上限/MB，0=不缓存
+        "prepare_workers": 1,  # 各阶段同时执行的任务数
+        "recogn_workers": 1,
+        "trans_workers": 1,
+        "dubb_workers": 1,
+        "align_workers": 1,
+        "assemb_workers": 1,
+        "api_threads": 16,  # api.py 服务线程数
+        "api_max_streams": 8,  # api.py 同时保持的进度推送(SSE)连接数上限
+        "video_cut_thread": 0,  # 视频慢速时并行裁切片段数，0=自动
+        "video_rate_engine": "concat",  # 视频慢速引擎 concat=分段裁切后拼接 filter=单次滤镜图重定时
         "save_segment_audio": False,
         "countdown_sec": 120,
         "backaudio_volume": 0.8,
         "separate_sec": 600,
         "loop_backaudio": True,
         "cuda_com_type": "default",  # int8 int8_float16 int8_float32
+        "whisper_model_ttl": 600,  # 常驻识别进程中模型空闲多少秒后释放，0=每次识别后立即释放
         "initial_prompt_zh-cn": "在每行末尾添加标点符号，在每个句子末尾添加标点符号。",
         "initial_prompt_zh-tw": "在每行末尾添加標點符號，在每個句子末尾添加標點符號。",
         "initial_prompt_en": "Add punctuation at the end of each line, and punctuation at the end of each sentence.",
@@ -288,6 +291,10 @@ def parse_init(update_data=None):
         "llm_chunk_size": 500,
         "llm_ai_type": "openai",
         "gemini_recogn_chunk": 50,
+        "recogn_concurrent": 1,  # 在线语音识别每个key同时发送的请求数
+        "recogn_rpm": 0,  # 在线语音识别每个key每分钟最多请求数，0不限制
+        "sensevoice_batch_s": 60,  # SenseVoice识别时每批送入模型的音频总秒数
+        "whisper_batch_size": 0,  # faster-whisper均等分割模式批量推理的片段数，0或1不批量
         "zh_hant_s": True,
         "azure_lines": 1,
         "chattts_voice": "11,12,16,2222,4444,6653,7869,9999,5,13,14,1111,3333,4099,5099,5555,8888,6666,7777",
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+
+
+class ProgressEvent:
+    """
+    一条进度/日志消息
+    uuid 为 None 时是不属于任何任务的全局消息
+    type=logs|error|subtitle|end|stop|succeed|set_precent|replace_subtitle|....
+    """
+    __slots__ = ('uuid', 'type', 'text', 'ts')
+
+    def __init__(self, uuid=None, type='logs', text=''):
+        self.uuid = uuid
+        self.type = type
+        self.text = text
+        self.ts = time.time()
+
+    def to_dict(self):
+        return {"text": self.text, "type": self.type, "uuid": self.uuid}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def __repr__(self):
+        return f'ProgressEvent({self.uuid!r}, {self.type!r}, {self.text[:30]!r})'
+
+
+class Subscription:
+    """
+    由 ProgressBus.subscribe() 创建，每个订阅者各自保存待取出的消息
+    uuids 为 None 时接收全部消息(含全局消息)，否则只接收这些任务的消息
+    """
+
+    def __init__(self, bus, uuids=None):
+        self._bus = bus
+        self.uuids = set(uuids) if uuids is not None else None
+        self._pending = []
+        # uuid -> 该任务最后一条待取消息在 _pending 中的位置，用于合并连续的进度消息
+        self._last = {}
+        self.closed = False
+
+    def accepts(self, uuid):
+        return self.uuids is None or uuid in self.uuids
+
+    def add(self, uuid):
+        with self._bus._cond:
+            if self.uuids is not None:
+                self.uuids.add(uuid)
+
+    def remove(self, uuid):
+        with self._bus._cond:
+            if self.uuids is not None:
+                self.uuids.discard(uuid)
+            self._drop(uuid)
+
+    def _push(self, event):
+        n = self._last.get(event.uuid)
+        # 同一任务连续的 logs/set_precent 只保留最新一条，界面只显示最新状态
+        if n is not None and event.type in self._bus.COALESCE_TYPES and self._pending[n].type == event.type:
+            self._pending[n] = event
+            return
+        self._last[event.uuid] = len(self._pending)
+        self._pending.append(event)
+
+    def _drop(self, uuid):
+        if any(e.uuid == uuid for e in self._pending):
+            self._pending = [e for e in self._pending if e.uuid != uuid]
+            self._last = {e.uuid: i for i, e in enumerate(self._pending)}
+
+    def get(self, timeout=None):
+        """
+        取出全部待处理消息，没有消息时在总线的条件变量上等待
+        超时、订阅已关闭或软件退出时返回空列表
+        """
+        with self._bus._cond:
+            if not self._pending and not self.closed:
+                self._bus._cond.wait_for(lambda: self._pending or self.closed, timeout)
+            events, self._pending, self._last = self._pending, [], {}
+            return events
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ProgressBus:
+    """
+    进程内的进度消息总线，替代原来每个任务一个 Queue 再由各处轮询
+
+    - publish() 发布消息，分发给所有订阅了该任务的订阅者，然后唤醒等待者
+    - 所有订阅者在同一个条件变量上等待，不再以 0.1s 超时逐个轮询 N 个队列
+    - 同一任务连续的 logs/set_precent 消息在订阅者取出前合并为最新一条，
+      配音/识别等高频进度不会堆积
+    - 已停止任务(stopped 集合中)的消息直接丢弃
+    - 尚无订阅者时的全局消息暂存，交给之后第一个接收全部消息的订阅者
+    """
+    COALESCE_TYPES = ('logs', 'set_precent')
+    MAX_ORPHANS = 100
+
+    def __init__(self, stopped=None):
+        self._cond = threading.Condition()
+        self._subs = []
+        self._stopped = stopped if stopped is not None else set()
+        self._orphans = []
+
+    def publish(self, uuid=None, type='logs', text=''):
+        if uuid and uuid in self._stopped:
+            return None
+        event = ProgressEvent(uuid, type, text)
+        with self._cond:
+            delivered = False
+            for sub in self._subs:
+                if sub.accepts(uuid):
+                    sub._push(event)
+                    delivered = True
+            if delivered:
+                self._cond.notify_all()
+            elif uuid is None:
+                self._orphans = self._orphans[-self.MAX_ORPHANS + 1:] + [event]
+        return event
+
+    def subscribe(self, uuids=None):
+        sub = Subscription(self, uuids)
+        with self._cond:
+            self._subs.append(sub)
+            if uuids is None and self._orphans:
+                for event in self._orphans:
+                    sub._push(event)
+                self._orphans = []
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._cond:
+            sub.closed = True
+            if sub in self._subs:
+                self._subs.remove(sub)
+            self._cond.notify_all()
+
+    def discard(self, uuid):
+        """丢弃该任务尚未被取出的消息，任务停止或暂停时使用"""
+        with self._cond:
+            for sub in self._subs:
+                sub._drop(uuid)
+
+    def close(self):
+        """软件退出时关闭所有订阅，唤醒全部等待者"""
+        with self._cond:
+            for sub in self._subs:
+                sub.closed = True
+            self._subs.clear()
+            self._cond.notify_all()
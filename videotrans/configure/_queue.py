@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import heapq
+import threading
+from collections import defaultdict
+
+
+class StageQueue:
+    """
+    任务阶段队列，替代原来的 list + 轮询
+
+    - 兼容原 list 用法：append(trk)、len()、for it in queue、pop(0)
+    - get() 阻塞等待，有任务入队时通过条件变量立即唤醒工作线程，无需 sleep 轮询
+    - 按 priority 升序出队，同优先级先进先出
+    - close() 后唤醒所有等待线程，用于退出时干净关闭
+    - position() 直接算出任务的排队位置，无需遍历队列
+    """
+
+    def __init__(self, name=''):
+        self.name = name
+        self._heap = []
+        # 每个优先级各自编号，同一优先级中尚未出队的编号总是连续的 [_head, _next)
+        self._next = defaultdict(int)
+        self._head = defaultdict(int)
+        # id(任务) -> (优先级, 编号)，任务在队列中时一直被 _heap 引用，id 不会被复用
+        self._keys = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def append(self, item, priority=None):
+        # 未指定时使用任务自身的 priority 属性，默认0，数字越小越优先
+        if priority is None:
+            priority = getattr(item, 'priority', 0) or 0
+        with self._cond:
+            seq = self._next[priority]
+            self._next[priority] += 1
+            self._keys[id(item)] = (priority, seq)
+            heapq.heappush(self._heap, (priority, seq, item))
+            self._cond.notify()
+
+    put = append
+
+    def get(self, timeout=None):
+        """阻塞取出一个任务，超时或队列已关闭时返回 None"""
+        with self._cond:
+            if not self._heap and not self._closed:
+                self._cond.wait(timeout)
+            if not self._heap:
+                return None
+            return self._pop()
+
+    def pop(self, index=0):
+        # 兼容 list.pop(0)，仅支持弹出队首
+        if index != 0:
+            raise IndexError('StageQueue only supports pop(0)')
+        with self._cond:
+            if not self._heap:
+                raise IndexError('pop from empty StageQueue')
+            return self._pop()
+
+    def _pop(self):
+        priority, _, item = heapq.heappop(self._heap)
+        self._head[priority] += 1
+        self._keys.pop(id(item), None)
+        return item
+
+    def position(self, item):
+        """任务在队列中的位置，从1开始，不在队列中返回 None"""
+        with self._cond:
+            key = self._keys.get(id(item))
+            if key is None:
+                return None
+            priority, seq = key
+            # 优先级更高(数字更小)的任务都排在前面，优先级种类很少，可视为常数时间
+            ahead = sum(self._next[p] - self._head[p] for p in self._next if p < priority)
+            return ahead + seq - self._head[priority] + 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _snapshot(self):
+        with self._cond:
+            return [it[2] for it in sorted(self._heap)]
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        # 返回快照，迭代期间其他线程入队出队不影响
+        return iter(self._snapshot())
+
+    def __repr__(self):
+        return f'StageQueue({self.name!r}, size={len(self)})'
@@ -840,11 +840,7 @@ class WinAction(WinActionSub):
     # 先不清空 stoped_uuid_set 标志，用于背景分离任务稍后结束
     def _clear_task(self):
         for v in self.obj_list:
-            try:
-                if v['uuid'] in config.uuid_logs_queue:
-                    del config.uuid_logs_queue[v['uuid']]
-            except:
-                pass
+            config.progress_bus.discard(v['uuid'])
 
     # 添加进度条
     def add_process_btn(self, *, target_dir: str = None, name: str = None, uuid=None):
@@ -941,8 +937,7 @@ class WinAction(WinActionSub):
             self.main.stop_djs.hide()
             self.main.continue_compos.hide()
         for it in self.obj_list:
-            if it['uuid'] in config.uuid_logs_queue:
-                del config.uuid_logs_queue[it['uuid']]
+            config.progress_bus.discard(it['uuid'])
         if self.main.app_mode == 'tiqu':
             self.set_tiquzimu()
         self._reset()
@@ -364,14 +364,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         from videotrans.task.job import start_thread
         from videotrans.mainwin._signal import UUIDSignalThread
 
+        # 先订阅进度消息，再启动会发布消息的线程
+        uuid_signal = UUIDSignalThread(parent=self)
+        uuid_signal.uito.connect(self.win_action.update_data)
+        uuid_signal.start()
+
         update_role = GetRoleWorker(parent=self)
         update_role.start()
         self.check_update = CheckUpdateWorker(parent=self)
         self.check_update.start()
-
-        uuid_signal = UUIDSignalThread(parent=self)
-        uuid_signal.uito.connect(self.win_action.update_data)
-        uuid_signal.start()
         start_thread(self)
 
     def _set_cache_set(self):
@@ -621,6 +622,17 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def closeEvent(self, event):
         config.exit_soft = True
         config.current_status = 'stop'
+        try:
+            from videotrans.task.job import stop_thread
+            stop_thread()
+        except:
+            pass
+        try:
+            tools.close_http_clients()
+        except:
+            pass
+        # 唤醒所有等待进度消息的线程
+        config.progress_bus.close()
         try:
             with open(config.TEMP_DIR + '/stop_process.txt', 'w', encoding='utf-8') as f:
                 f.write('stop')
@@ -646,8 +658,23 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         except:
             pass
         os.chdir(config.ROOT_DIR)
+        # 保留配音结果缓存 dubbing_cache/store 和翻译记忆库 translate_cache，其余临时文件全部删除
         try:
-            shutil.rmtree(config.TEMP_DIR, ignore_errors=True)
+            for item in Path(config.TEMP_DIR).iterdir():
+                if item.name == 'translate_cache':
+                    continue
+                if item.name == 'dubbing_cache':
+                    for sub in item.iterdir():
+                        if sub.name == 'store':
+                            continue
+                        if sub.is_dir():
+                            shutil.rmtree(sub, ignore_errors=True)
+                        else:
+                            sub.unlink(missing_ok=True)
+                elif item.is_dir():
+                    shutil.rmtree(item, ignore_errors=True)
+                else:
+                    item.unlink(missing_ok=True)
         except:
             pass
         try:
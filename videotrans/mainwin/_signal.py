@@ -1,7 +1,4 @@
-import json
-import queue
 import shutil
-import time
 
 from PySide6.QtCore import QThread, Signal
 
@@ -9,57 +6,34 @@ from videotrans.configure import config
 
 
 class UUIDSignalThread(QThread):
-    uito = Signal(str)
+    # 直接发送 dict，update_data 无需再次解析 json
+    uito = Signal(object)
 
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.parent = parent
-
-    def _remove_queue(self):
-        for uuid in config.stoped_uuid_set:
-            try:
-                del config.uuid_logs_queue[uuid]
-            except:
-                pass
+        # 创建时即订阅，启动前发布的全局消息也能收到
+        self.subscription = config.progress_bus.subscribe()
 
     def run(self):
         if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
-            self.uito.emit(json.dumps(
-                {"type": "ffmpeg", "text": '请安装ffmpeg' if config.defaulelang == 'zh' else 'Please install ffmpeg'}))
-        while 1:
-            if config.exit_soft:
-                return
-            if len(self.parent.win_action.obj_list) < 1:
-                if len(config.global_msg) > 0:
-                    self.uito.emit(json.dumps(config.global_msg.pop(0)))
-                self._remove_queue()
-                time.sleep(1)
-                continue
-            # 找出未停止的
-            uuid_list = [obj['uuid'] for obj in self.parent.win_action.obj_list if
-                         obj['uuid'] not in config.stoped_uuid_set]
-            # 全部结束
-            if len(uuid_list) < 1:
-                self.uito.emit(json.dumps({"type": "end"}))
-                time.sleep(0.1)
-                self._remove_queue()
-                continue
-            while len(uuid_list) > 0:
-                uuid = uuid_list.pop(0)
-                if config.exit_soft:
-                    return
-                if uuid in config.stoped_uuid_set:
-                    try:
-                        del config.uuid_logs_queue[uuid]
-                    except:
-                        pass
-                    continue
-                try:
-                    q: queue.Queue = config.uuid_logs_queue.get(uuid)
-                    if not q:
+            self.uito.emit(
+                {"type": "ffmpeg", "text": '请安装ffmpeg' if config.defaulelang == 'zh' else 'Please install ffmpeg'})
+        try:
+            while not config.exit_soft:
+                # 在总线的条件变量上等待新消息，超时只用于检查是否已全部结束
+                events = self.subscription.get(timeout=0.5)
+                obj_list = self.parent.win_action.obj_list
+                # 只处理全局消息和主界面当前任务的消息，其他窗口的任务由各自窗口订阅
+                uuids = {obj['uuid'] for obj in obj_list}
+                for event in events:
+                    if config.exit_soft:
+                        return
+                    if event.uuid and (event.uuid not in uuids or event.uuid in config.stoped_uuid_set):
                         continue
-                    data = q.get(block=True, timeout=0.1)
-                    if data:
-                        self.uito.emit(json.dumps(data))
-                except Exception:
-                    pass
+                    self.uito.emit(event.to_dict())
+                # 有任务且全部已停止
+                if obj_list and all(obj['uuid'] in config.stoped_uuid_set for obj in obj_list):
+                    self.uito.emit({"type": "end"})
+        finally:
+            self.subscription.close()
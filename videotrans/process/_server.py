@@ -0,0 +1,332 @@
+import atexit
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+
+"""
+常驻 faster-whisper 识别进程
+
+原先每识别一个文件就新建一个进程，并重新从磁盘加载 WhisperModel，large-v3 在 CPU 上每次需 20-40s
+现在由一个常驻子进程保存已加载的模型，以 (model_name, device, compute_type) 为键，
+主进程通过队列提交识别任务，空闲超过 whisper_model_ttl 秒的模型被释放
+
+取消仍沿用 .lock 文件协议：主进程为每个任务创建 lock 文件，删除即取消，子进程在每个片段前检查
+
+识别结果通过单向管道传回，不再使用 Manager().list 代理，每条消息为 [job_id, data]，
+data 的 type 为 segment(带词级时间戳的片段)/detect(检测出的语言)/error/logs/subtitle，data 为 None 表示任务结束
+多条消息以 4 字节长度前缀拼接成一批后一次发送，每隔 FLUSH_INTERVAL 秒或攒满 BATCH_SIZE 条发送一次
+"""
+
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 0.2
+_HEADER = struct.Struct('<I')
+
+
+def pack_batch(messages) -> bytes:
+    frames = []
+    for msg in messages:
+        body = json.dumps(msg, ensure_ascii=False).encode('utf-8')
+        frames.append(_HEADER.pack(len(body)))
+        frames.append(body)
+    return b''.join(frames)
+
+
+def unpack_batch(buf: bytes):
+    offset = 0
+    total = len(buf)
+    while offset < total:
+        (size,) = _HEADER.unpack_from(buf, offset)
+        offset += _HEADER.size
+        yield json.loads(buf[offset:offset + size].decode('utf-8'))
+        offset += size
+
+
+def load_whisper_model(model_name, *, device, compute_type, ROOT_DIR, defaulelang):
+    """加载模型，返回 (model, 错误信息)，成功时错误信息为空"""
+    from faster_whisper import WhisperModel
+    from huggingface_hub.errors import LocalEntryNotFoundError
+    try:
+        model = WhisperModel(
+            model_name,
+            device=device,
+            compute_type=compute_type,
+            download_root=ROOT_DIR + "/models"
+        )
+    except LocalEntryNotFoundError:
+        return None, '下载模型失败了请确认网络稳定后重试，如果已使用代理，请尝试关闭。 访问网址  https://pvt9.com/820  可查看详细详细解决方案' if defaulelang == 'zh' else 'Download model failed, please confirm network stable and try again. Visit https://pvt9.com/820 for more detail.'
+    except Exception as e:
+        error = str(e)
+        if "Unable to open file 'model.bin'" in error:
+            return None, '可能网络原因模型下载中断，请尝试删掉models文件夹内相应模型文件夹，然后重试' if defaulelang == 'zh' else 'Maybe model download failed, please delete the corresponding model folder in the models directory and try again'
+        if "CUBLAS_STATUS_NOT_SUPPORTED" in error:
+            return None, "数据类型不兼容：请打开菜单--工具--高级选项--faster/openai语音识别调整--CUDA数据类型--选择 float16，保存后重试" if defaulelang == 'zh' else 'Incompatible data type: Please open the menu - Tools - Advanced options - Faster/OpenAI speech recognition adjustment - CUDA data type - select float16, save and try again'
+        if "cudaErrorNoKernelImageForDevice" in error:
+            return None, "pytorch和cuda版本不兼容，请更新显卡驱动后，安装或重装CUDA12.x及cuDNN9.x" if defaulelang == 'zh' else 'Pytorch and cuda versions are incompatible. Please update the graphics card driver and install or reinstall CUDA12.x and cuDNN9.x'
+        return None, error
+    return model, ''
+
+
+def get_compute_type(model_name, settings):
+    if model_name.startswith('distil-'):
+        return "default"
+    return settings['cuda_com_type']
+
+
+class _ResultWriter:
+    """子进程中缓冲结果消息，按批写入管道，后台线程定时发送未满一批的消息"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.buffer = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def put(self, job_id, data):
+        with self.lock:
+            self.buffer.append([job_id, data])
+            if data is None or len(self.buffer) >= BATCH_SIZE:
+                self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        self.conn.send_bytes(pack_batch(batch))
+
+    def _flush_loop(self):
+        while 1:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                with self.lock:
+                    self._flush()
+            except (OSError, ValueError):
+                return
+
+
+class _JobChannel:
+    """供 run() 使用的消息通道，接口同 Queue.put_nowait，消息自动带上任务 id"""
+
+    def __init__(self, writer, job_id):
+        self.writer = writer
+        self.job_id = job_id
+
+    def put_nowait(self, data):
+        self.writer.put(self.job_id, data)
+
+
+def _empty_cuda_cache():
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except:
+        pass
+
+
+def _serve(job_q, conn, ROOT_DIR):
+    # 子进程主循环，models: key -> [model, 最后使用时间]
+    os.chdir(ROOT_DIR)
+    writer = _ResultWriter(conn)
+    models = {}
+    ttl = 600
+
+    def _evict(force_all=False, keep=None):
+        now = time.time()
+        removed = False
+        for key in list(models.keys()):
+            if key == keep:
+                continue
+            if force_all or keep is not None or now - models[key][1] >= ttl:
+                del models[key]
+                removed = True
+        if removed:
+            import gc
+            gc.collect()
+            _empty_cuda_cache()
+
+    while 1:
+        try:
+            job = job_q.get(timeout=5)
+        except queue.Empty:
+            _evict()
+            continue
+        if job is None:
+            _evict(force_all=True)
+            return
+        job_id = job['job_id']
+        kwargs = job['kwargs']
+        q = _JobChannel(writer, job_id)
+        try:
+            ttl = int(float(kwargs['settings'].get('whisper_model_ttl', 600)))
+        except (TypeError, ValueError):
+            ttl = 600
+        try:
+            # 排队期间已被取消
+            if not Path(job['lock_file']).exists():
+                continue
+            device = "cuda" if kwargs['is_cuda'] else "cpu"
+            compute_type = get_compute_type(kwargs['model_name'], kwargs['settings'])
+            key = (kwargs['model_name'], device, compute_type)
+            if key in models:
+                q.put_nowait({"text": f"{kwargs['model_name']} Loaded", "type": "logs"})
+            else:
+                # 加载新模型前释放其他模型，避免显存/内存中同时存在多个大模型
+                _evict(keep=key)
+                msg = f"[{kwargs['model_name']}]若不存在将从 hf-mirror.com 下载到 models 目录内" if kwargs['defaulelang'] == 'zh' else f"If [{kwargs['model_name']}] not exists, download model from huggingface"
+                q.put_nowait({"text": msg, "type": "logs"})
+                model, error = load_whisper_model(kwargs['model_name'], device=device, compute_type=compute_type,
+                                                  ROOT_DIR=ROOT_DIR, defaulelang=kwargs['defaulelang'])
+                if error:
+                    q.put_nowait({"text": error, "type": "error"})
+                    continue
+                models[key] = [model, time.time()]
+                q.put_nowait({"text": f"{kwargs['model_name']} Loaded", "type": "logs"})
+            models[key][1] = time.time()
+            if job['target'] == 'average':
+                from videotrans.process._average import run
+            else:
+                from videotrans.process._overall import run
+            run(model=models[key][0], lock_file=job['lock_file'], q=q, **kwargs)
+            models[key][1] = time.time()
+        except BaseException as e:
+            q.put_nowait({"text": f'_server:{e}', "type": "error"})
+        finally:
+            if ttl <= 0:
+                _evict(force_all=True)
+            writer.put(job_id, None)
+
+
+class WhisperJob:
+    def __init__(self, job_id, lock_file):
+        self.job_id = job_id
+        self.lock_file = lock_file
+        # 日志/字幕消息，接口同 multiprocessing.Queue 的 empty/get_nowait
+        self.queue = queue.Queue()
+        self.done = threading.Event()
+        self.error = ''
+        # 识别出的片段 {"words":[...], "text":...} 或字幕行
+        self.raws = []
+        # 自动检测出的语言，未检测时为空
+        self.detect = ''
+        # 执行该任务的子进程，子进程退出时用于找出受影响的任务
+        self.process = None
+
+    def wait(self):
+        self.done.wait()
+        Path(self.lock_file).unlink(missing_ok=True)
+
+
+class WhisperServer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process = None
+        self._job_q = None
+        self._jobs = {}
+        self._seq = itertools.count(1)
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        from videotrans.configure import config
+        # 修复CUDA fork问题：强制使用spawn方法
+        ctx = multiprocessing.get_context('spawn')
+        self._job_q = ctx.Queue()
+        reader, writer = ctx.Pipe(duplex=False)
+        self._process = ctx.Process(target=_serve, args=(self._job_q, writer, config.ROOT_DIR), daemon=True)
+        self._process.start()
+        # 关闭主进程中的写端，子进程退出时读端才会收到 EOF
+        writer.close()
+        config.logger.info(f'启动常驻语音识别进程 pid={self._process.pid}')
+        threading.Thread(target=self._dispatch, args=(self._process, reader), daemon=True).start()
+
+    def _dispatch(self, process, reader):
+        # 将子进程消息分发给对应任务，子进程意外退出时结束所有未完成任务
+        while 1:
+            try:
+                if not reader.poll(1):
+                    if process.is_alive():
+                        continue
+                    break
+                buf = reader.recv_bytes()
+            except (EOFError, OSError):
+                break
+            for job_id, data in unpack_batch(buf):
+                self._on_message(job_id, data)
+        reader.close()
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.process is process]
+        for job in jobs:
+            job.error = job.error or f'语音识别进程意外退出 exitcode={process.exitcode}'
+            self._finish(job.job_id)
+
+    def _on_message(self, job_id, data):
+        if data is None:
+            self._finish(job_id)
+            return
+        job = self._jobs.get(job_id)
+        if not job:
+            return
+        if data['type'] == 'segment':
+            job.raws.append(data['data'])
+        elif data['type'] == 'detect':
+            job.detect = data['text']
+        elif data['type'] == 'error':
+            job.error = data['text']
+        else:
+            job.queue.put_nowait(data)
+
+    def _finish(self, job_id):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job:
+            job.done.set()
+
+    def submit(self, target, **kwargs) -> WhisperJob:
+        """
+        提交识别任务，结果在 wait() 返回后从 job.raws/job.detect/job.error 读取
+        target: overall 或 average，对应 process._overall.run / process._average.run
+        """
+        from videotrans.configure import config
+        with self._lock:
+            self._ensure_started()
+            job_id = next(self._seq)
+            lock_file = config.TEMP_DIR + f'/{self._process.pid}_{job_id}.lock'
+            with open(lock_file, 'w', encoding='utf-8') as f:
+                f.write(f'{self._process.pid}')
+            job = WhisperJob(job_id, lock_file)
+            job.process = self._process
+            self._jobs[job_id] = job
+            self._job_q.put({"job_id": job_id, "target": target, "lock_file": lock_file, "kwargs": kwargs})
+        return job
+
+    def shutdown(self):
+        with self._lock:
+            if self._process is None:
+                return
+            try:
+                self._job_q.put(None)
+                self._process.join(timeout=3)
+                if self._process.is_alive():
+                    self._process.terminate()
+            except:
+                pass
+            self._process = None
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_whisper_server() -> WhisperServer:
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = WhisperServer()
+            atexit.register(_server.shutdown)
+        return _server
@@ -1,4 +1,3 @@
-import multiprocessing
 import threading
 import time
 from dataclasses import dataclass, field
@@ -6,7 +5,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Union
 
 from videotrans.configure import config
-from videotrans.process._average import run
+from videotrans.process._server import get_whisper_server
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
@@ -33,15 +32,14 @@ class FasterAvg(BaseRecogn):
                 Path(self.pidfile).unlink(missing_ok=True)
                 return
             try:
-                if not q.empty():
-                    data = q.get_nowait()
-                    if data:
-                        if self.inst and self.inst.status_text and data['type'] == 'logs':
-                            self.inst.status_text = data['text']
-                        self._signal(text=data['text'], type=data['type'])
+                # 阻塞等待消息，超时后重新检查是否已结束或被取消
+                data = q.get(timeout=0.5)
+                if data:
+                    if self.inst and self.inst.status_text and data['type'] == 'logs':
+                        self.inst.status_text = data['text']
+                    self._signal(text=data['text'], type=data['type'])
             except:
                 pass
-            time.sleep(0.5)
 
     def _exec(self) -> Union[List[Dict], None]:
         while 1:
@@ -58,44 +56,27 @@ class FasterAvg(BaseRecogn):
                 continue
             break
 
-        # 创建队列用于在进程间传递结果
-        result_queue = multiprocessing.Queue()
         self.has_done = False
-
-        threading.Thread(target=self._get_signal_from_process, args=(result_queue,)).start()
         try:
-            with multiprocessing.Manager() as manager:
-                raws = manager.list([])
-                err = manager.dict({"msg": ""})
-                detect = manager.dict({"langcode": self.detect_language})
-
-                # 创建并启动新进程
-                process = multiprocessing.Process(target=run, args=(raws, err, detect), kwargs={
-                    "model_name": self.model_name,
-                    "is_cuda": self.is_cuda,
-                    "detect_language": self.detect_language,
-                    "audio_file": self.audio_file,
-                    "q": result_queue,
-                    "settings": config.settings,
-                    "defaulelang": config.defaulelang,
-                    "ROOT_DIR": config.ROOT_DIR,
-                    "TEMP_DIR": config.TEMP_DIR,
-                    "proxy": tools.set_proxy()
-                })
-                process.start()
-                self.pidfile = config.TEMP_DIR + f'/{process.pid}.lock'
-                with open(self.pidfile, 'w', encoding='utf-8') as f:
-                    f.write(f'{process.pid}')
-                # 等待进程执行完毕
-                process.join()
-                if err['msg']:
-                    self.error = str(err['msg'])
-                self.raws = list(raws)
-                try:
-                    if process.is_alive():
-                        process.terminate()
-                except:
-                    pass
+            # 提交到常驻识别进程，已加载的模型会被复用
+            job = get_whisper_server().submit('average',
+                model_name=self.model_name,
+                is_cuda=self.is_cuda,
+                detect_language=self.detect_language,
+                audio_file=self.audio_file,
+                settings=config.settings,
+                defaulelang=config.defaulelang,
+                ROOT_DIR=config.ROOT_DIR,
+                TEMP_DIR=config.TEMP_DIR,
+                proxy=tools.set_proxy()
+            )
+            self.pidfile = job.lock_file
+            threading.Thread(target=self._get_signal_from_process, args=(job.queue,)).start()
+            # 等待任务执行完毕
+            job.wait()
+            if job.error:
+                self.error = str(job.error)
+            self.raws = job.raws
         except Exception as e:
             self.error = '_avagel' + str(e)
             raise
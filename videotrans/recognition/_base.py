@@ -1,4 +1,6 @@
 import json
+import threading
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
@@ -7,10 +9,54 @@ from tenacity import RetryError
 
 from videotrans.configure import config
 from videotrans.configure._base import BaseCon
-from videotrans.configure._except import SpeechToTextError
+from videotrans.configure._except import SpeechToTextError, NO_RETRY_EXCEPT
 from videotrans.util import tools
 
 
+class _KeyPool:
+    """
+    在线识别多个 api key 的调度，每个 key 同时最多 max_in_flight 个请求，
+    rpm 大于 0 时每个 key 每分钟最多发出 rpm 个请求
+    """
+
+    def __init__(self, keys, max_in_flight=1, rpm=0):
+        self.keys = list(keys) or [None]
+        self.max_in_flight = max(1, max_in_flight)
+        self.interval = 60 / rpm if rpm > 0 else 0
+        self.in_flight = [0] * len(self.keys)
+        self.next_time = [0.0] * len(self.keys)
+        self.cond = threading.Condition()
+
+    @property
+    def slots(self):
+        return len(self.keys) * self.max_in_flight
+
+    def acquire(self, avoid=None, should_exit=None):
+        """返回 key 的序号，avoid 为上次失败的 key，有其他 key 可用时优先换用"""
+        with self.cond:
+            while True:
+                if should_exit and should_exit():
+                    return None
+                free = [i for i in range(len(self.keys)) if self.in_flight[i] < self.max_in_flight]
+                if avoid is not None and len(free) > 1:
+                    free = [i for i in free if i != avoid] or free
+                if free:
+                    i = min(free, key=lambda x: self.next_time[x])
+                    delay = self.next_time[i] - time.time()
+                    if delay <= 0:
+                        self.in_flight[i] += 1
+                        self.next_time[i] = time.time() + self.interval
+                        return i
+                    self.cond.wait(min(delay, 1))
+                else:
+                    self.cond.wait(1)
+
+    def release(self, i):
+        with self.cond:
+            self.in_flight[i] -= 1
+            self.cond.notify_all()
+
+
 @dataclass
 class BaseRecogn(BaseCon):
     detect_language: Optional[str] = None
@@ -210,6 +256,53 @@ class BaseRecogn(BaseCon):
                 new_raws.append(it)
         self.raws=new_raws
         
+    def _dispatch(self, chunks, fetch, on_result, keys=None, retries=None, retry_delay=10) -> bool:
+        """
+        并发发送各音频片段(或片段组)
+        fetch(i, chunk, key) 在工作线程中执行，返回该片段的识别结果，key 为本次分配的 api key
+        on_result(i, chunk, result) 在当前线程按片段顺序调用，先完成的片段等待前面的片段完成后再回调
+        单个片段出错时只重试该片段，有多个 key 时换用其他 key，重试 retries 次后仍失败则抛出异常
+        每个 key 同时发出的请求数和每分钟请求数由高级设置 recogn_concurrent / recogn_rpm 限制
+        被停止时返回 False
+        """
+        try:
+            max_in_flight = int(float(config.settings.get('recogn_concurrent', 1)))
+            rpm = int(float(config.settings.get('recogn_rpm', 0)))
+        except (TypeError, ValueError):
+            max_in_flight, rpm = 1, 0
+        if retries is None:
+            retries = int(config.settings.get('retries', 2))
+        pool = _KeyPool(keys or [], max_in_flight, rpm)
+        total = len(chunks)
+
+        def _task(i, chunk):
+            avoid = None
+            for attempt in range(retries + 1):
+                k = pool.acquire(avoid, self._exit)
+                if k is None:
+                    return None
+                try:
+                    return fetch(i, chunk, pool.keys[k])
+                except NO_RETRY_EXCEPT:
+                    raise
+                except Exception as e:
+                    if attempt >= retries or self._exit():
+                        raise
+                    avoid = k
+                    config.logger.warning(f'识别片段 {i + 1}/{total} 第{attempt + 1}次失败，{retry_delay}秒后重试:{e}')
+                finally:
+                    pool.release(k)
+                time.sleep(retry_delay)
+
+        def _done(i, chunk, result):
+            on_result(i, chunk, result)
+            self._signal(text=f"{config.transobj['yuyinshibiejindu']} {i + 1}/{total}")
+
+        workers = max(1, min(pool.slots, total))
+        if workers > 1:
+            config.logger.info(f'并发识别，{len(pool.keys)}个key，同时发送 {workers} 个请求')
+        return tools.run_in_order(chunks, _task, _done, workers=workers, should_exit=self._exit)
+
     # True 退出
     def _exit(self) -> bool:
         if config.exit_soft or (config.current_status != 'ing' and config.box_recogn != 'ing'):
@@ -1,4 +1,5 @@
 # stt项目识别接口
+import json
 import os
 import re
 import threading
@@ -7,12 +8,25 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Union
 
 from funasr import AutoModel
-from pydub import AudioSegment
 
 from videotrans.configure import config
+from videotrans.recognition import _vad
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
+# 已加载的模型，相同参数的 AutoModel 在多个任务间复用，批量处理多个文件时无需每次重新加载 vad/识别/标点模型
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _get_model(**kwargs):
+    """返回 (AutoModel, 推理锁)，同一模型同时只允许一个任务推理"""
+    key = json.dumps(kwargs, sort_keys=True, default=str)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = (AutoModel(**kwargs), threading.Lock())
+        return _models[key]
+
 
 @dataclass
 class FunasrRecogn(BaseRecogn):
@@ -61,7 +75,7 @@ class FunasrRecogn(BaseRecogn):
             return self._exec1()
         raw_subtitles = []
 
-        model = AutoModel(
+        model, model_lock = _get_model(
             model=self.model_name, model_revision="v2.0.4",
             vad_model="fsmn-vad", vad_model_revision="v2.0.4",
             punc_model="ct-punc", punc_model_revision="v2.0.4",
@@ -76,8 +90,9 @@ class FunasrRecogn(BaseRecogn):
         msg = f"模型加载完毕，进入识别" if config.defaulelang == 'zh' else 'Model loading is complete, enter recognition'
         config.FUNASR_DOWNMSG = ''
         self._tosend(msg)
-        res = model.generate(input=self.audio_file, return_raw_text=True, is_final=True,
-                             sentence_timestamp=True, batch_size_s=100, disable_pbar=True)
+        with model_lock:
+            res = model.generate(input=self.audio_file, return_raw_text=True, is_final=True,
+                                 sentence_timestamp=True, batch_size_s=100, disable_pbar=True)
 
         for it in res[0]['sentence_info']:
             tmp = {
@@ -100,7 +115,7 @@ class FunasrRecogn(BaseRecogn):
             return
 
         from funasr.utils.postprocess_utils import rich_transcription_postprocess
-        model = AutoModel(
+        model, model_lock = _get_model(
             model="iic/SenseVoiceSmall",
             punc_model="ct-punc",
             device=self.device,
@@ -112,35 +127,53 @@ class FunasrRecogn(BaseRecogn):
             hub='ms'
         )
         # vad
-        vm = AutoModel(
-            model="fsmn-vad",
-            local_dir=config.ROOT_DIR + "/models",
-            max_single_segment_time=int(float(config.settings['max_speech_duration_s'])*1000),
-            max_end_silence_time=int(config.settings.get('min_silence_duration_ms',500)),
-            hub='ms',
-            disable_update=True,
-            disable_progress_bar=True,
-            disable_log=True,
-            device=self.device)
+        vad_p = {
+            "max_single_segment_time": int(float(config.settings['max_speech_duration_s']) * 1000),
+            "max_end_silence_time": int(config.settings.get('min_silence_duration_ms', 500))
+        }
+
+        def _vad_segments():
+            # 检测结果已缓存时无需加载 vad 模型
+            vm, vm_lock = _get_model(
+                model="fsmn-vad",
+                local_dir=config.ROOT_DIR + "/models",
+                **vad_p,
+                hub='ms',
+                disable_update=True,
+                disable_progress_bar=True,
+                disable_log=True,
+                device=self.device)
+            with vm_lock:
+                return vm.generate(input=self.audio_file)[0]['value']
+
         config.FUNASR_DOWNMSG = ''
         msg = f"模型已加载开始识别，请耐心等待" if config.defaulelang == 'zh' else 'Recognition may take a while, please be patient'
 
         self._tosend(msg)
-        segments = vm.generate(input=self.audio_file)
-        audiodata = AudioSegment.from_file(self.audio_file)
+        segments = _vad.cached_regions(self.audio_file, 'fsmn-vad', vad_p, _vad_segments)
+        # 各片段直接以 16kHz numpy 视图送入模型，不再导出临时 wav
+        audio = _vad.load_audio(self.audio_file)
+
+        texts = {}
+        total = len(segments)
+        for batch in self._batches(segments):
+            if self._exit():
+                return
+            with model_lock:
+                res = model.generate(
+                    input=[audio.view(segments[n][0], segments[n][1]) for n in batch],
+                    batch_size=len(batch),
+                    language=self.detect_language[:2],  # "zh", "en", "yue", "ja", "ko", "nospeech"
+                    use_itn=True,
+                    disable_pbar=True
+                )
+            for n, it in zip(batch, res):
+                texts[n] = self.remove_unwanted_characters(rich_transcription_postprocess(it["text"]))
+            self._signal(text=f"{config.transobj['yuyinshibiejindu']} {len(texts)}/{total}")
 
         srts = []
-        for seg in segments[0]['value']:
-            chunk = audiodata[seg[0]:seg[1]]
-            filename = f"{config.TEMP_DIR}/{seg[0]}-{seg[1]}.wav"
-            chunk.export(filename)
-            res = model.generate(
-                input=filename,
-                language=self.detect_language[:2],  # "zh", "en", "yue", "ja", "ko", "nospeech"
-                use_itn=True,
-                disable_pbar=True
-            )
-            text = self.remove_unwanted_characters(rich_transcription_postprocess(res[0]["text"]))
+        for n, seg in enumerate(segments):
+            text = texts.get(n, '')
             srt = {
                 "line": len(srts) + 1,
                 "text": text,
@@ -158,3 +191,25 @@ class FunasrRecogn(BaseRecogn):
             )
         config.FUNASR_DOWNMSG = ''
         return srts
+
+    def _batches(self, segments):
+        """
+        按时长分批：片段先按时长排序，使同一批内长度接近、补齐的空白最少，
+        每批补齐后的总时长(最长片段时长*片段数)不超过 sensevoice_batch_s 秒，返回片段序号列表
+        """
+        try:
+            batch_ms = max(1, int(float(config.settings.get('sensevoice_batch_s', 60)) * 1000))
+        except (TypeError, ValueError):
+            batch_ms = 60000
+        order = sorted(range(len(segments)), key=lambda n: segments[n][1] - segments[n][0])
+        batch, batch_dur = [], 0
+        for n in order:
+            dur = segments[n][1] - segments[n][0]
+            # 补齐后一批的实际计算量约为 最长片段时长*片段数
+            if batch and max(batch_dur, dur) * (len(batch) + 1) > batch_ms:
+                yield batch
+                batch, batch_dur = [], 0
+            batch.append(n)
+            batch_dur = max(batch_dur, dur)
+        if batch:
+            yield batch
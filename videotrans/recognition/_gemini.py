@@ -1,19 +1,14 @@
 # zh_recogn 识别
 
-import logging
 import re
-import time
 from dataclasses import dataclass, field
-from pathlib import Path
 from typing import List, Any
 
 from google import genai
 from google.genai import types
-from pydub import AudioSegment
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
-from videotrans.configure._except import   NO_RETRY_EXCEPT
+from videotrans.recognition import _vad
 from videotrans.recognition._base import BaseRecogn
 from videotrans.translator import LANGNAME_DICT
 from videotrans.util import tools
@@ -33,11 +28,8 @@ class GeminiRecogn(BaseRecogn):
         if self.target_code:
             self.target_code = LANGNAME_DICT.get(self.target_code, self.target_code)
 
-        self.api_keys = config.params.get('gemini_key', '').strip().split(',')
+        self.api_keys = [k.strip() for k in config.params.get('gemini_key', '').split(',') if k.strip()]
 
-    @retry(retry=retry_if_not_exception_type(NO_RETRY_EXCEPT), stop=(stop_after_attempt(RETRY_NUMS)),
-           wait=wait_fixed(RETRY_DELAY), before=before_log(config.logger, logging.INFO),
-           after=after_log(config.logger, logging.INFO))
     def _exec(self):
         seg_list = self.cut_audio()
         nums = int(config.settings.get('gemini_recogn_chunk', 50))
@@ -47,11 +39,9 @@ class GeminiRecogn(BaseRecogn):
         srt_str_list = []
 
         prompt = config.params['gemini_srtprompt']
+        audio = _vad.load_audio(self.audio_file)
 
-        for seg_group in seg_list:
-            api_key = self.api_keys.pop(0)
-            self.api_keys.append(api_key)
-
+        def _fetch(i, seg_group, api_key):
             client = genai.Client(
                 api_key=api_key
             )
@@ -60,7 +50,7 @@ class GeminiRecogn(BaseRecogn):
                 parts.append(
                     types.Part.from_bytes(
                         mime_type="audio/wav",
-                        data=Path(f['file']).read_bytes()
+                        data=audio.wav_bytes(f['start_time'], f['end_time'])
                     )
                 )
             parts.append(types.Part.from_text(text=prompt))
@@ -108,9 +98,12 @@ class GeminiRecogn(BaseRecogn):
                 res_text += chunk.text
 
             config.logger.info(f'gemini返回结果:{res_text=}')
+            return res_text
+
+        def _on_result(i, seg_group, res_text):
             m = re.findall(r'<audio_text>(.*?)<\/audio_text>', res_text.strip(), re.I | re.S)
             if len(m) < 1:
-                continue
+                return
             str_s = []
             for i, f in enumerate(seg_group):
                 if i < len(m):
@@ -134,54 +127,16 @@ class GeminiRecogn(BaseRecogn):
                 type='subtitle'
             )
 
+        # 多个 key 时各组并发发送，单组失败只重试该组，结果按原顺序合并
+        if not self._dispatch(seg_list, _fetch, _on_result, keys=self.api_keys, retries=RETRY_NUMS,
+                              retry_delay=RETRY_DELAY):
+            return
+
         if len(srt_str_list) < 1:
             raise RuntimeError('No result:The return format may not meet the requirements')
         return srt_str_list
 
-    # 根据 时间开始结束点，切割音频片段,并保存为wav到临时目录，记录每个wav的绝对路径到list，然后返回该list
+    # 语音片段只记录开始结束时间，上传时从内存中已解码的音频直接生成 wav 数据，不再导出临时文件
     def cut_audio(self):
-
-        sampling_rate = 16000
-        from faster_whisper.audio import decode_audio
-        from faster_whisper.vad import (
-            VadOptions,
-            get_speech_timestamps
-        )
-
-        def convert_to_milliseconds(timestamps):
-            milliseconds_timestamps = []
-            for timestamp in timestamps:
-                milliseconds_timestamps.append(
-                    {
-                        "start": int(round(timestamp["start"] / sampling_rate * 1000)),
-                        "end": int(round(timestamp["end"] / sampling_rate * 1000)),
-                    }
-                )
-
-            return milliseconds_timestamps
-
-        vad_p = {
-            "threshold": float(config.settings['threshold']),
-            "min_speech_duration_ms": int(config.settings['min_speech_duration_ms']),
-            "max_speech_duration_s": float(config.settings['max_speech_duration_s']) if float(
-                config.settings['max_speech_duration_s']) > 0 else float('inf'),
-            "min_silence_duration_ms": int(config.settings['min_silence_duration_ms']),
-            "speech_pad_ms": int(config.settings['speech_pad_ms'])
-        }
-        speech_chunks = get_speech_timestamps(decode_audio(self.audio_file, sampling_rate=sampling_rate),
-                                              vad_options=VadOptions(**vad_p))
-        speech_chunks = convert_to_milliseconds(speech_chunks)
-
-        # 在config.TEMP_DIR下创建一个以当前时间戳为名的文件夹，用于保存切割后的音频片段
-        dir_name = f"{config.TEMP_DIR}/{time.time()}"
-        Path(dir_name).mkdir(parents=True, exist_ok=True)
-        data = []
-        audio = AudioSegment.from_wav(self.audio_file)
-        for it in speech_chunks:
-            start_ms, end_ms = it['start'], it['end']
-            chunk = audio[start_ms:end_ms]
-            file_name = f"{dir_name}/{start_ms}_{end_ms}.wav"
-            chunk.export(file_name, format="wav")
-            data.append({"start_time": start_ms, "end_time": end_ms, "file": file_name})
-
-        return data
+        return [{"start_time": start_ms, "end_time": end_ms} for start_ms, end_ms in
+                _vad.speech_timestamps(self.audio_file)]
@@ -1,17 +1,12 @@
-import json
-import logging
+import io
 import re
 from dataclasses import dataclass, field
-from pathlib import Path
 from typing import List, Dict, Union
 
 import speech_recognition as sr
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
-from videotrans.configure._except import  NO_RETRY_EXCEPT
+from videotrans.recognition import _vad
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
@@ -27,52 +22,33 @@ class GoogleRecogn(BaseRecogn):
         super().__post_init__()
         self._set_proxy(type='set')
 
-    @retry(retry=retry_if_not_exception_type(NO_RETRY_EXCEPT), stop=(stop_after_attempt(RETRY_NUMS)),
-           wait=wait_fixed(RETRY_DELAY), before=before_log(config.logger, logging.INFO),
-           after=after_log(config.logger, logging.INFO))
     def _exec(self) -> Union[List[Dict], None]:
         if self._exit():
             return
 
-        tmp_path = Path(f'{self.cache_folder}/{Path(self.audio_file).name}_tmp')
-        tmp_path.mkdir(parents=True, exist_ok=True)
-        tmp_path = tmp_path.as_posix()
+        # 静音检测结果由 _vad 按文件内容缓存，片段从内存中的音频直接生成 wav 数据
+        audio = _vad.load_audio(self.audio_file)
+        nonsilent_data = self._shorten_voice_old()
 
-        normalized_sound = AudioSegment.from_wav(self.audio_file)  # -20.0
-        nonslient_file = f'{tmp_path}/detected_voice.json'
-        if tools.vail_file(nonslient_file):
-            nonsilent_data = json.load(open(nonslient_file, 'r'))
-        else:
-            nonsilent_data = self._shorten_voice_old(normalized_sound)
-            with open(nonslient_file, 'w') as f:
-                f.write(json.dumps(nonsilent_data))
-
-        total_length = len(nonsilent_data)
-        recognizer = sr.Recognizer()
-
-        for i, duration in enumerate(nonsilent_data):
-            if self._exit():
-                return
+        def _fetch(i, duration, key):
             start_time, end_time, buffered = duration
             if start_time == end_time:
                 end_time += int(config.settings['voice_silence'])
-
-            chunk_filename = tmp_path + f"/c{i}_{start_time // 1000}_{end_time // 1000}.wav"
-            audio_chunk = normalized_sound[start_time:end_time]
-            audio_chunk.export(chunk_filename, format="wav")
-
-            with sr.AudioFile(chunk_filename) as source:
+            recognizer = sr.Recognizer()
+            with sr.AudioFile(io.BytesIO(audio.wav_bytes(start_time, end_time))) as source:
                 audio_data = recognizer.record(source)
                 try:
-                    text = recognizer.recognize_google(audio_data, language=self.detect_language)
+                    return recognizer.recognize_google(audio_data, language=self.detect_language)
                 except sr.UnknownValueError:
-                    text = ""
-                except sr.RequestError as e:
-                    raise
+                    return ""
 
+        def _on_result(i, duration, text):
+            start_time, end_time, buffered = duration
+            if start_time == end_time:
+                end_time += int(config.settings['voice_silence'])
             text = re.sub(r'&#\d+;', '', f"{text.capitalize()}. ".replace('&#39;', "'")).strip()
             if not text or re.match(r'^[，。、？‘’“”；：（｛｝【】）:;"\'\s \d`!@#$%^&*()_+=.,?/\\-]*$', text):
-                continue
+                return
             start = tools.ms_to_time_string(ms=start_time)
 
             end = tools.ms_to_time_string(ms=end_time)
@@ -88,21 +64,20 @@ class GoogleRecogn(BaseRecogn):
             self.raws.append(srt_line)
             if self.inst and self.inst.precent < 55:
                 self.inst.precent += 0.1
-            self._signal(text=f"{config.transobj['yuyinshibiejindu']} {srt_line['line']}/{total_length}")
             self._signal(text=f"{srt_line['text']}\n", type='subtitle')
-        return self.raws
 
-    def match_target_amplitude(self, sound, target_dBFS):
-        change_in_dBFS = target_dBFS - sound.dBFS
-        return sound.apply_gain(change_in_dBFS)
+        # 各片段并发识别，单个片段失败只重试该片段，结果按原顺序合并
+        if not self._dispatch(nonsilent_data, _fetch, _on_result, retries=RETRY_NUMS, retry_delay=RETRY_DELAY):
+            return
+        return self.raws
 
-    def _shorten_voice_old(self, normalized_sound):
-        normalized_sound = self.match_target_amplitude(normalized_sound, -20.0)
+    def _shorten_voice_old(self):
         max_interval = int(config.settings['interval_split']) * 1000
         buffer = int(config.settings['voice_silence'])
         nonsilent_data = []
-        audio_chunks = detect_nonsilent(normalized_sound, min_silence_len=int(config.settings['voice_silence']),
-                                        silence_thresh=-20 - 25)
+        # 原先将整体响度归一到 -20dBFS 后以 -45dBFS 为静音阈值，即低于整体响度 25dB 视为静音
+        audio_chunks = _vad.detect_nonsilent(self.audio_file, min_silence_len=int(config.settings['voice_silence']),
+                                             silence_thresh_db=-25)
         for i, chunk in enumerate(audio_chunks):
             start_time, end_time = chunk
             n = 0
@@ -1,14 +1,13 @@
 # openai
 import copy
 from dataclasses import dataclass, field
-from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
 
 import whisper
 import zhconv
-from pydub import AudioSegment
 
 from videotrans.configure import config
+from videotrans.recognition import _vad
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
@@ -32,14 +31,10 @@ class OpenaiWhisperRecogn(BaseRecogn):
         if self._exit():
             return
 
-        tmp_path = Path(f'{self.cache_folder}/{Path(self.audio_file).name}_tmp')
-        tmp_path.mkdir(parents=True, exist_ok=True)
-        tmp_path = tmp_path.as_posix()
-
-        # 以600s切分
+        # 以600s切分，音频一次解码为 16kHz float32 数组，各段以切片直接送入模型，无需导出临时 wav
         inter = 600000
-        normalized_sound = AudioSegment.from_wav(self.audio_file)  # -20.0
-        total_length = 1 + (len(normalized_sound) // inter)
+        audio = _vad.load_audio(self.audio_file)
+        total_length = 1 + (audio.duration_ms // inter)
 
         msg = f'[{self.model_name}]若不存在将从 hf-mirror.com 下载到 models 目录内' if config.defaulelang == 'zh' else f'If [{self.model_name}] not exists, download model from huggingface'
         if self.inst and self.inst.status_text:
@@ -62,14 +57,10 @@ class OpenaiWhisperRecogn(BaseRecogn):
                 if i < total_length - 1:
                     end_time = start_time + inter
                 else:
-                    end_time = len(normalized_sound)
-
-                chunk_filename = tmp_path + f"/c{i}_{start_time // 1000}_{end_time // 1000}.wav"
-                audio_chunk = normalized_sound[start_time:end_time]
-                audio_chunk.export(chunk_filename, format="wav")
+                    end_time = audio.duration_ms
 
                 result = self.model.transcribe(
-                    chunk_filename,
+                    audio.view(start_time, end_time),
                     language=self.detect_language.split('-')[0] if self.detect_language != 'auto' else None,
                     word_timestamps=True,
                     initial_prompt=prompt if prompt else None,
@@ -8,11 +8,11 @@ from typing import List, Dict, Any, Union
 
 import httpx
 from openai import OpenAI
-from pydub import AudioSegment
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import   NO_RETRY_EXCEPT
+from videotrans.recognition import _vad
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
@@ -34,16 +34,19 @@ class OpenaiAPIRecogn(BaseRecogn):
         else:
             self.proxies = None
 
-    @retry(retry=retry_if_not_exception_type(NO_RETRY_EXCEPT), stop=(stop_after_attempt(RETRY_NUMS)),
-           wait=wait_fixed(RETRY_DELAY), before=before_log(config.logger, logging.INFO),
-           after=after_log(config.logger, logging.INFO))
     def _exec(self) -> Union[List[Dict], None]:
         if self._exit():
             return
         if not re.search(r'api\.openai\.com/v1', self.api_url) or config.params["openairecognapi_model"].find(
                 'gpt-4o-') > -1:
             return self._thrid_api()
+        return self._openai_api()
 
+    # 整个文件一次发送，出错时整体重试
+    @retry(retry=retry_if_not_exception_type(NO_RETRY_EXCEPT), stop=(stop_after_attempt(RETRY_NUMS)),
+           wait=wait_fixed(RETRY_DELAY), before=before_log(config.logger, logging.INFO),
+           after=after_log(config.logger, logging.INFO))
+    def _openai_api(self):
         # 大于20M 从wav转为mp3
         if Path(self.audio_file).stat().st_size > 20971520:
             mp3_tmp = config.TEMP_HOME + f'/recogn{time.time()}.mp3'
@@ -101,71 +104,39 @@ class OpenaiAPIRecogn(BaseRecogn):
     def _thrid_api(self):
         # 发送请求
         raws = self.cut_audio()
+        audio = _vad.load_audio(self.audio_file)
         client = OpenAI(api_key=config.params['openairecognapi_key'], base_url=self.api_url,
                         http_client=httpx.Client(proxy=self.proxies, timeout=7200))
-        for i, it in enumerate(raws):
-            with open(it['file'], 'rb') as file:
-                transcript = client.audio.transcriptions.create(
-                    file=(it['file'], file.read()),
-                    model=config.params["openairecognapi_model"],
-                    prompt=config.params['openairecognapi_prompt'],
-                    timeout=7200,
-                    language=self.detect_language[:2].lower(),
-                    response_format="json"
-                )
-                if not hasattr(transcript, 'text'):
-                    continue
-                raws[i]['text'] = transcript.text
-        return raws
-
-    def cut_audio(self):
-
-        sampling_rate = 16000
-        from faster_whisper.audio import decode_audio
-        from faster_whisper.vad import (
-            VadOptions,
-            get_speech_timestamps
-        )
 
-        def convert_to_milliseconds(timestamps):
-            milliseconds_timestamps = []
-            for timestamp in timestamps:
-                milliseconds_timestamps.append(
-                    {
-                        "start": int(round(timestamp["start"] / sampling_rate * 1000)),
-                        "end": int(round(timestamp["end"] / sampling_rate * 1000)),
-                    }
-                )
-
-            return milliseconds_timestamps
+        def _fetch(i, it, key):
+            transcript = client.audio.transcriptions.create(
+                file=(f"{it['start_time']}_{it['end_time']}.wav", audio.wav_bytes(it['start_time'], it['end_time'])),
+                model=config.params["openairecognapi_model"],
+                prompt=config.params['openairecognapi_prompt'],
+                timeout=7200,
+                language=self.detect_language[:2].lower(),
+                response_format="json"
+            )
+            return getattr(transcript, 'text', None)
 
-        vad_p = {
-            "threshold": float(config.settings['threshold']),
-            "min_speech_duration_ms": int(config.settings['min_speech_duration_ms']),
-            "max_speech_duration_s": float(config.settings['max_speech_duration_s']) if float(
-                config.settings['max_speech_duration_s']) > 0 else float('inf'),
-            "min_silence_duration_ms": int(config.settings['min_silence_duration_ms']),
-            "speech_pad_ms": int(config.settings['speech_pad_ms'])
-        }
-        speech_chunks = get_speech_timestamps(decode_audio(self.audio_file, sampling_rate=sampling_rate),
-                                              vad_options=VadOptions(**vad_p))
-        speech_chunks = convert_to_milliseconds(speech_chunks)
+        def _on_result(i, it, text):
+            if text is None:
+                return
+            raws[i]['text'] = text
+            self._signal(text=f"{text}\n", type='subtitle')
 
-        # 在config.TEMP_DIR下创建一个以当前时间戳为名的文件夹，用于保存切割后的音频片段
-        dir_name = f"{config.TEMP_DIR}/{time.time()}"
-        Path(dir_name).mkdir(parents=True, exist_ok=True)
+        # 各片段并发发送，单个片段失败只重试该片段，结果按原顺序写回
+        if not self._dispatch(raws, _fetch, _on_result, retries=RETRY_NUMS, retry_delay=RETRY_DELAY):
+            return
+        return raws
 
+    def cut_audio(self):
+        # 只记录语音片段的时间，上传时从内存中已解码的音频生成 wav 数据，不再导出临时文件
         data = []
-        audio = AudioSegment.from_file(self.audio_file, format=self.audio_file[-3:])
-        for it in speech_chunks:
-            start_ms, end_ms = it['start'], it['end']
-            chunk = audio[start_ms:end_ms]
-            file_name = f"{dir_name}/{start_ms}_{end_ms}.wav"
-            chunk.export(file_name, format="wav")
+        for start_ms, end_ms in _vad.speech_timestamps(self.audio_file):
             data.append({
                 "start_time": start_ms,
                 "end_time": end_ms,
-                "file": file_name,
                 "text": "",
                 "time": tools.ms_to_time_string(ms=start_ms) + ' --> ' + tools.ms_to_time_string(ms=end_ms)
             })
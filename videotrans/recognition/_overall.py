@@ -1,4 +1,3 @@
-import multiprocessing
 import threading
 import time
 from dataclasses import dataclass, field
@@ -8,7 +7,7 @@ from typing import List
 
 
 from videotrans.configure import config
-from videotrans.process._overall import run
+from videotrans.process._server import get_whisper_server
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
@@ -35,30 +34,26 @@ class FasterAll(BaseRecogn):
             self.maxlen = int(config.settings.get('other_len', 60))
 
     # 获取新进程的结果
-    def _get_signal_from_process(self, q: multiprocessing.Queue):
+    def _get_signal_from_process(self, q):
         while not self.has_done:
             try:
                 if self._exit() and self.pidfile and Path(self.pidfile).exists():
                     Path(self.pidfile).unlink(missing_ok=True)
                     return
-                if not q.empty():
-                    data = q.get_nowait()
-                    if self.inst and self.inst.precent < 50:
-                        self.inst.precent += 0.1
-
-                    if data:
-                        if self.inst and self.inst.status_text and data['type'] == 'logs':
-                            self.inst.status_text = data['text']
-                        self._signal(text=data['text'], type=data['type'])
+                # 阻塞等待消息，超时后重新检查是否已结束或被取消
+                data = q.get(timeout=0.2)
+                if self.inst and self.inst.precent < 50:
+                    self.inst.precent += 0.1
+
+                if data:
+                    if self.inst and self.inst.status_text and data['type'] == 'logs':
+                        self.inst.status_text = data['text']
+                    self._signal(text=data['text'], type=data['type'])
             except:
                 pass
-            time.sleep(0.2)
 
 
     def _exec(self):
-        # 修复CUDA fork问题：强制使用spawn方法
-        multiprocessing.set_start_method('spawn', force=True)
-
         while 1:
             if self._exit():
                 return
@@ -73,61 +68,46 @@ class FasterAll(BaseRecogn):
                 continue
             break
 
-        ctx = multiprocessing.get_context('spawn')
-        # 创建队列用于在进程间传递结果
-        result_queue = ctx.Queue()
         try:
             self.has_done = False
-            threading.Thread(target=self._get_signal_from_process, args=(result_queue,)).start()
             self.error = ''
-            with ctx.Manager() as manager:
-                raws = manager.list([])
-                err = manager.dict({"msg": ""})
-                detect = manager.dict({"langcode": self.detect_language})
-                # 创建并启动新进程
-                process = ctx.Process(target=run, args=(raws, err, detect), kwargs={
-                    "model_name": self.model_name,
-                    "is_cuda": self.is_cuda,
-                    "detect_language": self.detect_language,
-                    "audio_file": self.audio_file,
-                    "q": result_queue,
-                    "settings": config.settings,
-                    "defaulelang": config.defaulelang,
-                    "ROOT_DIR": config.ROOT_DIR,
-                    "TEMP_DIR": config.TEMP_DIR,
-                    "proxy": tools.set_proxy()
-                })
-                process.start()
-                self.pidfile = config.TEMP_DIR + f'/{process.pid}.lock'
-                config.logger.info(f'开始创建 pid:{self.pidfile=}')
-                with open(self.pidfile, 'w', encoding='utf-8') as f:
-                    f.write(f'{process.pid}')
-                # 等待进程执行完毕
-                process.join()
-                if err['msg']:
-                    self.error = str(err['msg'])
-                elif len(list(raws))>0:
-                    self.error = ''
-                    if self.detect_language == 'auto' and self.inst and hasattr(self.inst, 'set_source_language'):
-                        config.logger.info(f'需要自动检测语言，当前检测出的语言为{detect["langcode"]=}')
-                        self.detect_language = detect['langcode']
-
-                    if not config.settings['rephrase']:
+            # 提交到常驻识别进程，已加载的模型会被复用
+            job = get_whisper_server().submit('overall',
+                model_name=self.model_name,
+                is_cuda=self.is_cuda,
+                detect_language=self.detect_language,
+                audio_file=self.audio_file,
+                settings=config.settings,
+                defaulelang=config.defaulelang,
+                ROOT_DIR=config.ROOT_DIR,
+                TEMP_DIR=config.TEMP_DIR,
+                proxy=tools.set_proxy()
+            )
+            self.pidfile = job.lock_file
+            config.logger.info(f'开始创建 pid:{self.pidfile=}')
+            threading.Thread(target=self._get_signal_from_process, args=(job.queue,)).start()
+            # 等待任务执行完毕
+            job.wait()
+            raws = job.raws
+            if job.error:
+                self.error = str(job.error)
+            elif len(raws) > 0:
+                self.error = ''
+                if self.detect_language == 'auto' and self.inst and hasattr(self.inst, 'set_source_language'):
+                    config.logger.info(f'需要自动检测语言，当前检测出的语言为{job.detect=}')
+                    self.detect_language = job.detect or self.detect_language
+
+                if not config.settings['rephrase']:
+                    self.get_srtlist(raws)
+                else:
+                    try:
+                        words_list = []
+                        for it in raws:
+                            words_list += it['words']
+                        self._signal(text="正在重新断句..." if config.defaulelang == 'zh' else "Re-segmenting...")
+                        self.raws = self.re_segment_sentences(words_list, self.detect_language[:2])
+                    except:
                         self.get_srtlist(raws)
-                    else:
-                        try:
-                            words_list = []
-                            for it in list(raws):
-                                words_list += it['words']
-                            self._signal(text="正在重新断句..." if config.defaulelang == 'zh' else "Re-segmenting...")
-                            self.raws = self.re_segment_sentences(words_list, self.detect_language[:2])
-                        except:
-                            self.get_srtlist(raws)
-                try:
-                    if process.is_alive():
-                        process.terminate()
-                except:
-                    pass
         except (KeyError,IndexError,NameError) as e:
             config.logger.exception(f'{e}', exc_info=True)
             self.error = f"{e}"
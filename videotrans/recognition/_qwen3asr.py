@@ -9,11 +9,11 @@ from typing import List, Dict, Any, Union
 import dashscope
 import httpx
 from openai import OpenAI
-from pydub import AudioSegment
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import NO_RETRY_EXCEPT, StopRetry
+from videotrans.recognition import _vad
 from videotrans.recognition._base import BaseRecogn
 from videotrans.util import tools
 
@@ -66,56 +66,19 @@ class Qwen3ASRRecogn(BaseRecogn):
         return raws
 
     def cut_audio(self):
-
-        sampling_rate = 16000
-        from faster_whisper.audio import decode_audio
-        from faster_whisper.vad import (
-            VadOptions,
-            get_speech_timestamps
-        )
-
-        def convert_to_milliseconds(timestamps):
-            milliseconds_timestamps = []
-            for timestamp in timestamps:
-                milliseconds_timestamps.append(
-                    {
-                        "start": int(round(timestamp["start"] / sampling_rate * 1000)),
-                        "end": int(round(timestamp["end"] / sampling_rate * 1000)),
-                    }
-                )
-
-            return milliseconds_timestamps
-
-        vad_p = {
-            "threshold": float(config.settings['threshold']),
-            "min_speech_duration_ms": int(config.settings['min_speech_duration_ms']),
-            "max_speech_duration_s": float(config.settings['max_speech_duration_s']) if float(
-                config.settings['max_speech_duration_s']) > 0 else float('inf'),
-            "min_silence_duration_ms": int(config.settings['min_silence_duration_ms']),
-            "speech_pad_ms": int(config.settings['speech_pad_ms'])
-        }
-        speech_chunks = get_speech_timestamps(decode_audio(self.audio_file, sampling_rate=sampling_rate),
-                                              vad_options=VadOptions(**vad_p))
-        speech_chunks = convert_to_milliseconds(speech_chunks)
-
-        # 在config.TEMP_DIR下创建一个以当前时间戳为名的文件夹，用于保存切割后的音频片段
+        # dashscope 只接受文件路径，片段从内存中已解码的音频直接写出，无需 pydub 再次解码
         dir_name = f"{config.TEMP_DIR}/{time.time()}"
         Path(dir_name).mkdir(parents=True, exist_ok=True)
 
         data = []
-        audio = AudioSegment.from_file(self.audio_file, format=self.audio_file[-3:])
-        for it in speech_chunks:
-            start_ms, end_ms = it['start'], it['end']
-            chunk = audio[start_ms:end_ms]
-            file_name = f"{dir_name}/{start_ms}_{end_ms}.wav"
-            chunk.export(file_name, format="wav")
+        audio = _vad.load_audio(self.audio_file)
+        for start_ms, end_ms in _vad.speech_timestamps(self.audio_file):
             data.append({
                 "start_time": start_ms,
                 "end_time": end_ms,
-                "file": file_name,
+                "file": audio.save(start_ms, end_ms, f"{dir_name}/{start_ms}_{end_ms}.wav"),
                 "text": "",
                 "time": tools.ms_to_time_string(ms=start_ms) + ' --> ' + tools.ms_to_time_string(ms=end_ms)
             })
 
         return data
-
@@ -0,0 +1,194 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from videotrans.configure import config
+from videotrans.util import tools
+
+"""
+语音活动检测(VAD)与音频切片
+
+各识别渠道原先各自解码音频、运行 VAD，再用 pydub 把每个语音片段导出为临时 wav 文件。
+现在统一在这里完成：
+  load_audio() 将音频解码一次为 16kHz 单声道 float32 数组，片段通过 view() 得到零复制的 numpy 视图，
+  需要上传时由 wav_bytes() 直接在内存中生成 wav 数据，不再写临时文件
+  speech_timestamps()  silero VAD (faster-whisper 自带的 onnx 模型)
+  detect_nonsilent()   基于能量的静音检测，numpy 向量化实现，替代 pydub 逐毫秒计算的同名函数
+  cached_regions()     其他 VAD 模型(如 funasr 的 fsmn-vad)可通过它使用同一缓存
+检测结果以 文件内容哈希+VAD 类型+参数 为键缓存在内存和 TEMP_DIR/vad_cache，重试或再次识别同一音频时直接复用
+"""
+
+SAMPLING_RATE = 16000
+# 内存中最多保留的检测结果数量，结果只是时间戳列表，占用很小
+_MAX_CACHED_REGIONS = 64
+
+_lock = threading.Lock()
+_hash_cache = {}
+_regions = OrderedDict()
+# 解码后的音频较大(1小时约 230MB)，只保留最近一个
+_audio = None
+
+
+def file_hash(file):
+    """文件内容的 sha1，按 路径+大小+修改时间 记忆，同一文件不重复计算"""
+    st = os.stat(file)
+    memo = (os.path.abspath(file), st.st_size, st.st_mtime_ns)
+    with _lock:
+        if memo in _hash_cache:
+            return _hash_cache[memo]
+    sha1 = hashlib.sha1()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(block)
+    with _lock:
+        _hash_cache[memo] = sha1.hexdigest()
+    return _hash_cache[memo]
+
+
+class SpeechAudio:
+    """解码后的 16kHz 单声道音频，时间单位为毫秒"""
+
+    def __init__(self, samples, sampling_rate=SAMPLING_RATE):
+        self.samples = samples
+        self.sampling_rate = sampling_rate
+
+    @property
+    def duration_ms(self):
+        return int(len(self.samples) * 1000 / self.sampling_rate)
+
+    def view(self, start_ms, end_ms):
+        """返回该时间段的 numpy 视图，不复制数据"""
+        return self.samples[int(start_ms * self.sampling_rate // 1000):int(end_ms * self.sampling_rate // 1000)]
+
+    def wav_bytes(self, start_ms, end_ms):
+        """该时间段编码为 16 位 wav 的 bytes，用于上传"""
+        import soundfile as sf
+        buf = io.BytesIO()
+        sf.write(buf, self.view(start_ms, end_ms), self.sampling_rate, subtype='PCM_16', format='WAV')
+        return buf.getvalue()
+
+    def save(self, start_ms, end_ms, file):
+        """只供必须传入文件路径的接口使用"""
+        Path(file).write_bytes(self.wav_bytes(start_ms, end_ms))
+        return file
+
+
+def load_audio(file):
+    global _audio
+    key = file_hash(file)
+    with _lock:
+        if _audio and _audio[0] == key:
+            return _audio[1]
+    audio = SpeechAudio(tools.load_audio_array(file, SAMPLING_RATE))
+    with _lock:
+        _audio = (key, audio)
+    return audio
+
+
+def _cache_file(key):
+    return Path(f'{config.TEMP_DIR}/vad_cache/{key}.json')
+
+
+def cached_regions(file, backend, params, compute):
+    """
+    返回 [[开始毫秒, 结束毫秒], ...]
+    backend/params 与文件内容哈希一起作为缓存键，未命中时调用 compute() 计算
+    """
+    key = tools.get_md5(json.dumps([file_hash(file), backend, params], sort_keys=True, default=str))
+    with _lock:
+        if key in _regions:
+            _regions.move_to_end(key)
+            return _regions[key]
+    regions = None
+    cache_file = _cache_file(key)
+    try:
+        regions = json.loads(cache_file.read_text(encoding='utf-8'))
+    except Exception:
+        pass
+    if regions is None:
+        regions = [[int(s), int(e)] for s, e in compute()]
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(json.dumps(regions), encoding='utf-8')
+        except Exception as e:
+            config.logger.warning(f'保存VAD结果失败:{e}')
+    else:
+        config.logger.info(f'[VAD]使用缓存的检测结果 {backend} {file}')
+    with _lock:
+        _regions[key] = regions
+        while len(_regions) > _MAX_CACHED_REGIONS:
+            _regions.popitem(last=False)
+    return regions
+
+
+def silero_options():
+    """高级设置中的 silero VAD 参数"""
+    max_speech_duration_s = float(config.settings['max_speech_duration_s'])
+    return {
+        "threshold": float(config.settings['threshold']),
+        "min_speech_duration_ms": int(config.settings['min_speech_duration_ms']),
+        "max_speech_duration_s": max_speech_duration_s if max_speech_duration_s > 0 else float('inf'),
+        "min_silence_duration_ms": int(config.settings['min_silence_duration_ms']),
+        "speech_pad_ms": int(config.settings['speech_pad_ms'])
+    }
+
+
+def speech_timestamps(file, vad_options=None):
+    """silero VAD 检测语音片段，vad_options 为空时使用高级设置中的参数"""
+    vad_options = vad_options or silero_options()
+
+    def _compute():
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        chunks = get_speech_timestamps(load_audio(file).samples, vad_options=VadOptions(**vad_options))
+        return [(int(round(it["start"] / SAMPLING_RATE * 1000)), int(round(it["end"] / SAMPLING_RATE * 1000)))
+                for it in chunks]
+
+    return cached_regions(file, 'silero', vad_options, _compute)
+
+
+def _nonsilent(samples, sampling_rate, min_silence_len, silence_thresh_db):
+    import numpy as np
+    frame = sampling_rate // 1000
+    n_ms = len(samples) // frame
+    if n_ms < min_silence_len or n_ms == 0:
+        return [[0, n_ms]] if n_ms else []
+    # 每毫秒的平方和，再用累加和求出每个 min_silence_len 长窗口的均方根
+    energy = np.square(samples[:n_ms * frame].astype(np.float64)).reshape(n_ms, frame).sum(axis=1)
+    total_rms = np.sqrt(energy.sum() / (n_ms * frame))
+    if total_rms <= 0:
+        return []
+    # 与 pydub 先将整体响度归一到 -20dBFS 再用 -45dBFS 判断静音等价：阈值相对整体均方根
+    thresh = total_rms * 10 ** (silence_thresh_db / 20)
+    csum = np.concatenate(([0.0], np.cumsum(energy)))
+    window_rms = np.sqrt((csum[min_silence_len:] - csum[:-min_silence_len]) / (min_silence_len * frame))
+    starts = np.flatnonzero(window_rms <= thresh)
+    if len(starts) == 0:
+        return [[0, n_ms]]
+    # 相互重叠或相接的静音窗口合并为一段静音
+    breaks = np.flatnonzero(np.diff(starts) > min_silence_len)
+    silent_starts = starts[np.concatenate(([0], breaks + 1))]
+    silent_ends = starts[np.concatenate((breaks, [len(starts) - 1]))] + min_silence_len
+    regions = []
+    prev_end = 0
+    for s, e in zip(silent_starts.tolist(), silent_ends.tolist()):
+        if s > prev_end:
+            regions.append([prev_end, s])
+        prev_end = e
+    if prev_end < n_ms:
+        regions.append([prev_end, n_ms])
+    return regions
+
+
+def detect_nonsilent(file, min_silence_len, silence_thresh_db=-25.0):
+    """
+    基于能量检测非静音片段，与 pydub.silence.detect_nonsilent 结果一致
+    silence_thresh_db 为相对整体响度的阈值
+    """
+    min_silence_len = int(min_silence_len)
+    return cached_regions(
+        file, 'energy', {"min_silence_len": min_silence_len, "silence_thresh_db": float(silence_thresh_db)},
+        lambda: _nonsilent(load_audio(file).samples, SAMPLING_RATE, min_silence_len, float(silence_thresh_db)))
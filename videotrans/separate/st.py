@@ -1,60 +1,112 @@
 import hashlib
-import os
+import shutil
+import threading
 import traceback
 from pathlib import Path
 
-import librosa
+import numpy as np
 import soundfile as sf
 
-from pydub import AudioSegment
-
 from videotrans.configure import config
 
 from videotrans.separate.vr import AudioPre
 
 
-def uvr(*, model_name=None, save_root=None, inp_path=None, source="logs", uuid=None, percent=[0, 1]):
-    infos = []
-    pre_fun=None
-    try:
+class SeparateSession:
+    """
+    人声背景音分离会话
+
+    模型只在首次使用时加载一次，之后在同一任务的所有片段以及后续排队任务间复用，
+    close() 时才释放模型及显存。同一时间只允许一个片段推理，避免多任务同时占用显存
+    """
+
+    def __init__(self, model_name="HP2"):
+        self.model_name = model_name
+        self.pre_fun = None
+        self.refs = 0
+        self._lock = threading.Lock()
+        self._close_timer = None
+
+    def _load(self):
+        if self.pre_fun is not None:
+            return
         import torch
-        func = AudioPre
-        pre_fun = func(
+        config.logger.info(f'加载人声分离模型 {self.model_name}')
+        self.pre_fun = AudioPre(
             agg=10,
-            model_path=config.ROOT_DIR + f"/uvr5_weights/{model_name}.pth",
+            model_path=config.ROOT_DIR + f"/uvr5_weights/{self.model_name}.pth",
             device="cuda" if torch.cuda.is_available() else "cpu",
-            is_half=False,
-            source=source
+            is_half=False
         )
-        done = 0
-        try:
-            y, sr = librosa.load(inp_path, sr=None)
-            info = sf.info(inp_path)
-            channels = info.channels
-            need_reformat = 0
-            pre_fun._path_audio_(
+
+    def separate(self, inp_path, save_root, source="logs", uuid=None, percent=[0, 1]):
+        with self._lock:
+            self._load()
+            self.pre_fun._path_audio_(
                 inp_path,
                 ins_root=save_root,
                 uuid=uuid,
-                percent=percent
+                percent=percent,
+                source=source
             )
-            done = 1
-        except  Exception:
-            traceback.print_exc()
-    except:
-        infos.append(traceback.format_exc())
-        yield "\n".join(infos)
-    finally:
-        try:
-            if hasattr(pre_fun, "model"):
-                del pre_fun.model
-            del pre_fun
-        except Exception:
-            traceback.print_exc()
-        import torch
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-    yield "\n".join(infos)
+
+    def close(self):
+        with self._lock:
+            if self.pre_fun is None:
+                return
+            try:
+                if hasattr(self.pre_fun, "model"):
+                    del self.pre_fun.model
+                self.pre_fun = None
+            except Exception:
+                traceback.print_exc()
+            config.logger.info(f'释放人声分离模型 {self.model_name}')
+            import gc
+            gc.collect()
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+
+# 共享会话，所有分离任务共用
+_sessions = {}
+_sessions_lock = threading.Lock()
+# 最后一个任务结束后，等待这么多秒仍无新任务则关闭会话释放模型
+SESSION_IDLE_CLOSE = 60
+
+
+def acquire_session(model_name="HP2") -> SeparateSession:
+    with _sessions_lock:
+        session = _sessions.get(model_name)
+        if session is None:
+            session = SeparateSession(model_name)
+            _sessions[model_name] = session
+        if session._close_timer is not None:
+            session._close_timer.cancel()
+            session._close_timer = None
+        session.refs += 1
+        return session
+
+
+def release_session(session: SeparateSession):
+    with _sessions_lock:
+        session.refs = max(0, session.refs - 1)
+        if session.refs > 0:
+            return
+        if config.exit_soft or SESSION_IDLE_CLOSE <= 0:
+            session.close()
+            return
+        session._close_timer = threading.Timer(SESSION_IDLE_CLOSE, _close_if_idle, args=(session,))
+        session._close_timer.daemon = True
+        session._close_timer.start()
+
+
+def _close_if_idle(session: SeparateSession):
+    with _sessions_lock:
+        if session.refs > 0:
+            return
+        session._close_timer = None
+    session.close()
 
 
 def convert_to_pure_eng_num(string):
@@ -65,76 +117,134 @@ def convert_to_pure_eng_num(string):
     return hex_digest
 
 
-def split_audio(file_path):
-    audio = AudioSegment.from_wav(file_path)
-    segment_length = 300
+# 相邻分块重叠秒数，重叠部分交叉淡入淡出，消除拼接处的接缝
+CROSSFADE_SEC = 2
+SEPARATE_SR = 44100
+
+
+def _prepare_source(audio, work_dir):
+    """确保输入为 soundfile 可直接分块读取的 44100Hz wav，否则先用 ffmpeg 转换"""
     try:
-        segment_length = int(config.settings['bgm_split_time'])
+        info = sf.info(audio)
+        if info.samplerate == SEPARATE_SR and info.channels in (1, 2):
+            return audio
     except Exception:
         pass
-    output_folder = Path(config.TEMP_DIR) / "separate"
-    output_folder.mkdir(parents=True, exist_ok=True)
-    output_folder = output_folder.as_posix()
-
-    total_length = len(audio)  # Total length in milliseconds
-    segment_length_ms = segment_length * 1000  # Convert segment length to milliseconds
-    segments = []
-
-    for i in range(0, total_length, segment_length_ms):
-        start = i
-        end = min(i + segment_length_ms, total_length)
-        segment = audio[start:end]
-        segment_filename = os.path.join(output_folder, f"segment_{i // 1000}.wav")
-        # 如果音频不是2通道，16kHz，则进行转换
-        if segment.channels != 2:
-            segment = segment.set_channels(2)
-        if segment.frame_rate != 44100:
-            segment = segment.set_frame_rate(44100)
-        segment.export(segment_filename, format="wav")
-        segments.append(segment_filename)
-
-    return segments
-
-
-def concatenate_audio(input_wav_list, out_wav):
-    combined = AudioSegment.empty()
-    for wav_file in input_wav_list:
-        audio = AudioSegment.from_wav(wav_file)
-        if audio.channels != 2:
-            audio = audio.set_channels(2)
-        if audio.frame_rate != 44100:
-            audio = audio.set_frame_rate(44100)
-        combined += audio
-
-    combined.export(out_wav, format="wav")
+    from videotrans.util import tools
+    newfile = f'{work_dir}/source.wav'
+    tools.runffmpeg(["-y", "-i", audio, "-vn", "-ac", "2", "-ar", f"{SEPARATE_SR}", "-c:a", "pcm_s16le", newfile])
+    return newfile
+
+
+def _read_output(file, frames):
+    # 读取分离结果，长度对齐到输入分块长度，统一为双声道 float32
+    data, _ = sf.read(file, dtype='float32', always_2d=True)
+    if data.shape[1] == 1:
+        data = np.repeat(data, 2, axis=1)
+    if data.shape[0] < frames:
+        data = np.pad(data, ((0, frames - data.shape[0]), (0, 0)))
+    return data[:frames, :2]
+
+
+class _OverlapAddWriter:
+    """按块追加写入 wav，每块末尾与下一块重叠的部分暂存，与下一块开头交叉淡化后再写入"""
+
+    def __init__(self, file):
+        self.file = file
+        self.tail = None
+        self.sf = sf.SoundFile(file, 'w', samplerate=SEPARATE_SR, channels=2, subtype='PCM_16', format='WAV')
+
+    def write(self, data, hold=0):
+        # hold: 末尾与下一块重叠的帧数，暂不写入
+        if self.tail is not None:
+            n = min(len(self.tail), len(data))
+            fade_in = np.linspace(0, 1, n, dtype=np.float32)[:, None]
+            mixed = self.tail[:n] * (1 - fade_in) + data[:n] * fade_in
+            self.sf.write(mixed)
+            data = data[n:]
+            self.tail = None
+        if hold <= 0 or len(data) <= hold:
+            self.sf.write(data)
+            return
+        self.sf.write(data[:-hold])
+        self.tail = data[-hold:].copy()
+
+    def close(self):
+        if self.tail is not None:
+            self.sf.write(self.tail)
+            self.tail = None
+        self.sf.close()
 
 
 # path 是需要保存vocal.wav的目录
 def start(audio, path, source="logs", uuid=None):
+    """
+    流式分离人声和背景音
+
+    按 bgm_split_time 秒分块，每块多读 CROSSFADE_SEC 秒与下一块重叠，只按需读取当前分块，
+    分离结果与前一块的重叠部分交叉淡化后追加写入 vocal.wav/instrument.wav，内存占用与视频时长无关
+    """
     Path(path).mkdir(parents=True, exist_ok=True)
-    reslist = split_audio(audio)
-    vocal_list = []
-    instr_list = []
-    grouplen = len(reslist)
-    per = round(1 / grouplen, 2)
-    for i, audio_seg in enumerate(reslist):
-        if config.exit_soft or (uuid in config.stoped_uuid_set):
-            return
-        audio_path = Path(audio_seg)
-        path_dir = audio_path.parent / audio_path.stem
-        path_dir.mkdir(parents=True, exist_ok=True)
-        try:
-            gr = uvr(model_name="HP2", save_root=path_dir.as_posix(), inp_path=Path(audio_seg).as_posix(),
-                     source=source, uuid=uuid, percent=[i * per, per])
-            print(next(gr))
-            print(next(gr))
-        except StopIteration:
-            vocal_list.append((path_dir / 'vocal.wav').as_posix())
-            instr_list.append((path_dir / 'instrument.wav').as_posix())
-        except Exception as e:
-            raise
-
-    if len(vocal_list) < 1 or len(instr_list) < 1:
+    segment_length = 300
+    try:
+        segment_length = int(config.settings['bgm_split_time'])
+    except Exception:
+        pass
+    work_dir = Path(config.TEMP_DIR) / f"separate/{uuid if uuid else convert_to_pure_eng_num(audio)}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    work_dir = work_dir.as_posix()
+
+    source_file = _prepare_source(audio, work_dir)
+    hop = segment_length * SEPARATE_SR
+    overlap = CROSSFADE_SEC * SEPARATE_SR
+    total_frames = sf.info(source_file).frames
+    if total_frames < 1:
         raise Exception('separate bgm error')
-    concatenate_audio(instr_list, Path(f"{path}/instrument.wav").as_posix())
-    concatenate_audio(vocal_list, Path(f"{path}/vocal.wav").as_posix())
+    grouplen = (total_frames + hop - 1) // hop
+    per = round(1 / grouplen, 2)
+
+    # 先写入临时文件，全部完成后再改名，避免中途停止留下不完整的 vocal.wav 被当作已分离
+    vocal_file = Path(f"{path}/vocal.wav").as_posix()
+    instr_file = Path(f"{path}/instrument.wav").as_posix()
+    vocal_writer = _OverlapAddWriter(f'{work_dir}/vocal.part.wav')
+    instr_writer = _OverlapAddWriter(f'{work_dir}/instrument.part.wav')
+    session = acquire_session("HP2")
+    finished = False
+    try:
+        with sf.SoundFile(source_file) as reader:
+            for i in range(grouplen):
+                if config.exit_soft or (uuid in config.stoped_uuid_set):
+                    return
+                start_frame = i * hop
+                is_last = i == grouplen - 1
+                frames = min(hop + (0 if is_last else overlap), total_frames - start_frame)
+                # 超出下一块起点的部分即为重叠区
+                hold = 0 if is_last else frames - hop
+                reader.seek(start_frame)
+                chunk = reader.read(frames, dtype='int16', always_2d=True)
+                if chunk.shape[1] == 1:
+                    chunk = np.repeat(chunk, 2, axis=1)
+                chunk_dir = f'{work_dir}/chunk_{i}'
+                Path(chunk_dir).mkdir(parents=True, exist_ok=True)
+                chunk_file = f'{chunk_dir}/input.wav'
+                sf.write(chunk_file, chunk, SEPARATE_SR, subtype='PCM_16')
+                del chunk
+                try:
+                    session.separate(chunk_file, chunk_dir, source=source, uuid=uuid, percent=[i * per, per])
+                except Exception:
+                    # 停止时推理中途返回，不视为出错
+                    if config.exit_soft or (uuid in config.stoped_uuid_set):
+                        return
+                    raise
+                vocal_writer.write(_read_output(f'{chunk_dir}/vocal.wav', frames), hold=hold)
+                instr_writer.write(_read_output(f'{chunk_dir}/instrument.wav', frames), hold=hold)
+                shutil.rmtree(chunk_dir, ignore_errors=True)
+        finished = True
+    finally:
+        release_session(session)
+        vocal_writer.close()
+        instr_writer.close()
+        if finished:
+            shutil.move(f'{work_dir}/vocal.part.wav', vocal_file)
+            shutil.move(f'{work_dir}/instrument.part.wav', instr_file)
+        shutil.rmtree(work_dir, ignore_errors=True)
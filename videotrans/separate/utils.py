@@ -1,4 +1,5 @@
 import json
+import os
 
 import numpy as np
 import torch
@@ -27,6 +28,43 @@ def make_padding(width, cropsize, offset):
     return left, right, roi_size
 
 
+# 单个窗口推理时模型中间激活占用约为输入大小的倍数，用于估算批大小
+_ACTIVATION_FACTOR = 64
+_MAX_BATCH_SIZE = 16
+
+
+def _available_memory(device):
+    """返回当前设备可用内存字节数，无法获取时返回 0"""
+    try:
+        if str(device).startswith('cuda'):
+            return torch.cuda.mem_get_info()[0]
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError, RuntimeError):
+        return 0
+
+
+def get_batch_size(X_mag_pad, window_size, device, is_half, n_window):
+    """
+    每次前向推理的窗口数，separate_batch 默认为1即逐窗口推理，设置大于0时直接使用，为0时根据可用内存自动决定
+    CPU 上不超过 torch 当前线程数，线程越多批量推理越能发挥矩阵运算吞吐
+    """
+    try:
+        batch_size = int(config.settings.get('separate_batch', 1))
+    except (TypeError, ValueError):
+        batch_size = 1
+    if batch_size < 1:
+        window_bytes = X_mag_pad.shape[0] * X_mag_pad.shape[1] * window_size * (2 if is_half else 4)
+        available = _available_memory(device)
+        if available > 0:
+            batch_size = int(available // 2 // (window_bytes * _ACTIVATION_FACTOR))
+        else:
+            batch_size = 4
+        if not str(device).startswith('cuda'):
+            batch_size = min(batch_size, torch.get_num_threads())
+        batch_size = min(batch_size, _MAX_BATCH_SIZE)
+    return max(1, min(batch_size, n_window))
+
+
 def inference(X_spec, device, model, aggressiveness, data, source="logs", uuid=None, percent=[0, 1]):
     """
     data : dic configs
@@ -36,23 +74,22 @@ def inference(X_spec, device, model, aggressiveness, data, source="logs", uuid=N
             X_mag_pad, roi_size, n_window, device, model, aggressiveness, is_half=True, source="logs"
     ):
         model.eval()
+        batch_size = get_batch_size(X_mag_pad, data["window_size"], device, is_half, n_window)
         with torch.no_grad():
             preds = []
-
-            iterations = [n_window]
-
-            total_iterations = sum(iterations)
-            for i in range(n_window):
+            # 每次前向推理 batch_size 个窗口，各窗口之间相互独立，batch_size=1 时与逐窗口推理完全一致
+            for batch_start in range(0, n_window, batch_size):
                 if config.exit_soft or (uuid in config.stoped_uuid_set):
                     return
-                jd = (percent[0] + (percent[1] * (i + 1) / n_window)) * 100
+                batch_end = min(batch_start + batch_size, n_window)
+                jd = (percent[0] + (percent[1] * batch_end / n_window)) * 100
                 jd = 100 if jd >= 100 else jd
                 tools.set_process(text=f"{config.transobj['Separating background music']} {round(jd, 1)}%", type=source,
                                   uuid=uuid)
-                start = i * roi_size
-                X_mag_window = X_mag_pad[
-                               None, :, :, start: start + data["window_size"]
-                               ]
+                X_mag_window = np.stack([
+                    X_mag_pad[:, :, i * roi_size: i * roi_size + data["window_size"]]
+                    for i in range(batch_start, batch_end)
+                ])
                 X_mag_window = torch.from_numpy(X_mag_window)
                 if is_half:
                     X_mag_window = X_mag_window.half()
@@ -61,7 +98,7 @@ def inference(X_spec, device, model, aggressiveness, data, source="logs", uuid=N
                 pred = model.predict(X_mag_window, aggressiveness)
 
                 pred = pred.detach().cpu().numpy()
-                preds.append(pred[0])
+                preds.extend(pred)
 
             pred = np.concatenate(preds, axis=2)
         return pred
@@ -14,6 +14,7 @@ from videotrans.separate.utils import inference
 
 class AudioPre:
     def __init__(self, agg, model_path, device, is_half, tta=False, source="logs"):
+        # 模型在此加载一次，之后可对多个音频重复调用 _path_audio_
         self.model_path = model_path
         self.device = device
         self.source = source
@@ -40,8 +41,10 @@ class AudioPre:
         self.model = model
 
     def _path_audio_(
-            self, music_file, ins_root=None, format="wav", is_hp3=False, uuid=None, percent=[0, 1]
+            self, music_file, ins_root=None, format="wav", is_hp3=False, uuid=None, percent=[0, 1], source=None
     ):
+        if source is None:
+            source = self.source
 
         if ins_root is None:
             return "No save root."
@@ -103,7 +106,7 @@ class AudioPre:
         }
         with torch.no_grad():
             pred, X_mag, X_phase = inference(
-                X_spec_m, self.device, self.model, aggressiveness, self.data, self.source,
+                X_spec_m, self.device, self.model, aggressiveness, self.data, source,
                 uuid=uuid,
                 percent=percent
             )
@@ -0,0 +1,99 @@
+"""
+最终合成的 ffmpeg 命令规划
+
+原先添加背景音乐、重新嵌入分离出的背景音各自调用多次 ffmpeg：拼接循环背景音、调节音量、
+与配音 amix 混合，每步都写出完整时长的中间 wav，最后再单独执行一次合成视频。
+现在这些步骤都加入同一个 filter_complex，由一次 ffmpeg 调用完成：
+  背景音循环      -stream_loop -1 输入，amix duration=first 截断到配音时长
+  音量/混合       volume、amix 滤镜，混合顺序和参数与原先逐步处理一致
+  硬字幕          subtitles 滤镜
+  配音音频输出    asplit 后作为第二个输出直接写入目标文件夹
+"""
+
+
+class AssemblyPlan:
+    def __init__(self, video):
+        self._inputs = [['-i', video]]
+        self._filters = []
+        # 当前音频：未经滤镜时为输入流如 1:a，经过滤镜后为标签如 [a1]
+        self._audio = None
+        self._label = 0
+        self._video_filter = None
+        self._subtitle = None
+        self._save_audio = None
+
+    def _input(self, file, loop=False):
+        self._inputs.append((['-stream_loop', '-1'] if loop else []) + ['-i', file])
+        return len(self._inputs) - 1
+
+    def _next_label(self):
+        self._label += 1
+        return f'[a{self._label}]'
+
+    @property
+    def audio_filtered(self):
+        return self._audio is not None and self._audio.startswith('[')
+
+    def set_audio(self, file, volume=1.0):
+        """主音轨，配音或原始音频"""
+        self._audio = f'{self._input(file)}:a'
+        if volume != 1.0:
+            label = self._next_label()
+            self._filters.append(f'[{self._audio}]volume={volume}{label}')
+            self._audio = label
+        return self
+
+    def mix(self, file, volume=1.0, loop=False):
+        """将背景音降低音量后与当前音轨混合，时长以当前音轨为准"""
+        if self._audio is None:
+            raise RuntimeError('mix() requires set_audio() first')
+        n = self._input(file, loop=loop)
+        current = self._audio if self.audio_filtered else f'[{self._audio}]'
+        back, label = self._next_label(), self._next_label()
+        self._filters.append(f'[{n}:a]volume={volume}{back}')
+        self._filters.append(
+            f'{current}{back}amix=inputs=2:duration=first:dropout_transition=2,aformat=channel_layouts=stereo{label}')
+        self._audio = label
+        return self
+
+    def burn_subtitles(self, file):
+        self._video_filter = f'subtitles={file}'
+        return self
+
+    def soft_subtitles(self, file):
+        self._subtitle = self._input(file)
+        return self
+
+    def save_audio(self, file):
+        """同时将最终音轨保存为 pcm wav"""
+        self._save_audio = file
+        return self
+
+    def build(self, output, output_args, progress=None):
+        """output_args 为视频输出的编码等参数，返回完整的 ffmpeg 参数列表"""
+        cmd = ['-y']
+        if progress:
+            cmd += ['-progress', progress]
+        for it in self._inputs:
+            cmd += it
+        filters = list(self._filters)
+        video = '0:v'
+        if self._video_filter:
+            filters.append(f'[0:v]{self._video_filter}[vout]')
+            video = '[vout]'
+        audio, save = self._audio, self._audio
+        if self._save_audio and self.audio_filtered:
+            audio, save = '[aout]', '[asave]'
+            filters.append(f'{self._audio}asplit=2[aout][asave]')
+        if filters:
+            cmd += ['-filter_complex', ';'.join(filters)]
+        if self._save_audio and save:
+            # 未经滤镜时直接复制音频流
+            cmd += ['-map', save, '-c:a', 'pcm_s16le' if self.audio_filtered else 'copy', self._save_audio]
+        # 视频输出放在最后，runffmpeg 据最后一个参数判断是否为视频输出、追加自定义参数及回退软编码
+        cmd += ['-map', video]
+        if audio:
+            cmd += ['-map', audio]
+        if self._subtitle is not None:
+            cmd += ['-map', f'{self._subtitle}:s']
+        return cmd + output_args + [output]
@@ -2,13 +2,17 @@ import json
 import os
 import shutil
 import subprocess
+import sys
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from pydub import AudioSegment
 
 from videotrans.configure import config
 from videotrans.util import tools
+from videotrans.util.help_audio import DUBBING_SAMPLE_RATE, DUBBING_CHANNELS
 
 
 class SpeedRate:
@@ -74,9 +78,9 @@ class SpeedRate:
     """
 
     MIN_CLIP_DURATION_MS = 50
-    # [新增] 统一所有中间音频文件的参数，防止拼接错误
-    AUDIO_SAMPLE_RATE = 44100
-    AUDIO_CHANNELS = 2
+    # [新增] 统一所有中间音频文件的参数，防止拼接错误，与配音渠道输出的统一格式一致
+    AUDIO_SAMPLE_RATE = DUBBING_SAMPLE_RATE
+    AUDIO_CHANNELS = DUBBING_CHANNELS
 
     def __init__(self,
                  *,
@@ -101,9 +105,6 @@ class SpeedRate:
         self.cache_folder = cache_folder if cache_folder else Path(
             f'{config.TEMP_DIR}/{str(uuid if uuid else time.time())}').as_posix()
         Path(self.cache_folder).mkdir(parents=True, exist_ok=True)
-        # 音频片段缓存目录
-        self.audio_clips_folder = Path(f'{self.cache_folder}/audio_clips').as_posix()
-        Path(self.audio_clips_folder).mkdir(parents=True, exist_ok=True)
 
         self.target_audio_original = target_audio
         self.target_audio = Path(f'{self.cache_folder}/final_audio{Path(target_audio).suffix}').as_posix()
@@ -111,6 +112,8 @@ class SpeedRate:
         self.max_audio_speed_rate = 100
         self.max_video_pts_rate = 10
         self.source_video_fps = 30
+        # 并行裁切视频片段时，每个 ffmpeg 进程可用的线程数，0 为不限制
+        self.video_cut_threads = 0
 
         # 检测并设置可用的音频变速滤镜
         self.audio_speed_filter = self._check_ffmpeg_filters()
@@ -154,24 +157,48 @@ class SpeedRate:
         self._calculate_adjustments()
         self._execute_audio_speedup()
         clip_meta_list_with_real_durations = self._execute_video_processing()
+        # 任务已停止时不再重建和写出音频时间轴
+        if self._is_stopped():
+            return self.queue_tts
 
-        audio_concat_list = self._recalculate_timeline_and_merge_audio(clip_meta_list_with_real_durations)
-        if audio_concat_list:
-            self._finalize_files(audio_concat_list)
+        placements, total_duration_ms = self._recalculate_timeline_and_merge_audio(clip_meta_list_with_real_durations)
+        if placements:
+            self._finalize_files(placements, total_duration_ms)
         return self.queue_tts
 
     def _standardize_audio_segment(self, segment):
         """[新增] 辅助函数，用于将任何AudioSegment对象标准化"""
-        return segment.set_frame_rate(self.AUDIO_SAMPLE_RATE).set_channels(self.AUDIO_CHANNELS)
+        return segment.set_frame_rate(self.AUDIO_SAMPLE_RATE).set_channels(self.AUDIO_CHANNELS).set_sample_width(2)
+
+    def _ms_to_frames(self, ms):
+        return max(0, int(round(ms * self.AUDIO_SAMPLE_RATE / 1000)))
+
+    def _load_clip_samples(self, file_path, line=None):
+        """
+        将配音文件解码为标准化的 int16 NumPy 数组，形状为 (帧数, 声道数)。
+        文件不存在或解码失败时返回 None。
+        """
+        import numpy as np
+        if not tools.vail_file(file_path):
+            config.logger.warning(f"字幕[{line}] 配音文件不存在: {file_path}，将使用静音替代。")
+            return None
+        try:
+            # 配音渠道输出的已是统一格式 wav，直接读取，无需再解码重采样
+            samples = tools.read_dubbing_wav(file_path)
+            if samples is not None:
+                return samples
+            segment = self._standardize_audio_segment(AudioSegment.from_file(file_path))
+        except Exception as e:
+            config.logger.error(f"字幕[{line}] 加载音频文件 {file_path} 失败: {e}，将使用静音替代。")
+            return None
+        return np.frombuffer(segment.raw_data, dtype=np.int16).reshape(-1, self.AUDIO_CHANNELS)
 
     def _run_no_rate_change_mode(self):
         """
         模式 不对音频视频做任何加减速处理。
-        [重构] 现在此模式也使用基于FFmpeg的流式拼接，以处理大文件。
         1. 准备数据。
-        2. 循环中，生成每个音频片段（配音+静音）的临时WAV文件。
-        3. 生成一个文件列表供FFmpeg concat使用。
-        4. 调用通用的 `_finalize_files` 方法来处理拼接和与视频的最终对齐。
+        2. 循环中，计算每个配音片段在时间轴上的偏移，静音区间只推进偏移，不再生成文件。
+        3. 调用通用的 `_finalize_files` 方法，一次性写入时间轴缓冲区并与视频对齐。
         """
         process_text = "[纯净模式] 正在拼接音频..." if config.defaulelang == 'zh' else "[Pure Mode] Merging audio..."
         tools.set_process(text=process_text, uuid=self.uuid)
@@ -179,7 +206,7 @@ class SpeedRate:
 
         self._prepare_data()
 
-        audio_concat_list = []
+        placements = []
         last_end_time = 0
         total_audio_duration = 0
 
@@ -187,31 +214,13 @@ class SpeedRate:
             # 1. 填充字幕前的静音
             silence_duration = it['start_time_source'] - last_end_time
             if silence_duration > self.MIN_CLIP_DURATION_MS:
-                silence_clip_path = Path(self.audio_clips_folder, f"{i:05d}_pre_silence.wav").as_posix()
-                # [修正] 标准化静音参数
-                silent_segment = AudioSegment.silent(duration=silence_duration)
-                self._standardize_audio_segment(silent_segment).export(silence_clip_path, format="wav")
-                audio_concat_list.append(silence_clip_path)
-                config.logger.info(f"字幕[{it['line']}]前，生成静音片段 {silence_duration}ms")
+                config.logger.info(f"字幕[{it['line']}]前，插入静音 {silence_duration}ms")
                 total_audio_duration += silence_duration
 
-            # 加载并处理配音片段
-            segment = None
-            dubb_duration = 0
-            if tools.vail_file(it['filename']):
-                try:
-                    # [修正] 标准化加载的音频
-                    segment = AudioSegment.from_file(it['filename'])
-                    segment = self._standardize_audio_segment(segment)
-                    dubb_duration = len(segment)
-                except Exception as e:
-                    config.logger.error(f"字幕[{it['line']}] 加载音频文件 {it['filename']} 失败: {e}，将忽略此片段。")
-            else:
-                config.logger.warning(f"字幕[{it['line']}] 配音文件不存在: {it['filename']}，将忽略此片段。")
-
-            it['dubb_time'] = dubb_duration
+            # 时长已在 _prepare_data 中由文件头获得，片段在写入时间轴时才逐个解码，不同时占用内存
+            dubb_duration = it['dubb_time']
 
-            if not segment:
+            if dubb_duration <= 0:
                 last_end_time = it['end_time_source']
                 continue
 
@@ -220,13 +229,10 @@ class SpeedRate:
             it['startraw'], it['endraw'] = tools.ms_to_time_string(ms=it['start_time']), tools.ms_to_time_string(
                 ms=it['end_time'])
 
-            # 导出当前配音片段
-            dub_clip_path = Path(self.audio_clips_folder, f"{i:05d}_dub.wav").as_posix()
-            segment.export(dub_clip_path, format="wav")
-            audio_concat_list.append(dub_clip_path)
+            placements.append((total_audio_duration, None, it['filename'], it['line']))
             total_audio_duration += dubb_duration
             config.logger.info(
-                f"字幕[{it['line']}] 已生成配音片段，时长: {dubb_duration}ms, 新时间区间: {it['start_time']}-{it['end_time']}")
+                f"字幕[{it['line']}] 已放置配音片段，时长: {dubb_duration}ms, 新时间区间: {it['start_time']}-{it['end_time']}")
 
             # 填充配音后的静音
             if i < len(self.queue_tts) - 1:
@@ -235,20 +241,15 @@ class SpeedRate:
                 if available_space >= dubb_duration:
                     remaining_silence = available_space - dubb_duration
                     if remaining_silence > self.MIN_CLIP_DURATION_MS:
-                        post_silence_path = Path(self.audio_clips_folder, f"{i:05d}_post_silence.wav").as_posix()
-                        # [修正] 标准化静音参数
-                        silent_segment = AudioSegment.silent(duration=remaining_silence)
-                        self._standardize_audio_segment(silent_segment).export(post_silence_path, format="wav")
-                        audio_concat_list.append(post_silence_path)
                         total_audio_duration += remaining_silence
-                        config.logger.info(f"字幕[{it['line']}]后，生成剩余静音片段 {remaining_silence}ms")
+                        config.logger.info(f"字幕[{it['line']}]后，插入剩余静音 {remaining_silence}ms")
                     last_end_time = next_start_time
                 else:
                     last_end_time = it['start_time_source'] + dubb_duration
             else:
                 last_end_time = it['start_time'] + it['dubb_time']
 
-        self._finalize_files(audio_concat_list)
+        self._finalize_files(placements, total_audio_duration)
         config.logger.info("================== [纯净模式] 处理完成 ==================")
 
     def _prepare_data(self):
@@ -269,6 +270,11 @@ class SpeedRate:
                 config.logger.warning(f"无法探测源视频帧率，将使用默认值30。错误: {e}"); self.source_video_fps = 30
         config.logger.info(f"源视频帧率被设定为: {self.source_video_fps}")
 
+        # 统一格式的 wav 直接读取文件头，只对其他格式的配音文件批量并发探测，结果进入 ffprobe 缓存
+        probe_files = [it['filename'] for it in self.queue_tts if
+                       tools.vail_file(it['filename']) and tools.get_dubbing_wav_ms(it['filename']) is None]
+        if probe_files:
+            tools.probe_media_batch(probe_files)
         for it in self.queue_tts:
             it['start_time_source'] = it['start_time']
             it['end_time_source'] = it['end_time']
@@ -474,30 +480,151 @@ class SpeedRate:
             return None
 
         clip_meta_list = self._create_clip_meta()
+        if not clip_meta_list:
+            return None
 
-        for task in clip_meta_list:
-            if config.exit_soft: return None
-            # PTS > 1.01 才应用，避免浮点数误差导致不必要的处理
-            pts_param = str(task['pts']) if task.get('pts', 1.0) > 1.01 else None
-            self._cut_to_intermediate(ss=task['ss'], to=task['to'], source=self.novoice_mp4_original, pts=pts_param,
-                                      out=task['out'])
+        # filter=单次滤镜图重定时，失败时回退到分段裁切拼接
+        if config.settings.get('video_rate_engine', 'concat') == 'filter':
+            if self._retime_with_filtergraph(clip_meta_list):
+                return clip_meta_list
+            config.logger.warning("单次滤镜图重定时失败，回退到分段裁切拼接模式。")
+
+        workers = self._get_video_cut_workers(len(clip_meta_list))
+        # 并行时平分 CPU 线程，避免多个 libx264 进程争抢
+        self.video_cut_threads = max(1, (os.cpu_count() or 1) // workers) if workers > 1 else 0
+        config.logger.info(f"共 {len(clip_meta_list)} 个视频片段，使用 {workers} 个并行任务裁切")
+
+        total = len(clip_meta_list)
+        done_nums = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._process_video_clip, task) for task in clip_meta_list]
+            for future in as_completed(futures):
+                future.result()
+                done_nums += 1
+                tools.set_process(
+                    text=f"[4/5] 处理视频片段 {done_nums}/{total}" if config.defaulelang == 'zh' else f"[4/5] Processing video clips {done_nums}/{total}",
+                    uuid=self.uuid)
+                if self._is_stopped():
+                    # 取消尚未开始的片段，不再等待其结果
+                    for f in futures:
+                        f.cancel()
+                    break
+        if self._is_stopped():
+            return None
 
-            real_duration_ms = 0
-            if Path(task['out']).exists() and Path(task['out']).stat().st_size > 1024:
-                real_duration_ms = self._get_video_duration_safe(task['out'])
+        self._concat_and_finalize(clip_meta_list)
+        return clip_meta_list
 
-            task['real_duration_ms'] = real_duration_ms
+    def _is_stopped(self):
+        return config.exit_soft or (self.uuid is not None and self.uuid in config.stoped_uuid_set)
 
+    def _get_video_cut_workers(self, clip_nums):
+        """并行裁切数，0 为自动，按CPU核数的一半计算"""
+        try:
+            workers = int(config.settings.get('video_cut_thread', 0))
+        except (TypeError, ValueError):
+            workers = 0
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 1) // 2)
+        return max(1, min(workers, clip_nums))
+
+    def _process_video_clip(self, task):
+        """裁切单个片段并探测其真实时长，结果写回 task，由线程池调用"""
+        if self._is_stopped():
+            task['real_duration_ms'] = 0
+            return
+        # PTS > 1.01 才应用，避免浮点数误差导致不必要的处理
+        pts_param = str(task['pts']) if task.get('pts', 1.0) > 1.01 else None
+        self._cut_to_intermediate(ss=task['ss'], to=task['to'], source=self.novoice_mp4_original, pts=pts_param,
+                                  out=task['out'])
+
+        real_duration_ms = 0
+        if Path(task['out']).exists() and Path(task['out']).stat().st_size > 1024:
+            real_duration_ms = self._get_video_duration_safe(task['out'])
+
+        task['real_duration_ms'] = real_duration_ms
+
+        if task['type'] == 'sub':
+            sub_item = self.queue_tts[task['index']]
+            sub_item['final_video_duration_real'] = real_duration_ms
+            config.logger.info(
+                f"字幕[{task['line']}] 视频片段处理完成。理论时长: {sub_item['final_video_duration_theoretical']}ms, 物理探测时长: {real_duration_ms}ms")
+        else:
+            config.logger.info(f"间隙片段 {Path(task['out']).name} 处理完成。物理探测时长: {real_duration_ms}ms")
+
+    @staticmethod
+    def _segment_tree_expr(segments, inside, var='T'):
+        """
+        生成按时间变量 var(select 为 t，setpts 为 T) 查找所在片段的 ffmpeg 表达式，segments 为按起点排序且互不重叠的 (ss秒, to秒, ...)，
+        inside(seg) 返回 T 落在该片段内时的值，片段外为 0。表达式为平衡二叉树，每帧只需 O(log N) 次比较
+        """
+
+        def node(lo, hi):
+            if lo > hi:
+                return '0'
+            mid = (lo + hi) // 2
+            seg = segments[mid]
+            return f"if(lt({var},{seg[0]:.3f}),{node(lo, mid - 1)},if(lt({var},{seg[1]:.3f}),{inside(seg)},{node(mid + 1, hi)}))"
+
+        return node(0, len(segments) - 1)
+
+    def _retime_with_filtergraph(self, clip_meta_list):
+        """
+        在一次 ffmpeg 调用中完成视频重定时：select 只保留各片段内的帧，setpts 按片段把时间戳分段线性映射到输出时间轴，
+        只解码、编码一次，不产生中间片段，也不为每个片段复制一路视频流。片段真实时长由 PTS 倍率和帧率直接计算，无需逐个探测。
+        """
+        if self._is_stopped():
+            return False
+        fps = self.source_video_fps
+        # (起点秒, 终点秒, 倍率, 输出起点秒)
+        segments = []
+        offset_ms = 0
+        for task in clip_meta_list:
+            pts = task['pts'] if task.get('pts', 1.0) > 1.01 else 1.0
+            source_sec = max(0, task['to'] - task['ss']) / 1000.0
+            # 输出为恒定帧率，真实时长即为帧数对应的时长
+            frames = int(round(source_sec * pts * fps))
+            task['real_duration_ms'] = int(round(frames * 1000 / fps)) if frames > 0 else 0
             if task['type'] == 'sub':
-                sub_item = self.queue_tts[task['index']]
-                sub_item['final_video_duration_real'] = real_duration_ms
-                config.logger.info(
-                    f"字幕[{task['line']}] 视频片段处理完成。理论时长: {sub_item['final_video_duration_theoretical']}ms, 物理探测时长: {real_duration_ms}ms")
-            else:
-                config.logger.info(f"间隙片段 {Path(task['out']).name} 处理完成。物理探测时长: {real_duration_ms}ms")
+                self.queue_tts[task['index']]['final_video_duration_real'] = task['real_duration_ms']
+            if frames <= 0:
+                continue
+            segments.append((task['ss'] / 1000.0, task['to'] / 1000.0, pts, offset_ms / 1000.0))
+            offset_ms += task['real_duration_ms']
 
-        self._concat_and_finalize(clip_meta_list)
-        return clip_meta_list
+        if not segments:
+            config.logger.error("没有任何有效的视频片段，无法生成滤镜图。")
+            return False
+        select_expr = self._segment_tree_expr(segments, lambda seg: '1', var='t')
+        setpts_expr = self._segment_tree_expr(segments, lambda seg: f"{seg[3]:.3f}+(T-{seg[0]:.3f})*{seg[2]}")
+        filters = [f"[0:v]select='{select_expr}',setpts='({setpts_expr})/TB',fps={fps},format=yuv420p[outv]"]
+
+        script_path = Path(f'{self.cache_folder}/retime_filter.txt').as_posix()
+        with open(script_path, 'w', encoding='utf-8') as f:
+            f.write(";\n".join(filters))
+
+        final_video_path = Path(f'{self.cache_folder}/merged_{self.noextname}.mp4').as_posix()
+        cmd = ['-y', '-i', self.novoice_mp4_original, '-filter_complex_script', script_path, '-map', '[outv]',
+               '-an', '-c:v', f'libx{config.settings["video_codec"]}',
+               '-crf', str(config.settings.get("crf", 23)), '-preset', config.settings.get('preset', 'fast'),
+               final_video_path]
+        config.logger.info(f"单次滤镜图重定时，共 {len(segments)} 个片段，滤镜脚本: {script_path}")
+        tools.set_process(
+            text=f"[4/5] 单次重定时 {len(segments)} 个视频片段..." if config.defaulelang == 'zh' else f"[4/5] Retiming {len(segments)} video clips in one pass...",
+            uuid=self.uuid)
+        try:
+            tools.runffmpeg(cmd)
+        except Exception as e:
+            config.logger.error(f"单次滤镜图重定时执行失败: {e}")
+            return False
+        finally:
+            Path(script_path).unlink(missing_ok=True)
+
+        if not tools.vail_file(final_video_path):
+            return False
+        shutil.copy2(final_video_path, self.novoice_mp4)
+        config.logger.info(f"最终无声视频已通过单次滤镜图生成并复制到: {self.novoice_mp4}")
+        return True
 
     def _create_clip_meta(self):
         """
@@ -550,6 +677,8 @@ class SpeedRate:
                tools.ms_to_time_string(ms=to, sepflag='.'), '-i', source,
                '-an', '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '10',
                '-pix_fmt', 'yuv420p', '-r', str(self.source_video_fps)]
+        if self.video_cut_threads:
+            cmd.extend(['-threads', str(self.video_cut_threads)])
         if pts: cmd.extend(['-vf', f'setpts={pts}*PTS,fps={self.source_video_fps}'])
         cmd.append(out)
 
@@ -626,10 +755,11 @@ class SpeedRate:
         """
         [修正] 音频重建阶段。
         根据 `shoud_videorate` 的值，正确分发到物理时间轴或理论时间轴模型。
+        返回 (placements, total_duration_ms)，placements 中每项为 (偏移ms, 最大时长ms, 配音文件或已解码数组, 行号)
         """
-        process_text = "[5/5] 生成音频片段..." if config.defaulelang == 'zh' else "[5/5] Generating audio clips..."
+        process_text = "[5/5] 重建音频时间轴..." if config.defaulelang == 'zh' else "[5/5] Rebuilding audio timeline..."
         tools.set_process(text=process_text, uuid=self.uuid)
-        config.logger.info("================== [阶段 5/5] 生成音频片段以供拼接 ==================")
+        config.logger.info("================== [阶段 5/5] 重建音频时间轴 ==================")
 
         # [关键修正] 严格根据 `shoud_videorate` 和 `clip_meta_list` 的有效性来选择路径
         if self.shoud_videorate and clip_meta_list:
@@ -641,24 +771,19 @@ class SpeedRate:
 
     def _recalculate_timeline_based_on_physical_video(self, clip_meta_list):
         """
-        [新增] 基于视频片段的物理真实时长来构建音频片段列表。
+        [新增] 基于视频片段的物理真实时长来计算每条配音在时间轴上的位置。
         此方法仅在 `shoud_videorate=True` 时被调用。
         """
-        audio_concat_list = []
+        placements = []
         current_timeline_ms = 0
 
-        for i, task in enumerate(clip_meta_list):
+        for task in clip_meta_list:
             task_real_duration = int(task.get('real_duration_ms', 0))
             if task_real_duration <= 0:
                 continue
 
-            clip_path = Path(self.audio_clips_folder, f"v_clip_{i:05d}.wav").as_posix()
-            segment = None
-
             if task['type'] == 'gap':
-                segment = AudioSegment.silent(duration=task_real_duration)
-                config.logger.info(f"生成物理间隙音频片段：时长 {task_real_duration}ms -> {clip_path}")
-                current_timeline_ms += task_real_duration
+                config.logger.info(f"物理间隙：时长 {task_real_duration}ms，偏移 {current_timeline_ms}ms")
 
             elif task['type'] == 'sub':
                 it = self.queue_tts[task['index']]
@@ -668,42 +793,23 @@ class SpeedRate:
                     ms=it['end_time'])
                 config.logger.info(
                     f"字幕[{it['line']}] 字幕时间精确化：新区间 {it['start_time']}-{it['end_time']} (配音时长 {it['dubb_time']}ms)")
+                # 配音放置在视频片段开头，超出片段时长的部分被截断
+                placements.append((current_timeline_ms, task_real_duration, it['filename'], it['line']))
 
-                # 创建一个与视频片段等长的静音画布
-                base_segment = AudioSegment.silent(duration=task_real_duration)
-
-                if tools.vail_file(it['filename']):
-                    try:
-                        audio_clip = AudioSegment.from_file(it['filename'])
-                        # 将配音叠加到静音画布的开头
-                        segment = base_segment.overlay(audio_clip)
-                    except Exception as e:
-                        config.logger.error(f"字幕[{it['line']}] 加载音频失败: {e}，使用等长静音替代。")
-                        segment = base_segment
-                else:
-                    config.logger.warning(f"字幕[{it['line']}] 配音文件不存在，使用等长静音替代。")
-                    segment = base_segment
-
-                current_timeline_ms += task_real_duration
-                config.logger.info(f"字幕[{it['line']}] 音频流重建：生成片段，时长 {task_real_duration}ms -> {clip_path}")
-
-            if segment:
-                # [核心修正] 导出前统一所有片段的参数
-                self._standardize_audio_segment(segment).export(clip_path, format="wav")
-                audio_concat_list.append(clip_path)
+            current_timeline_ms += task_real_duration
 
-        return audio_concat_list
+        return placements, current_timeline_ms
 
     def _recalculate_timeline_with_theoretical_offset(self):
         """
-        [修正] 备用方法：当不处理视频时，生成基于理论 time_offset 的音频片段列表。
+        [修正] 备用方法：当不处理视频时，基于理论 time_offset 计算每条配音在时间轴上的位置。
         修正了时间轴计算的逻辑错误，避免不正确的静音累积。
         """
-        audio_concat_list = []
+        placements = []
         time_offset = 0
         current_timeline_ms = 0
 
-        for i, it in enumerate(self.queue_tts):
+        for it in self.queue_tts:
             target_start_time = it['start_time_source'] + time_offset
 
             it['start_time'] = target_start_time
@@ -716,11 +822,6 @@ class SpeedRate:
             silence_needed = max(0, target_start_time - current_timeline_ms)
 
             if silence_needed > self.MIN_CLIP_DURATION_MS:
-                silence_path = Path(self.audio_clips_folder, f"t_clip_{i:05d}_silence.wav").as_posix()
-                # [修正] 标准化
-                silent_segment = AudioSegment.silent(duration=silence_needed)
-                self._standardize_audio_segment(silent_segment).export(silence_path, format="wav")
-                audio_concat_list.append(silence_path)
                 current_timeline_ms += silence_needed
                 config.logger.info(f"理论模式：字幕[{it['line']}]前插入静音 {silence_needed}ms")
 
@@ -729,41 +830,20 @@ class SpeedRate:
                 time_offset += (final_segment_duration - it['source_duration'])
                 continue
 
-            # 创建一个目标时长的静音画布
-            base_segment = AudioSegment.silent(duration=final_segment_duration)
-            segment = base_segment
-            if tools.vail_file(it['filename']):
-                try:
-                    audio_clip = AudioSegment.from_file(it['filename'])
-                    # 叠加配音
-                    segment = base_segment.overlay(audio_clip)
-                except Exception as e:
-                    config.logger.error(f"字幕[{it['line']}] 加载音频失败: {e}，使用等长静音替代。")
-            else:
-                config.logger.warning(f"字幕[{it['line']}] 配音文件不存在，使用等长静音替代。")
-
-            clip_path = Path(self.audio_clips_folder, f"t_clip_{i:05d}_sub.wav").as_posix()
-            # [修正] 标准化
-            self._standardize_audio_segment(segment).export(clip_path, format="wav")
-            audio_concat_list.append(clip_path)
+            # 配音占据目标时长的区间，超出部分被截断，不足部分为静音
+            placements.append((current_timeline_ms, final_segment_duration, it['filename'], it['line']))
 
             current_timeline_ms += final_segment_duration
             time_offset += (final_segment_duration - it['source_duration'])
-            config.logger.info(f"理论模式：字幕[{it['line']}]生成片段，时长 {final_segment_duration}ms，累积时间偏移 {time_offset}ms")
+            config.logger.info(f"理论模式：字幕[{it['line']}]放置片段，时长 {final_segment_duration}ms，累积时间偏移 {time_offset}ms")
 
         # 理论模式下的最终视频时长
         final_video_duration = self.raw_total_time + time_offset
         final_gap = final_video_duration - current_timeline_ms
         if final_gap > self.MIN_CLIP_DURATION_MS:
-            # final_gap_path = Path(self.audio_clips_folder, "t_clip_zzzz_final_gap.wav").as_posix()
-            final_gap_path = Path(self.audio_clips_folder, "t_clip_zzzz_final_gap.wav").as_posix()
-            # [修正] 标准化
-            silent_segment = AudioSegment.silent(duration=final_gap)
-            self._standardize_audio_segment(silent_segment).export(final_gap_path, format="wav")
-            audio_concat_list.append(final_gap_path)
+            current_timeline_ms += final_gap
             config.logger.info(f"理论模式：末尾添加静音 {final_gap}ms")
-        config.logger.info(f"{audio_concat_list=}")
-        return audio_concat_list
+        return placements, current_timeline_ms
 
     def _get_video_duration_safe(self, file_path):
         """
@@ -783,65 +863,42 @@ class SpeedRate:
             config.logger.error(f"探测视频时长时发生严重错误: {e}。文件 -> {file_path}。将视其时长为0。")
             return 0
 
-    def _finalize_files(self, audio_concat_list):
+    def _finalize_files(self, placements, total_duration_ms):
         """
-        负责使用FFmpeg拼接音频片段列表，并执行最后的音视频对齐检查。
+        负责将配音片段写入一个预分配的时间轴缓冲区，流式交付到最终编码器，并执行最后的音视频对齐检查。
         """
         final_step_text = "[最终步骤] 拼接音频并对齐..." if config.defaulelang == 'zh' else '[Final Step] Concatenating audio and finalizing...'
         tools.set_process(text=final_step_text, uuid=self.uuid)
         config.logger.info("================== [最终步骤] 拼接音频、对齐并交付 ==================")
 
+        TOLERANCE_MS = 250
         try:
-            # 初始拼接
-            self._ffmpeg_concat_audio(audio_concat_list, self.target_audio)
-
-            if not tools.vail_file(self.target_audio):
-                raise RuntimeError(f"音频拼接失败，最终文件未生成: {self.target_audio}")
-
+            video_duration_ms = 0
             if self.novoice_mp4 and tools.vail_file(self.novoice_mp4):
                 config.logger.info("开始最终音视频时长对齐检查...")
                 video_duration_ms = self._get_video_duration_safe(self.novoice_mp4)
                 if video_duration_ms == 0:
                     raise RuntimeError(f'视频时长为0，无法对齐: {self.novoice_mp4}')
-
-                audio_duration_ms = self._get_audio_time_ms(self.target_audio)
-                if audio_duration_ms == 0:
-                    raise RuntimeError(f'拼接后音频时长为0，无法对齐: {self.target_audio}')
-
-                config.logger.info(f"最终检查: 视频物理总长 = {video_duration_ms}ms, 音频物理总长 = {audio_duration_ms}ms")
-                duration_diff = video_duration_ms - audio_duration_ms
+                config.logger.info(f"最终检查: 视频物理总长 = {video_duration_ms}ms, 音频时间轴总长 = {total_duration_ms}ms")
+                duration_diff = video_duration_ms - total_duration_ms
                 config.logger.info(f"时长差异 (视频 - 音频) = {duration_diff}ms")
+                if duration_diff > TOLERANCE_MS:
+                    config.logger.warning(f"视频比音频长 {duration_diff}ms，将直接在时间轴末尾补齐等长静音。")
+                    total_duration_ms = video_duration_ms
 
-                TOLERANCE_MS = 250
+            if total_duration_ms <= 0:
+                raise RuntimeError(f"音频时间轴总长为0，无法生成最终音频: {self.target_audio}")
 
-                if duration_diff > TOLERANCE_MS:
-                    config.logger.warning(f"视频比音频长 {duration_diff}ms，将通过FFmpeg apad滤镜在音频末尾补齐等长静音。")
-
-                    # [核心修正] 使用FFmpeg apad滤镜高效添加静音，而不是pydub
-                    padded_audio_path = Path(
-                        f'{self.cache_folder}/padded_audio{Path(self.target_audio).suffix}').as_posix()
-                    pad_dur_sec = duration_diff / 1000.0
-
-                    cmd = ['-y', '-i', str(self.target_audio), '-af', f'apad=pad_dur={pad_dur_sec:.4f}']
-
-                    # 保持编码参数一致
-                    ext = Path(self.target_audio).suffix.lower()
-                    if ext == '.wav':
-                        cmd.extend(["-c:a", "pcm_s16le"])
-                    elif ext == '.m4a':
-                        cmd.extend(["-c:a", "aac", "-b:a", "128k"])
-                    else:  # 默认mp3
-                        cmd.extend(["-c:a", "libmp3lame", "-q:a", "2"])
-                    cmd.append(padded_audio_path)
-
-                    if tools.runffmpeg(cmd) and tools.vail_file(padded_audio_path):
-                        shutil.move(padded_audio_path, self.target_audio)
-                        config.logger.info("音频补齐静音并重新导出完成。")
-                    else:
-                        config.logger.error("使用apad滤镜填充静音失败！")
+            buffer = self._render_timeline(placements, total_duration_ms)
+            self._write_timeline(buffer, self.target_audio)
+            del buffer
 
+            if not tools.vail_file(self.target_audio):
+                raise RuntimeError(f"音频拼接失败，最终文件未生成: {self.target_audio}")
 
-                elif duration_diff < -TOLERANCE_MS:
+            if video_duration_ms > 0:
+                duration_diff = video_duration_ms - total_duration_ms
+                if duration_diff < -TOLERANCE_MS:
                     freeze_duration_sec = abs(duration_diff) / 1000.0
                     config.logger.warning(f"音频比视频长 {abs(duration_diff)}ms，将定格视频最后一帧 {freeze_duration_sec:.3f} 秒以对齐。")
 
@@ -874,13 +931,87 @@ class SpeedRate:
             config.logger.exception(f"导出或对齐最终音视频时发生致命错误: {e}")
             raise RuntimeError(f"导出或对齐最终音视频时发生致命错误: {e}")
 
-        config.logger.info("所有处理完成，音视频已成功生成。")
+        config.logger.info(f"所有处理完成，音视频已成功生成。ffprobe 缓存统计: {tools.get_probe_cache_stats()}")
+
+    def _render_timeline(self, placements, total_duration_ms):
+        """
+        预分配整条时间轴的 int16 缓冲区，逐个解码配音片段并写入其偏移位置。
+        未写入的区域即为静音，np.zeros 的内存页在被写入前不会真正占用物理内存。
+        """
+        import numpy as np
+        total_frames = self._ms_to_frames(total_duration_ms)
+        buffer = np.zeros((total_frames, self.AUDIO_CHANNELS), dtype=np.int16)
+        config.logger.info(f"时间轴缓冲区: {total_duration_ms}ms, {total_frames} 帧, 共 {len(placements)} 个配音片段")
+
+        for offset_ms, max_duration_ms, filename, line in placements:
+            # 逐个解码，写入后即可回收
+            samples = self._load_clip_samples(filename, line=line)
+            if samples is None:
+                continue
+            start = self._ms_to_frames(offset_ms)
+            limit = total_frames - start
+            if max_duration_ms is not None:
+                limit = min(limit, self._ms_to_frames(max_duration_ms))
+            frames = min(len(samples), limit)
+            if frames <= 0:
+                continue
+            buffer[start:start + frames] = samples[:frames]
+        return buffer
+
+    def _write_timeline(self, buffer, output_path):
+        """
+        将时间轴缓冲区分块写出。wav 直接写入，其他格式通过管道送入 ffmpeg 编码，不产生中间文件。
+        """
+        chunk_frames = self.AUDIO_SAMPLE_RATE * 30
+        ext = Path(output_path).suffix.lower()
+        if ext == '.wav':
+            import wave
+            with wave.open(output_path, 'wb') as wf:
+                wf.setnchannels(self.AUDIO_CHANNELS)
+                wf.setsampwidth(2)
+                wf.setframerate(self.AUDIO_SAMPLE_RATE)
+                for start in range(0, len(buffer), chunk_frames):
+                    wf.writeframes(buffer[start:start + chunk_frames].tobytes())
+            return
+
+        cmd = [config.FFMPEG_BIN, '-hide_banner', '-loglevel', 'error', '-y',
+               '-f', 's16le', '-ar', str(self.AUDIO_SAMPLE_RATE), '-ac', str(self.AUDIO_CHANNELS), '-i', 'pipe:0']
+        if ext == '.m4a':
+            cmd.extend(["-c:a", "aac", "-b:a", "128k"])
+        else:  # 默认mp3
+            cmd.extend(["-c:a", "libmp3lame", "-q:a", "2"])
+        cmd.append(Path(output_path).as_posix())
+        config.logger.info(f"时间轴缓冲区通过管道编码: {' '.join(cmd)}")
+
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        with tempfile.TemporaryFile() as stderr_file:
+            p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file,
+                                 creationflags=creationflags)
+            try:
+                for start in range(0, len(buffer), chunk_frames):
+                    p.stdin.write(buffer[start:start + chunk_frames].tobytes())
+            except (BrokenPipeError, OSError) as e:
+                config.logger.error(f"向 ffmpeg 管道写入音频数据失败: {e}")
+            finally:
+                try:
+                    p.stdin.close()
+                except OSError:
+                    pass
+                p.wait()
+            if p.returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode('utf-8', errors='replace')
+                raise RuntimeError(tools.extract_concise_error(error))
 
     def _get_audio_time_ms(self, file_path, line=None):
         if not tools.vail_file(file_path):
             if line is not None: config.logger.warning(f"字幕[{line}]：配音文件 {file_path} 不存在。")
             return 0
         try:
+            # 统一格式的配音文件直接读取文件头
+            duration_ms = tools.get_dubbing_wav_ms(file_path)
+            if duration_ms is not None:
+                return duration_ms
             # 优先使用 ffprobe，更准确
             duration = tools.get_audio_time(file_path)
             if duration is not None:
@@ -890,75 +1021,3 @@ class SpeedRate:
         except Exception as e:
             config.logger.error(f"字幕[{line or 'N/A'}]：获取音频文件 {file_path} 时长失败: {e}")
             return 0
-
-    def _ffmpeg_concat_audio(self, file_list, output_path):
-        """
-        [核心修正] 使用混合拼接法来健壮地拼接大量音频文件，以规避Windows命令行长度限制。
-        步骤1: 使用concat demuxer + 重新编码，生成一个临时的、干净的WAV文件。
-        步骤2: 将这个临时的WAV文件转码为最终的目标格式。
-        """
-        if not file_list:
-            config.logger.warning("音频拼接列表为空，无法生成最终音频。")
-            return
-
-        concat_txt_path = Path(f'{self.cache_folder}/audio_clips/audio_concat_list.txt').as_posix()
-        temp_wav_output = Path(f'{self.cache_folder}/temp_concatenated.wav').as_posix()
-
-        try:
-            # 步骤1: 使用concat demuxer进行稳定的拼接
-            config.logger.info(f"混合拼接步骤1: 创建包含 {len(file_list)} 个文件的拼接列表。{concat_txt_path=}")
-            tools.create_concat_txt(file_list, concat_txt=concat_txt_path)
-            if not Path(concat_txt_path).exists():
-                raise RuntimeError(f"No {concat_txt_path}")
-
-            cmd_step1 = [
-                "-y",
-                "-f", "concat",
-                "-safe", "0",
-                "-i", concat_txt_path,
-                "-c:a", "pcm_s16le",
-                "-ar", str(self.AUDIO_SAMPLE_RATE),
-                "-ac", str(self.AUDIO_CHANNELS),
-                temp_wav_output
-            ]
-            config.logger.info(f"混合拼接步骤1: 正在将列表拼接并重新编码为临时WAV文件: {temp_wav_output}")
-            tools.runffmpeg(cmd_step1, force_cpu=True)
-            os.chdir(config.ROOT_DIR)
-
-            if not tools.vail_file(temp_wav_output):
-                config.logger.error(f"音频拼接失败，临时文件 {temp_wav_output} 未生成。")
-                return
-
-            # 步骤2: 将拼接好的临时WAV转码为最终格式
-            config.logger.info(f"混合拼接步骤2: 正在将临时WAV转码为最终格式: {output_path}")
-            cmd_step2 = ["-y", "-i", temp_wav_output]
-
-            ext = Path(output_path).suffix.lower()
-            if ext == '.wav':
-                # 如果目标就是wav，直接复制即可
-                cmd_step2.extend(["-c:a", "copy"])
-            elif ext == '.m4a':
-                cmd_step2.extend(["-c:a", "aac", "-b:a", "128k"])
-            else:  # 默认mp3
-                cmd_step2.extend(["-c:a", "libmp3lame", "-q:a", "2"])
-
-            cmd_step2.append(str(output_path))
-            if ext == '.wav' and output_path[-4:] == '.wav':
-                try:
-                    shutil.copy2(temp_wav_output, output_path)
-                except shutil.SameFileError:
-                    pass
-            else:
-                tools.runffmpeg(cmd_step2, force_cpu=True)
-
-        finally:
-            pass
-            # 清理临时文件
-            try:
-                if Path(concat_txt_path).exists():
-                    os.remove(concat_txt_path)
-                if Path(temp_wav_output).exists():
-                    os.remove(temp_wav_output)
-                config.logger.info("已清理音频拼接临时文件。")
-            except Exception as e:
-                config.logger.warning(f"清理音频拼接临时文件失败: {e}")
@@ -118,8 +118,6 @@ class SpeechToText(BaseTask):
     def task_done(self):
         if self._exit():
             return
-        self._signal(text=f"{self.cfg['name']}", type='succeed')
-        tools.send_notification(config.transobj['Succeed'], f"{self.cfg['basename']}")
         if self.out_format == 'txt':
             import re
             content = Path(self.cfg['target_sub']).read_text(encoding='utf-8')
@@ -141,6 +139,9 @@ class SpeechToText(BaseTask):
                 shutil.copy2(self.cfg['target_sub'], f'{p.parent.as_posix()}/{p.stem}.{self.out_format}')
         except:
             pass
+        # 格式转换和清理完成后再发送完成消息，此时目标文件夹中只剩结果文件
+        self._signal(text=f"{self.cfg['name']}", type='succeed')
+        tools.send_notification(config.transobj['Succeed'], f"{self.cfg['basename']}")
 
     def _exit(self):
         if config.exit_soft or config.box_recogn != 'ing':
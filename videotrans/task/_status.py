@@ -0,0 +1,192 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from videotrans.configure import config
+
+"""
+api 任务状态存储
+
+原先 api.py 每收到一条进度消息就改写一次 processinfo/{uuid}.json，查询时再读回文件，
+排队位置则依次遍历6个阶段队列。现在状态以 uuid 为键保存在内存中，查询不读写磁盘：
+  register()  提交任务时登记，保存任务对象，用于得到所在阶段、排队位置和进度
+  update()    由进度消息更新最新状态
+  get()       返回状态字典，阶段和排队位置由 StageQueue.position() 直接算出
+可选保存到 SQLite：有变化的记录由后台线程按 snapshot_interval 间隔批量写入，
+重启后加载，未结束的任务标记为已中断
+"""
+
+# 与 job.py 中的阶段顺序一致
+STAGE_QUEUES = ('prepare_queue', 'regcon_queue', 'trans_queue', 'dubb_queue', 'align_queue', 'assemb_queue')
+# 结束状态
+END_TYPES = ('error', 'succeed', 'end', 'stop')
+
+
+class TaskStatus:
+    __slots__ = ('uuid', 'type', 'text', 'stage', 'precent', 'updated', 'task')
+
+    def __init__(self, uuid, type='', text='', stage='', precent=0, updated=None, task=None):
+        self.uuid = uuid
+        # 最新一条状态消息的类型，尚未收到任何消息时为空
+        self.type = type
+        self.text = text
+        self.stage = stage
+        self.precent = precent
+        self.updated = updated or time.time()
+        # 任务对象，结束后释放
+        self.task = task
+
+    @property
+    def ended(self):
+        return self.type in END_TYPES
+
+
+class TaskStatusStore:
+    def __init__(self, db_file=None, snapshot_interval=2.0, max_records=10000):
+        self.db_file = db_file
+        self.snapshot_interval = snapshot_interval
+        # 内存中最多保留的记录数，超出时移除最早结束的任务，保存到数据库的仍可查询
+        self.max_records = max_records
+        self._records = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+        if db_file:
+            self._open()
+
+    def _open(self):
+        # 只在后台写入线程和查询时使用，check_same_thread=False 并由 _db_lock 保护
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS task_status (
+            uuid TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            text TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            precent INTEGER NOT NULL,
+            updated REAL NOT NULL
+        )''')
+        # 上次退出时未结束的任务无法继续执行
+        msg = '服务已重启，任务中断' if config.defaulelang == 'zh' else 'Task interrupted by service restart'
+        self._conn.execute(
+            f'UPDATE task_status SET type=?, text=? WHERE type NOT IN ({",".join("?" * len(END_TYPES))})',
+            ('error', msg, *END_TYPES))
+        self._conn.commit()
+
+    def start(self):
+        if self._conn is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def register(self, task):
+        with self._lock:
+            self._records[task.uuid] = TaskStatus(task.uuid, task=task)
+            self._records.move_to_end(task.uuid)
+            self._dirty.add(task.uuid)
+
+    def update(self, uuid, type, text):
+        with self._lock:
+            st = self._records.get(uuid)
+            if st is None:
+                st = self._records[uuid] = TaskStatus(uuid)
+            st.type = type
+            st.text = text
+            st.updated = time.time()
+            if st.ended:
+                self._finish(st)
+            self._dirty.add(uuid)
+
+    def _finish(self, st):
+        if st.task is not None:
+            st.precent = 100 if st.type == 'succeed' else int(st.task.precent or 0)
+            st.task = None
+        st.stage = ''
+        if len(self._records) > self.max_records:
+            for uuid in [k for k, v in self._records.items() if v.ended][:len(self._records) - self.max_records]:
+                # 尚未写入数据库的记录先保留
+                if uuid not in self._dirty or self._conn is None:
+                    del self._records[uuid]
+
+    def _locate(self, st):
+        """任务当前所在阶段队列及位置，正在执行时位置为 0"""
+        if st.task is None:
+            return st.stage, 0
+        for name in STAGE_QUEUES:
+            position = getattr(config, name).position(st.task)
+            if position:
+                st.stage = name
+                return name, position
+        return st.stage, 0
+
+    def _to_dict(self, st):
+        stage, position = self._locate(st)
+        return {
+            "uuid": st.uuid,
+            "type": st.type,
+            "text": st.text,
+            "stage": stage,
+            "position": position,
+            "precent": int(st.task.precent or 0) if st.task is not None else st.precent,
+            "updated": st.updated,
+        }
+
+    def get(self, uuid):
+        """返回状态字典，不存在时返回 None"""
+        with self._lock:
+            st = self._records.get(uuid)
+            if st is not None:
+                return self._to_dict(st)
+        return self._load(uuid)
+
+    def __contains__(self, uuid):
+        with self._lock:
+            if uuid in self._records:
+                return True
+        return self._load(uuid) is not None
+
+    def _load(self, uuid):
+        if self._conn is None:
+            return None
+        with self._db_lock:
+            row = self._conn.execute(
+                'SELECT uuid, type, text, stage, precent, updated FROM task_status WHERE uuid=?',
+                (uuid,)).fetchone()
+        if not row:
+            return None
+        return {"uuid": row[0], "type": row[1], "text": row[2], "stage": row[3], "position": 0,
+                "precent": row[4], "updated": row[5]}
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            self.flush()
+
+    def flush(self):
+        """将有变化的记录写入数据库"""
+        if self._conn is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = []
+            for uuid in self._dirty:
+                st = self._records.get(uuid)
+                if st is None:
+                    continue
+                d = self._to_dict(st)
+                rows.append((uuid, d['type'], d['text'], d['stage'], d['precent'], d['updated']))
+            self._dirty.clear()
+        try:
+            with self._db_lock:
+                self._conn.executemany('INSERT OR REPLACE INTO task_status VALUES (?,?,?,?,?,?)', rows)
+                self._conn.commit()
+        except Exception as e:
+            config.logger.warning(f'保存任务状态失败:{e}')
+
+    def close(self):
+        self._stop.set()
+        self.flush()
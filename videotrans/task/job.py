@@ -1,4 +1,4 @@
-import time
+from abc import ABCMeta, abstractmethod
 from threading import Thread
 
 from videotrans.configure import config
@@ -39,191 +39,164 @@ trans_queue
 dubb_queue
 align_queue
 assemb_queue
+
+每个阶段队列都是 StageQueue，工作线程阻塞在条件变量上，有任务入队立即被唤醒，不再 sleep 轮询
+每个阶段可启动多个工作线程，数量由 config.settings 中 *_workers 决定
 """
 
 
-class WorkerPrepare(Thread):
+class _StageWorker(Thread, metaclass=ABCMeta):
+    # 子类指定从哪个 config 队列取任务
+    queue_name = ''
+    # 等待超时后重新检查 exit_soft，正常情况下由 stop_thread() 关闭队列唤醒
+    wait_timeout = 2
+
     def __init__(self, *, parent=None):
         super().__init__()
 
     def run(self) -> None:
+        queue = getattr(config, self.queue_name)
         while 1:
             if config.exit_soft:
                 return
-            if len(config.prepare_queue) < 1:
-                time.sleep(0.5)
-                continue
-            try:
-                trk: BaseTask = config.prepare_queue.pop(0)
-            except:
+            trk = queue.get(timeout=self.wait_timeout)
+            if trk is None:
+                if queue.closed:
+                    return
                 continue
             if task_is_stop(trk.uuid):
                 continue
             try:
-
-                trk.prepare()
-                # 如果需要识别，则插入 recogn_queue队列，否则继续判断翻译队列、配音队列，都不吻合则插入最终队列
-                if trk.shoud_recogn:
-                    config.regcon_queue.append(trk)
-                elif trk.shoud_trans:
-                    config.trans_queue.append(trk)
-                elif trk.shoud_dubbing:
-                    config.dubb_queue.append(trk)
-                else:
-                    config.assemb_queue.append(trk)
+                self.process(trk)
             except Exception as e:
                 from videotrans.configure._except import get_msg_from_except
-                except_msg=get_msg_from_except(e)
                 config.logger.exception(e, exc_info=True)
-                set_process(text=f'{config.transobj["yuchulichucuo"]}:{except_msg}:\n' + traceback.format_exc(), type='error', uuid=trk.uuid)
+                set_process(text=self.error_msg(trk, get_msg_from_except(e)), type='error', uuid=trk.uuid)
 
+    @abstractmethod
+    def process(self, trk: BaseTask) -> None:
+        """执行当前阶段并将任务放入下一阶段队列"""
 
-class WorkerRegcon(Thread):
-    def __init__(self, *, parent=None):
-        super().__init__()
+    @abstractmethod
+    def error_msg(self, trk: BaseTask, except_msg: str) -> str:
+        """当前阶段出错时发送给界面的消息"""
 
-    def run(self) -> None:
-        while 1:
-            if config.exit_soft:
-                return
 
-            if len(config.regcon_queue) < 1:
-                time.sleep(0.5)
-                continue
-            trk = config.regcon_queue.pop(0)
-            if task_is_stop(trk.uuid):
-                continue
-            try:
-                trk.recogn()
-                # 如果需要识翻译,则插入翻译队列，否则就行判断配音队列，都不吻合则插入最终队列
-                if trk.shoud_trans:
-                    config.trans_queue.append(trk)
-                elif trk.shoud_dubbing:
-                    config.dubb_queue.append(trk)
-                else:
-                    config.assemb_queue.append(trk)
-            except Exception as e:
-                from videotrans.configure._except import get_msg_from_except
-                except_msg=get_msg_from_except(e)
-                config.logger.exception(e, exc_info=True)
-                if trk.cfg.get('recogn_type') is not None:
-                    except_msg+=f"[{get_recogn_type(trk.cfg.get('recogn_type'))}]"
-                set_process(text=f'{config.transobj["shibiechucuo"]}:{except_msg}:\n' + traceback.format_exc(), type='error', uuid=trk.uuid)
+class WorkerPrepare(_StageWorker):
+    queue_name = 'prepare_queue'
 
+    def process(self, trk):
+        trk.prepare()
+        # 如果需要识别，则插入 recogn_queue队列，否则继续判断翻译队列、配音队列，都不吻合则插入最终队列
+        if trk.shoud_recogn:
+            config.regcon_queue.append(trk)
+        elif trk.shoud_trans:
+            config.trans_queue.append(trk)
+        elif trk.shoud_dubbing:
+            config.dubb_queue.append(trk)
+        else:
+            config.assemb_queue.append(trk)
 
-class WorkerTrans(Thread):
-    def __init__(self, *, parent=None):
-        super().__init__()
+    def error_msg(self, trk, except_msg):
+        return f'{config.transobj["yuchulichucuo"]}:{except_msg}:\n' + traceback.format_exc()
 
-    def run(self) -> None:
-        while 1:
-            if config.exit_soft:
-                return
-            if len(config.trans_queue) < 1:
-                time.sleep(0.5)
-                continue
-            trk = config.trans_queue.pop(0)
-            if task_is_stop(trk.uuid):
-                continue
-            try:
-                trk.trans()
-                # 如果需要配音，则插入 dubb_queue 队列，否则插入最终队列
-                if trk.shoud_dubbing:
-                    config.dubb_queue.append(trk)
-                else:
-                    config.assemb_queue.append(trk)
-            except Exception as e:
-                from videotrans.configure._except import get_msg_from_except
-                except_msg=get_msg_from_except(e)
-                if trk.cfg.get('translate_type') is not None:
-                    except_msg+=f"[{get_tanslate_type(trk.cfg.get('translate_type'))}]"
-                msg = f'{config.transobj["fanyichucuo"]}:{except_msg}:\n' + traceback.format_exc()
-                config.logger.exception(e, exc_info=True)
-                set_process(text=msg, type='error', uuid=trk.uuid)
 
+class WorkerRegcon(_StageWorker):
+    queue_name = 'regcon_queue'
 
-class WorkerDubb(Thread):
-    def __init__(self, *, parent=None):
-        super().__init__()
+    def process(self, trk):
+        trk.recogn()
+        # 如果需要识翻译,则插入翻译队列，否则就行判断配音队列，都不吻合则插入最终队列
+        if trk.shoud_trans:
+            config.trans_queue.append(trk)
+        elif trk.shoud_dubbing:
+            config.dubb_queue.append(trk)
+        else:
+            config.assemb_queue.append(trk)
 
-    def run(self) -> None:
-        while 1:
-            if config.exit_soft:
-                return
-            if len(config.dubb_queue) < 1:
-                time.sleep(0.5)
-                continue
-            trk = config.dubb_queue.pop(0)
-            if task_is_stop(trk.uuid):
-                continue
-            try:
-                trk.dubbing()
-                config.align_queue.append(trk)
-            except Exception as e:
-                from videotrans.configure._except import get_msg_from_except
-                except_msg=get_msg_from_except(e)
-                if trk.cfg.get('tts_type') is not None:
-                    except_msg+=f"[{get_tts_type(trk.cfg.get('tts_type'))}]"
-                msg = f'{config.transobj["peiyinchucuo"]}:{except_msg}:\n' + traceback.format_exc()
-                config.logger.exception(e, exc_info=True)
-                set_process(text=msg, type='error', uuid=trk.uuid)
+    def error_msg(self, trk, except_msg):
+        if trk.cfg.get('recogn_type') is not None:
+            except_msg += f"[{get_recogn_type(trk.cfg.get('recogn_type'))}]"
+        return f'{config.transobj["shibiechucuo"]}:{except_msg}:\n' + traceback.format_exc()
 
 
-class WorkerAlign(Thread):
-    def __init__(self, *, parent=None):
-        super().__init__()
+class WorkerTrans(_StageWorker):
+    queue_name = 'trans_queue'
 
-    def run(self) -> None:
-        while 1:
-            if config.exit_soft:
-                return
-            if len(config.align_queue) < 1:
-                time.sleep(0.5)
-                continue
-            trk = config.align_queue.pop(0)
-            if task_is_stop(trk.uuid):
-                continue
-            try:
-                trk.align()
-            except Exception as e:
-                from videotrans.configure._except import get_msg_from_except
-                except_msg=get_msg_from_except(e)
-                msg = f'{config.transobj["peiyinchucuo"]}:{except_msg}:' + traceback.format_exc()
-                config.logger.exception(e, exc_info=True)
-                set_process(text=msg, type='error', uuid=trk.uuid)
-            else:
-                config.assemb_queue.append(trk)
+    def process(self, trk):
+        trk.trans()
+        # 如果需要配音，则插入 dubb_queue 队列，否则插入最终队列
+        if trk.shoud_dubbing:
+            config.dubb_queue.append(trk)
+        else:
+            config.assemb_queue.append(trk)
 
+    def error_msg(self, trk, except_msg):
+        if trk.cfg.get('translate_type') is not None:
+            except_msg += f"[{get_tanslate_type(trk.cfg.get('translate_type'))}]"
+        return f'{config.transobj["fanyichucuo"]}:{except_msg}:\n' + traceback.format_exc()
 
-class WorkerAssemb(Thread):
-    def __init__(self, *, parent=None):
-        super().__init__()
 
-    def run(self) -> None:
-        while 1:
-            if config.exit_soft:
-                return
-            if len(config.assemb_queue) < 1:
-                time.sleep(0.5)
-                continue
-            trk = config.assemb_queue.pop(0)
-            if task_is_stop(trk.uuid):
-                continue
-            try:
-                trk.assembling()
-                trk.task_done()
-            except Exception as e:
-                from videotrans.configure._except import get_msg_from_except
-                except_msg=get_msg_from_except(e)
-                msg = f'{config.transobj["hebingchucuo"]}:{except_msg}:' + traceback.format_exc()
-                config.logger.exception(e, exc_info=True)
-                set_process(text=msg, type='error', uuid=trk.uuid)
+class WorkerDubb(_StageWorker):
+    queue_name = 'dubb_queue'
+
+    def process(self, trk):
+        trk.dubbing()
+        config.align_queue.append(trk)
+
+    def error_msg(self, trk, except_msg):
+        if trk.cfg.get('tts_type') is not None:
+            except_msg += f"[{get_tts_type(trk.cfg.get('tts_type'))}]"
+        return f'{config.transobj["peiyinchucuo"]}:{except_msg}:\n' + traceback.format_exc()
+
+
+class WorkerAlign(_StageWorker):
+    queue_name = 'align_queue'
+
+    def process(self, trk):
+        trk.align()
+        config.assemb_queue.append(trk)
+
+    def error_msg(self, trk, except_msg):
+        return f'{config.transobj["peiyinchucuo"]}:{except_msg}:' + traceback.format_exc()
+
+
+class WorkerAssemb(_StageWorker):
+    queue_name = 'assemb_queue'
+
+    def process(self, trk):
+        trk.assembling()
+        trk.task_done()
+
+    def error_msg(self, trk, except_msg):
+        return f'{config.transobj["hebingchucuo"]}:{except_msg}:' + traceback.format_exc()
+
+
+# 工作线程类及其并发数配置项
+_STAGE_WORKERS = [
+    (WorkerPrepare, 'prepare_workers'),
+    (WorkerRegcon, 'recogn_workers'),
+    (WorkerTrans, 'trans_workers'),
+    (WorkerDubb, 'dubb_workers'),
+    (WorkerAlign, 'align_workers'),
+    (WorkerAssemb, 'assemb_workers'),
+]
+
+
+def _get_workers_num(key):
+    try:
+        return max(1, int(config.settings.get(key, 1)))
+    except (TypeError, ValueError):
+        return 1
 
 
 def start_thread(parent=None):
-    WorkerPrepare(parent=parent).start()
-    WorkerRegcon(parent=parent).start()
-    WorkerTrans(parent=parent).start()
-    WorkerDubb(parent=parent).start()
-    WorkerAlign(parent=parent).start()
-    WorkerAssemb(parent=parent).start()
+    for worker_cls, key in _STAGE_WORKERS:
+        for _ in range(_get_workers_num(key)):
+            worker_cls(parent=parent).start()
+
+
+def stop_thread():
+    # 关闭所有阶段队列，阻塞中的工作线程被唤醒后退出
+    for worker_cls, _ in _STAGE_WORKERS:
+        getattr(config, worker_cls.queue_name).close()
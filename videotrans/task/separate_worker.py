@@ -18,21 +18,11 @@ class SeparateWorker(QThread):
         self.out = out
         self.uuid = uuid
 
-    def getqueulog(self):
-        while 1:
-            if config.exit_soft:
-                return
-            if self.uuid in config.stoped_uuid_set:
-                return
-            q = config.uuid_logs_queue.get(self.uuid)
-            if not q:
-                continue
-            try:
-                data = q.get(True, 0.5)
-                if data:
-                    self.finish_event.emit('logs:' + data['text'])
-            except Exception:
-                pass
+    def getqueulog(self, subscription):
+        # 分离结束后关闭订阅，get() 立即返回，线程随之退出
+        while not subscription.closed and not config.exit_soft and self.uuid not in config.stoped_uuid_set:
+            for event in subscription.get(timeout=0.5):
+                self.finish_event.emit('logs:' + event.text)
 
     def run(self):
         try:
@@ -54,8 +44,12 @@ class SeparateWorker(QThread):
                 tools.runffmpeg(cmd)
                 self.file = newfile
             tools.set_process(uuid=self.uuid)
-            threading.Thread(target=self.getqueulog).start()
-            st.start(self.file, self.out, "win", uuid=self.uuid)
+            subscription = config.progress_bus.subscribe([self.uuid])
+            threading.Thread(target=self.getqueulog, args=(subscription,)).start()
+            try:
+                st.start(self.file, self.out, "win", uuid=self.uuid)
+            finally:
+                subscription.close()
         except Exception as e:
             msg = f"separate vocal and background music:{str(e)}"
             self.finish_event.emit(msg)
@@ -16,6 +16,7 @@ from videotrans.translator import run as run_trans, get_audio_code
 from videotrans.tts import run as run_tts, CLONE_VOICE_TTS, CHATTERBOX_TTS, COSYVOICE_TTS, F5_TTS, EDGE_TTS, AZURE_TTS, \
     ELEVENLABS_TTS
 from videotrans.util import tools
+from ._assembly import AssemblyPlan
 from ._base import BaseTask
 from ._rate import SpeedRate
 from ._remove_noise import remove_noise
@@ -47,6 +48,8 @@ class TransCreate(BaseTask):
     # mp4编码类型 264 265
     video_codec_num: int = 264
     ignore_align: bool = False
+    # 配音音量，在最终合成时调节
+    dub_volume: float = 1.0
     """
     obj={name,dirname,basename,noextname,ext,target_dir,uuid}
     """
@@ -539,16 +542,12 @@ class TransCreate(BaseTask):
             tools.send_notification(str(e), f'{self.cfg["basename"]}')
             raise
 
-        # 成功后，如果存在 音量，则调节音量
+        # 成功后，如果存在 音量，则记录下来在最终合成时调节
         if self.cfg['tts_type'] not in [EDGE_TTS, AZURE_TTS] and self.cfg['volume'] != '+0%' and tools.vail_file(
                 self.cfg['target_wav']):
             volume = self.cfg['volume'].replace('%', '').strip()
             try:
-                volume = 1 + float(volume) / 100
-                if volume != 1.0:
-                    tmp_name = self.cfg['cache_folder'] + f'/volume-{volume}-{Path(self.cfg["target_wav"]).name}'
-                    tools.runffmpeg(['-y', '-i', self.cfg['target_wav'], '-af', f"volume={volume}", tmp_name])
-                    shutil.copy2(tmp_name, self.cfg['target_wav'])
+                self.dub_volume = 1 + float(volume) / 100
             except:
                 pass
 
@@ -601,8 +600,8 @@ class TransCreate(BaseTask):
 
         self.hasend = True
         self.precent = 100
-        self._signal(text=f"{self.cfg['name']}", type='succeed')
-        tools.send_notification(config.transobj['Succeed'], f"{self.cfg['basename']}")
+        config.logger.info(f"{self.cfg['basename']} 完成，ffprobe 缓存统计: {tools.get_probe_cache_stats()}")
+        # 先删除临时文件再发送完成消息，收到消息时目标文件夹中只剩结果文件
         try:
             if self.cfg['only_video']:
                 mp4_path = Path(self.cfg['targetdir_mp4'])
@@ -614,6 +613,8 @@ class TransCreate(BaseTask):
             shutil.rmtree(self.cfg['cache_folder'], ignore_errors=True)
         except Exception as e:
             config.logger.exception(e, exc_info=True)
+        self._signal(text=f"{self.cfg['name']}", type='succeed')
+        tools.send_notification(config.transobj['Succeed'], f"{self.cfg['basename']}")
 
     # 从原始视频分离出 无声视频
     def _split_novoice_byraw(self):
@@ -757,95 +758,41 @@ class TransCreate(BaseTask):
                 if Path(it['filename']).exists():
                     shutil.copy2(it['filename'], name)
 
-    # 添加背景音乐
-    def _back_music(self) -> None:
+    # 添加背景音乐，加入最终合成的滤镜图与配音混合
+    def _back_music(self, plan) -> None:
         if self._exit() or not self.shoud_dubbing:
             return
 
         if tools.vail_file(self.cfg['target_wav']) and tools.vail_file(
                 self.cfg['background_music']):
             try:
-                self.status_text = '添加背景音频' if config.defaulelang == 'zh' else 'Adding background audio'
                 # 获取视频长度
                 vtime = tools.get_audio_time(self.cfg['target_wav'])
                 # 获取背景音频长度
                 atime = tools.get_audio_time(self.cfg['background_music'])
-                bgm_file = self.cfg['cache_folder'] + f'/bgm_file.wav'
-                self.convert_to_wav(self.cfg['background_music'], bgm_file)
-                self.cfg['background_music'] = bgm_file
                 beishu = math.ceil(vtime / atime)
-                if config.settings['loop_backaudio'] and beishu > 1 and vtime - 1 > atime:
-                    # 获取延长片段
-                    file_list = [self.cfg['background_music'] for n in range(beishu + 1)]
-                    concat_txt = self.cfg['cache_folder'] + f'/{time.time()}.txt'
-                    tools.create_concat_txt(file_list, concat_txt=concat_txt)
-                    tools.concat_multi_audio(
-                        concat_txt=concat_txt,
-                        out=self.cfg['cache_folder'] + "/bgm_file_extend.wav")
-                    self.cfg['background_music'] = self.cfg['cache_folder'] + "/bgm_file_extend.wav"
-                # 背景音频降低音量
-                tools.runffmpeg(
-                    ['-y',
-                     '-i', self.cfg['background_music'],
-                     "-filter:a", f"volume={config.settings['backaudio_volume']}",
-                     '-c:a', 'pcm_s16le',
-                     self.cfg['cache_folder'] + f"/bgm_file_extend_volume.wav"
-                     ])
-                # 背景音频和配音合并
-                cmd = ['-y',
-                       '-i', self.cfg['target_wav'],
-                       '-i', self.cfg['cache_folder'] + f"/bgm_file_extend_volume.wav",
-                       '-filter_complex', "[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2",
-                       '-ac', '2',
-                       '-c:a', 'pcm_s16le',
-                       self.cfg['cache_folder'] + f"/lastend.wav"
-                       ]
-                tools.runffmpeg(cmd)
-                self.cfg['target_wav'] = self.cfg['cache_folder'] + f"/lastend.wav"
+                loop = bool(config.settings['loop_backaudio'] and beishu > 1 and vtime - 1 > atime)
+                # 背景音频降低音量后和配音合并
+                plan.mix(self.cfg['background_music'], volume=config.settings['backaudio_volume'], loop=loop)
             except Exception as e:
                 config.logger.exception(f'添加背景音乐失败:{str(e)}', exc_info=True)
 
-    def _separate(self) -> None:
+    # 重新嵌入分离出的背景音，加入最终合成的滤镜图
+    def _separate(self, plan) -> None:
         if self._exit() or not self.shoud_separate:
             return
-        if tools.vail_file(self.cfg['target_wav']):
+        if tools.vail_file(self.cfg['target_wav']) and tools.vail_file(self.cfg['instrument']):
             try:
-                self.status_text = '重新嵌入背景音' if config.defaulelang == 'zh' else 'Re-embedded background sounds'
                 vtime = tools.get_audio_time(self.cfg['target_wav'])
                 atime = tools.get_audio_time(self.cfg['instrument'])
-                beishu = math.ceil(vtime / atime)
-
-                instrument_file = self.cfg['instrument']
-                config.logger.info(f'合并背景音 {beishu=},{atime=},{vtime=}')
-                if config.settings['loop_backaudio'] and atime + 1 < vtime:
-                    # 背景音连接延长片段
-                    file_list = [instrument_file for n in range(beishu + 1)]
-                    concat_txt = self.cfg['cache_folder'] + f'/{time.time()}.txt'
-                    tools.create_concat_txt(file_list, concat_txt=concat_txt)
-                    tools.concat_multi_audio(concat_txt=concat_txt,
-                                             out=self.cfg['cache_folder'] + "/instrument-concat.wav")
-                    self.cfg['instrument'] = self.cfg['cache_folder'] + f"/instrument-concat.wav"
-                # 背景音合并配音
-                self._backandvocal(self.cfg['instrument'], self.cfg['target_wav'])
-                shutil.copy2(self.cfg['instrument'], f"{self.cfg['target_dir']}/{Path(instrument_file).name}")
+                config.logger.info(f'合并背景音 {atime=},{vtime=}')
+                # 背景音循环延长，音量降低后合并配音，合并后时长仍等于配音
+                plan.mix(self.cfg['instrument'], volume=config.settings['backaudio_volume'],
+                         loop=bool(config.settings['loop_backaudio'] and atime + 1 < vtime))
+                shutil.copy2(self.cfg['instrument'], f"{self.cfg['target_dir']}/{Path(self.cfg['instrument']).name}")
             except Exception as e:
                 config.logger.exception(e, exc_info=True)
 
-    # 合并后最后文件仍为 人声文件，时长需要等于人声
-    def _backandvocal(self, backwav, peiyinm4a):
-        import tempfile
-        backwav = Path(backwav).as_posix()
-        peiyinm4a = Path(peiyinm4a).as_posix()
-        tmpdir = tempfile.gettempdir()
-        tmpwav = Path(tmpdir + f'/{time.time()}-1.wav').as_posix()
-        tmpm4a = Path(tmpdir + f'/{time.time()}.wav').as_posix()
-        # 背景转为m4a文件,音量降低为0.8
-        self.convert_to_wav(backwav, tmpm4a, ["-filter:a", f"volume={config.settings['backaudio_volume']}"])
-        tools.runffmpeg(['-y', '-i', peiyinm4a, '-i', tmpm4a, '-filter_complex',
-                         "[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2", '-ac', '2', "-b:a", "128k",
-                         '-c:a', 'pcm_s16le', tmpwav])
-        shutil.copy2(tmpwav, peiyinm4a)
-
     # 处理所需字幕
     def _process_subtitles(self) -> tuple[str, str]:
         config.logger.info(f"\n======准备要嵌入的字幕:{self.cfg['subtitle_type']=}=====")
@@ -941,10 +888,21 @@ class TransCreate(BaseTask):
             subtitles_file, subtitle_langcode = self._process_subtitles()
 
         self.precent = min(max(90, self.precent), 95)
-        # 添加背景音乐
-        self._back_music()
-        # 重新嵌入分离出的背景音
-        self._separate()
+
+        # 配音音量、背景音乐、分离出的背景音、字幕都在同一次 ffmpeg 调用中处理，不生成中间文件
+        plan = AssemblyPlan(self.cfg['novoice_mp4'])
+        if self.cfg['voice_role'] != 'No':
+            self.status_text = '添加背景音频' if config.defaulelang == 'zh' else 'Adding background audio'
+            plan.set_audio(Path(self.cfg['target_wav']).as_posix(), volume=self.dub_volume)
+            # 添加背景音乐
+            self._back_music(plan)
+            # 重新嵌入分离出的背景音
+            self._separate(plan)
+            # 混合后的配音音频同时输出到目标文件夹
+            plan.save_audio(Path(self.cfg['target_wav_output']).as_posix())
+        elif tools.vail_file(self.cfg['source_wav']):
+            # 无配音时使用原始音频
+            plan.set_audio(Path(self.cfg['source_wav']).as_posix())
 
         self.precent = min(max(95, self.precent), 98)
 
@@ -953,54 +911,30 @@ class TransCreate(BaseTask):
 
         # 字幕嵌入时进入视频目录下
         os.chdir(Path(self.cfg['novoice_mp4']).parent.resolve())
-        if tools.vail_file(self.cfg['target_wav']):
-            shutil.copy2(self.cfg['target_wav'], self.cfg['target_wav_output'])
         try:
             self.status_text = '视频+字幕+配音合并中' if config.defaulelang == 'zh' else 'Video + Subtitles + Dubbing in merge'
-            cmd = []
+            # 硬字幕需重新编码视频
+            encode_args = [
+                "-c:v",
+                f"libx{self.video_codec_num}",
+                '-crf',
+                f'{config.settings["crf"]}',
+                '-preset',
+                config.settings['preset'],
+            ]
+            args = []
             # 有配音有字幕
             if self.cfg['voice_role'] != 'No' and self.cfg['subtitle_type'] > 0:
                 if self.cfg['subtitle_type'] in [1, 3]:
                     self._signal(text=config.transobj['peiyin-yingzimu'])
                     # 需要配音+硬字幕
-                    cmd = [
-                        "-y",
-                        "-progress",
-                        protxt,
-                        "-i",
-                        self.cfg['novoice_mp4'],
-                        "-i",
-                        Path(self.cfg['target_wav']).as_posix(),
-                        "-c:v",
-                        f"libx{self.video_codec_num}",
-                        "-c:a",
-                        "aac",
-                        "-b:a",
-                        "128k",
-                        "-vf",
-                        f"subtitles={subtitles_file}",
-                        "-movflags",
-                        "+faststart",
-                        '-crf',
-                        f'{config.settings["crf"]}',
-                        '-preset',
-                        config.settings['preset'],
-                        "-shortest",
-                        Path(self.cfg['targetdir_mp4']).as_posix()
-                    ]
+                    plan.burn_subtitles(subtitles_file)
+                    args = encode_args + ["-c:a", "aac", "-b:a", "128k"]
                 else:
                     # 配音+软字幕
                     self._signal(text=config.transobj['peiyin-ruanzimu'])
-                    cmd = [
-                        "-y",
-                        "-progress",
-                        protxt,
-                        "-i",
-                        self.cfg['novoice_mp4'],
-                        "-i",
-                        Path(self.cfg['target_wav']).as_posix(),
-                        "-i",
-                        subtitles_file,
+                    plan.soft_subtitles(subtitles_file)
+                    args = [
                         "-c:v",
                         "copy",
                         "-c:a",
@@ -1011,106 +945,34 @@ class TransCreate(BaseTask):
                         f"language={subtitle_langcode}",
                         "-b:a",
                         "128k",
-                        "-movflags",
-                        "+faststart",
-                        "-shortest",
-                        Path(self.cfg['targetdir_mp4']).as_posix()
                     ]
             elif self.cfg['voice_role'] != 'No':
                 # 有配音无字幕
                 self._signal(text=config.transobj['onlypeiyin'])
-                cmd = [
-                    "-y",
-                    "-progress",
-                    protxt,
-                    "-i",
-                    self.cfg['novoice_mp4'],
-                    "-i",
-                    Path(self.cfg['target_wav']).as_posix(),
-                    "-c:v",
-                    "copy",
-                    "-c:a",
-                    "aac",
-                    "-b:a",
-                    "128k",
-                    "-movflags",
-                    "+faststart",
-                    "-shortest",
-                    Path(self.cfg['targetdir_mp4']).as_posix()
-                ]
+                args = ["-c:v", "copy", "-c:a", "aac", "-b:a", "128k"]
             # 硬字幕无配音  原始 wav 合并
             elif self.cfg['subtitle_type'] in [1, 3]:
                 self._signal(text=config.transobj['onlyyingzimu'])
-                cmd = [
-                    "-y",
-                    "-progress",
-                    protxt,
-                    "-i",
-                    self.cfg['novoice_mp4']
-                ]
-                if tools.vail_file(self.cfg['source_wav']):
-                    cmd.append('-i')
-                    cmd.append(Path(self.cfg['source_wav']).as_posix())
-
-                cmd.append('-c:v')
-                cmd.append(f'libx{self.video_codec_num}')
-                if tools.vail_file(self.cfg['source_wav']):
-                    cmd.append('-c:a')
-                    cmd.append('aac')
-                cmd += [
-                    "-b:a",
-                    "128k",
-                    "-vf",
-                    f"subtitles={subtitles_file}",
-                    "-movflags",
-                    "+faststart",
-                    '-crf',
-                    f'{config.settings["crf"]}',
-                    '-preset',
-                    config.settings['preset'],
-                    "-shortest",
-                    Path(self.cfg['targetdir_mp4']).as_posix(),
-                ]
-
+                plan.burn_subtitles(subtitles_file)
+                args = encode_args + ["-c:a", "aac", "-b:a", "128k"]
             elif self.cfg['subtitle_type'] in [2, 4]:
                 # 无配音软字幕
                 self._signal(text=config.transobj['onlyruanzimu'])
-                # 原视频
-                cmd = [
-                    "-y",
-                    "-progress",
-                    protxt,
-                    "-i",
-                    self.cfg['novoice_mp4']
-                ]
-                # 原配音流
-                if tools.vail_file(self.cfg['source_wav']):
-                    cmd.append("-i")
-                    cmd.append(Path(self.cfg['source_wav']).as_posix())
-                # 目标字幕流
-                cmd += [
-                    "-i",
-                    subtitles_file,
+                plan.soft_subtitles(subtitles_file)
+                args = [
                     "-c:v",
-                    "copy"
-                ]
-                if tools.vail_file(self.cfg['source_wav']):
-                    cmd.append('-c:a')
-                    cmd.append('aac')
-                cmd += [
+                    "copy",
+                    "-c:a",
+                    "aac",
                     "-c:s",
                     "mov_text",
                     "-metadata:s:s:0",
                     f"language={subtitle_langcode}",
-                    "-movflags",
-                    "+faststart",
-                    '-crf',
-                    f'{config.settings["crf"]}',
-                    '-preset',
-                    config.settings['preset'],
-                    "-shortest",
                 ]
-                cmd.append(Path(self.cfg['targetdir_mp4']).as_posix())
+            cmd = []
+            if args:
+                cmd = plan.build(Path(self.cfg['targetdir_mp4']).as_posix(),
+                                 args + ["-movflags", "+faststart", "-shortest"], progress=protxt)
             config.logger.info(f"\n最终确定的音视频字幕合并命令为:{cmd=}\n")
             if cmd:
                 tools.runffmpeg(cmd)
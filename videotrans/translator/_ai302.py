@@ -4,7 +4,6 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -23,6 +22,7 @@ class AI302(BaseTrans):
     def __post_init__(self):
         super().__post_init__()
         self.trans_thread = int(config.settings.get('aitrans_thread', 500))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.proxies = {"http": "", "https": ""}
         self.model_name = config.params['ai302_model']
         self.prompt = tools.get_prompt(ainame='ai302', is_srt=self.is_srt).replace('{lang}', self.target_language_name)
@@ -42,7 +42,7 @@ class AI302(BaseTrans):
                  'content': self.prompt.replace('<INPUT></INPUT>', f'<INPUT>{text}</INPUT>')},
             ]
         }
-        response = requests.post('https://api.302.ai/v1/chat/completions', headers={
+        response = tools.get_session('https://api.302.ai').post('https://api.302.ai/v1/chat/completions', headers={
             'Accept': 'application/json',
             'Authorization': f'Bearer {config.params["ai302_key"]}',
             'User-Agent': 'pyvideotrans',
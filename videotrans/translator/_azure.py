@@ -24,6 +24,7 @@ class AzureGPT(BaseTrans):
     def __post_init__(self):
         super().__post_init__()
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.model_name = config.params["azure_model"]
         self.prompt = tools.get_prompt(ainame='azure', is_srt=self.is_srt).replace('{lang}', self.target_language_name)
         self._check_proxy()
@@ -46,7 +47,7 @@ class AzureGPT(BaseTrans):
             api_key=config.params["azure_key"],
             api_version=config.params['azure_version'],
             azure_endpoint=config.params["azure_api"],
-            http_client=httpx.Client(proxy=self.proxies)
+            http_client=tools.get_httpx_client(config.params["azure_api"], proxy=self.proxies, timeout=600)
         )
         text = "\n".join([i.strip() for i in data]) if isinstance(data, list) else data
         message = [
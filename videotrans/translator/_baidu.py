@@ -6,7 +6,6 @@ import time
 from dataclasses import dataclass
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -50,7 +49,7 @@ class Baidu(BaseTrans):
         requrl = f"http://api.fanyi.baidu.com/api/trans/vip/translate?q={text}&from=auto&to={tocode}&appid={config.params['baidu_appid']}&salt={salt}&sign={sign}"
 
         config.logger.info(f'[Baidu]请求数据:{requrl=}')
-        resraw = requests.get(requrl, proxies={"http": "", "https": ""})
+        resraw = tools.get_session(requrl).get(requrl, proxies={"http": "", "https": ""})
         resraw.raise_for_status()
         res = resraw.json()
         config.logger.info(f'[Baidu]返回响应:{res=}')
@@ -1,4 +1,3 @@
-import json
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -29,8 +28,14 @@ class BaseTrans(BaseCon):
 
     target_list: List = field(default_factory=list, init=False)
     split_source_text: List = field(default_factory=list, init=False)
+    # 翻译记忆库中命中的行 {行序号: 译文}，这些行不再发送
+    memory_hits: Dict = field(default_factory=dict, init=False)
+    # 提示词和术语表的 hash，作为翻译记忆的一部分键，首次使用时计算
+    memory_context: Optional[str] = field(default=None, init=False)
 
     trans_thread: int = field(init=False)
+    # 同时发出的翻译请求批次数，子类可按渠道调整
+    max_in_flight: int = field(init=False)
     retry: int = field(init=False)
     wait_sec: float = field(init=False)
     is_srt: bool = field(init=False)
@@ -40,6 +45,7 @@ class BaseTrans(BaseCon):
         super().__init__()
 
         self.trans_thread = int(config.settings.get('trans_thread', 5))
+        self.max_in_flight = int(config.settings.get('trans_concurrent', 1))
         self.retry = int(config.settings.get('retries', 2))
         self.wait_sec = float(config.settings.get('translation_wait', 0))
         self.aisendsrt = config.settings.get('aisendsrt', False)
@@ -64,8 +70,10 @@ class BaseTrans(BaseCon):
         if self.is_srt:
             # 如果是不是以 完整字幕格式发送，则组成字符串列表，否则组成 [dict,dict] 列表，每个dict都是字幕行信息
             source_text = [t['text'] for t in self.text_list] if not self.aisendsrt else self.text_list
+            # 只把翻译记忆库中未命中的行组成批次
+            source_text = self._lookup_memory(source_text)
             self.split_source_text = [source_text[i:i + self.trans_thread] for i in
-                                      range(0, len(self.text_list), self.trans_thread)]
+                                      range(0, len(source_text), self.trans_thread)]
         else:
             # 是多行文本字符串，以 \n 组装为list            
             source_text = self.text_list.strip().split("\n")
@@ -82,27 +90,51 @@ class BaseTrans(BaseCon):
         except Exception as e:
             raise
 
+    def _dispatch(self, batches, fetch, on_result) -> bool:
+        """
+        并发发送各批次，最多同时 max_in_flight 个请求
+        fetch(i, it) 在工作线程中执行，返回该批次翻译结果
+        on_result(i, it, result) 在当前线程按批次顺序调用，先完成的批次会等待前面的批次完成后再回调
+        被停止时返回 False
+        """
+        workers = max(1, min(self.max_in_flight, len(batches)))
+        if workers > 1:
+            config.logger.info(f'并发翻译，同时发送 {workers} 批次')
+        return tools.run_in_order(batches, fetch, on_result, workers=workers, should_exit=self._exit)
+
+    def _fetch_text(self, i, it):
+        # 工作线程中执行，字幕行已在 run 中查过翻译记忆库，文本则整段查询
+        if self._exit():
+            return ""
+        if not self.is_srt:
+            source = "\n".join(it)
+            found = self._memory_get([source])
+            if found:
+                return found[0]
+        result = tools.cleartext(self._item_task(it))
+        if not self.is_srt:
+            self._memory_set([(source, result)])
+        time.sleep(self.wait_sec)
+        return result
+
     def _run_text(self):
         # 翻译字幕并且以完整srt格式发送
-        for i, it in enumerate(self.split_source_text):
-            """ it=['你好啊我的朋友','第二行'] 
-                此时 _item_task 接收的是 list[str]
-            """
-            config.logger.info(f'##### [以文字行形式翻译]')
-            if self._exit():
-                return
+        """ it=['你好啊我的朋友','第二行']
+            此时 _item_task 接收的是 list[str]
+        """
+        config.logger.info(f'##### [以文字行形式翻译]')
 
-            result = self._get_cache(it)
-            if not result:
-                result = tools.cleartext(self._item_task(it))
-                self._set_cache(it, result)
+        def _on_result(i, it, result):
             if self.inst and self.inst.precent < 75:
                 self.inst.precent += 0.01
-            # 非srt直接break
+            # 非srt直接返回
             if not self.is_srt:
                 self.target_list.append(result)
-                break
+                return
             sep_res = result.split("\n")
+            # 行数一致时才能确定每行的译文，存入翻译记忆库
+            if len(sep_res) == len(it):
+                self._memory_set(zip(it, sep_res))
 
             for x, result_item in enumerate(sep_res):
                 if x < len(it):
@@ -119,7 +151,11 @@ class BaseTrans(BaseCon):
 
             if self.inst and self.inst.status_text:
                 self.inst.status_text = '字幕翻译中' if config.defaulelang == 'zh' else 'Translation of subtitles'
-            time.sleep(self.wait_sec)
+
+        # 非srt只翻译第一组
+        batches = self.split_source_text if self.is_srt else self.split_source_text[:1]
+        if not self._dispatch(batches, self._fetch_text, _on_result):
+            return
 
         # 恢复原代理设置
         if self.shound_del:
@@ -128,6 +164,11 @@ class BaseTrans(BaseCon):
         if not self.is_srt:
             return "\n".join(self.target_list)
 
+        # 按原顺序合并命中的行
+        if self.memory_hits:
+            pending = iter(self.target_list)
+            self.target_list = [self.memory_hits[i] if i in self.memory_hits else next(pending, "") for i in
+                                range(len(self.text_list))]
         max_i = len(self.target_list)
 
         for i, it in enumerate(self.text_list):
@@ -137,40 +178,57 @@ class BaseTrans(BaseCon):
                 self.text_list[i]['text'] = ""
         return self.text_list
 
+    def _fetch_srt(self, i, srt_str):
+        # 工作线程中执行，已命中翻译记忆库的行不在 srt_str 中
+        if self._exit():
+            return ""
+        result = self._item_task(srt_str)
+        if not result.strip():
+            raise TranslateSrtError('无返回翻译结果' if config.defaulelang == 'zh' else 'Translate result is empty')
+        time.sleep(self.wait_sec)
+        return result
+
     # 发送完整字幕格式内容进行翻译
     # 此时 _item_task 接收的是 srt格式的字符串
     def _run_srt(self):
-        result_srt_str_list = []
-        for i, it in enumerate(self.split_source_text):
-            config.logger.info(f'#### [以完整SRT格式发送翻译]，it应是dict列表')
-            if self._exit():
-                return
+        config.logger.info(f'#### [以完整SRT格式发送翻译]，it应是dict列表')
+        srt_str_list = []
+        for it in self.split_source_text:
             for j, srt in enumerate(it):
                 srt['text'] = srt['text'].strip().replace("\n", " ")
                 it[j] = srt
-            srt_str = "\n\n".join(
-                [f"{srtinfo['line']}\n{srtinfo['time']}\n{srtinfo['text'].strip()}" for srtinfo in it])
-            result = self._get_cache(srt_str)
-            if not result:
-                result = self._item_task(srt_str)
-                if not result.strip():
-                    raise TranslateSrtError('无返回翻译结果' if config.defaulelang == 'zh' else 'Translate result is empty')
-                self._set_cache(it, result)
+            srt_str_list.append("\n\n".join(
+                [f"{srtinfo['line']}\n{srtinfo['time']}\n{srtinfo['text'].strip()}" for srtinfo in it]))
 
+        result_srt_str_list = []
+
+        def _on_result(i, srt_str, result):
             if self.inst and self.inst.precent < 75:
                 self.inst.precent += 0.1
 
             self._signal(text=result, type='subtitle')
             result_srt_str_list.append(result)
+            # 返回的字幕条数一致时逐行存入翻译记忆库，双语结果只取最后一行
+            try:
+                batch = self.split_source_text[i]
+                res_list = tools.get_subtitle_from_srt(result, is_file=False)
+                if len(res_list) == len(batch):
+                    self._memory_set(
+                        [(batch[x]['text'], res['text'].strip().split("\n")[-1]) for x, res in enumerate(res_list)])
+            except Exception as e:
+                config.logger.warning(f'保存翻译记忆失败:{e}')
 
             if self.inst and self.inst.status_text:
                 self.inst.status_text = '字幕翻译中' if config.defaulelang == 'zh' else 'Translation of subtitles'
-            time.sleep(self.wait_sec)
+
+        if not self._dispatch(srt_str_list, self._fetch_srt, _on_result):
+            return
 
         # 恢复原代理设置
         if self.shound_del:
             self._set_proxy(type='del')
-        raws_list = tools.get_subtitle_from_srt("\n\n".join(result_srt_str_list), is_file=False)
+        raws_list = tools.get_subtitle_from_srt("\n\n".join(result_srt_str_list),
+                                                is_file=False) if result_srt_str_list else []
 
         # 双语翻译结果，只取最后一行
         config.logger.info(f'{raws_list=}\n{result_srt_str_list=}\n')
@@ -179,28 +237,62 @@ class BaseTrans(BaseCon):
             if it['text']:
                 it['text'] = it['text'][-1]
             raws_list[i] = it
-        return raws_list
+        if not self.memory_hits:
+            return raws_list
+        # 按原顺序合并翻译记忆库中命中的行
+        pending = iter(raws_list)
+        merge_list = []
+        for i, it in enumerate(self.text_list):
+            if i in self.memory_hits:
+                it = dict(it)
+                it['text'] = self.memory_hits[i]
+                merge_list.append(it)
+                continue
+            res = next(pending, None)
+            if res is not None:
+                res['line'] = it['line']
+                merge_list.append(res)
+        return merge_list
+
+    def _memory_scope(self):
+        if self.memory_context is None:
+            # 提示词(AI渠道已含术语表)或术语表变化后，旧译文不再复用
+            glossary = Path(config.ROOT_DIR + '/videotrans/glossary.txt')
+            context = getattr(self, 'prompt', '') + '\n' + (
+                glossary.read_text(encoding='utf-8').strip() if glossary.exists() else '')
+            self.memory_context = tools.get_md5(context) if context.strip() else ''
+        return (self.source_code or '', self.target_code or self.target_language_name or '',
+                self.__class__.__name__, self.model_name or '', self.memory_context)
+
+    def _memory_enabled(self):
+        return not self.is_test and bool(config.settings.get('trans_memory', True))
 
-    def _set_cache(self, it, res_str):
-        if not res_str.strip():
+    def _memory_get(self, texts) -> Dict:
+        if not self._memory_enabled():
+            return {}
+        try:
+            from videotrans.translator._memory import get_translation_memory
+            return get_translation_memory().lookup(self._memory_scope(), texts)
+        except Exception as e:
+            config.logger.warning(f'查询翻译记忆库失败:{e}')
+            return {}
+
+    def _memory_set(self, pairs):
+        if not self._memory_enabled():
             return
-        key_cache = self._get_key(it)
-
-        file_cache = config.TEMP_DIR + f'/translate_cache/{key_cache}.txt'
-        if not Path(config.TEMP_DIR + f'/translate_cache').is_dir():
-            Path(config.TEMP_DIR + f'/translate_cache').mkdir(parents=True, exist_ok=True)
-        Path(file_cache).write_text(res_str, encoding='utf-8')
-
-    def _get_cache(self, it):
-        if self.is_test:
-            return None
-        key_cache = self._get_key(it)
-        file_cache = config.TEMP_DIR + f'/translate_cache/{key_cache}.txt'
-        if Path(file_cache).exists():
-            return Path(file_cache).read_text(encoding='utf-8')
-        return None
-
-    def _get_key(self, it):
-        Path(config.TEMP_DIR + '/translate_cache').mkdir(parents=True, exist_ok=True)
-        return tools.get_md5(
-            f'{self.__class__.__name__}-{self.api_url}-{self.trans_thread}-{self.retry}-{self.wait_sec}-{self.iter_num}-{self.is_srt}-{self.aisendsrt}-{self.proxies}-{self.model_name}-{self.source_code}-{self.target_code}-{it if isinstance(it, str) else json.dumps(it)}')
+        try:
+            from videotrans.translator._memory import get_translation_memory
+            get_translation_memory().store(self._memory_scope(), list(pairs))
+        except Exception as e:
+            config.logger.warning(f'保存翻译记忆失败:{e}')
+
+    def _lookup_memory(self, source_text):
+        # 查询每行字幕，返回需要发送翻译的行
+        texts = [t['text'] if isinstance(t, dict) else t for t in source_text]
+        self.memory_hits = self._memory_get(texts)
+        if not self.memory_hits:
+            return source_text
+        config.logger.info(f'[翻译记忆]{self.uuid or ""} 共{len(texts)}行，命中{len(self.memory_hits)}行')
+        self._signal(
+            text=f'翻译记忆库命中{len(self.memory_hits)}行' if config.defaulelang == 'zh' else f'{len(self.memory_hits)} lines found in translation memory')
+        return [t for i, t in enumerate(source_text) if i not in self.memory_hits]
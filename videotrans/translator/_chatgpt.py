@@ -26,6 +26,7 @@ class ChatGPT(BaseTrans):
     def __post_init__(self):
         super().__post_init__()
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.api_url = self._get_url(config.params['chatgpt_api'])
         self.model_name = config.params["chatgpt_model"]
 
@@ -164,8 +165,7 @@ class ChatGPT(BaseTrans):
         ]
 
         config.logger.info(f"\n[chatGPT]发送请求数据:{message=}")
-        model = OpenAI(api_key=config.params['chatgpt_key'], base_url=self.api_url,
-                       http_client=httpx.Client(proxy=self.proxies, timeout=7200))
+        model = tools.get_openai_client(config.params['chatgpt_key'], self.api_url, proxy=self.proxies)
         response = model.chat.completions.create(
             model=config.params['chatgpt_model'],
             timeout=7200,
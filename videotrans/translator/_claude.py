@@ -5,7 +5,6 @@ from dataclasses import dataclass, field
 from typing import List, Union
 
 import anthropic
-import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -26,6 +25,7 @@ class Claude(BaseTrans):
 
         # 覆盖父类属性
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.api_url = self._get_url(config.params['claude_api'])
         self.model_name = config.params["claude_model"]
 
@@ -76,7 +76,7 @@ class Claude(BaseTrans):
         client = anthropic.Anthropic(
             base_url=self._get_url(),
             api_key=config.params['claude_key'],
-            http_client=httpx.Client(proxy=self.proxies)
+            http_client=tools.get_httpx_client(self._get_url(), proxy=self.proxies, timeout=600)
         )
 
         response = client.messages.create(
@@ -4,7 +4,6 @@ import re
 from dataclasses import dataclass
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -64,7 +63,7 @@ class DeepLX(BaseTrans):
             "target_lang": target_code
         }
         config.logger.info(f'[DeepLX]发送请求数据,{jsondata=}')
-        response = requests.post(url=self.api_url, json=jsondata, proxies=self.proxies)
+        response = tools.get_session(self.api_url).post(url=self.api_url, json=jsondata, proxies=self.proxies)
         response.raise_for_status()
         config.logger.info(f'[DeepLX]返回响应,{response.text=}')
 
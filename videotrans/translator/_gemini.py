@@ -5,8 +5,6 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Union
 
-import httpx
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -27,6 +25,7 @@ class Gemini(BaseTrans):
     def __post_init__(self):
         super().__post_init__()
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.model_name = config.params["gemini_model"]
 
         self.prompt = tools.get_prompt(ainame='gemini', is_srt=self.is_srt).replace('{lang}', self.target_language_name)
@@ -54,8 +53,7 @@ class Gemini(BaseTrans):
         api_key = self.api_keys.pop(0)
         self.api_keys.append(api_key)
         config.logger.info(f'[Gemini]请求发送:{api_key=},{config.params["gemini_model"]=}')
-        model = OpenAI(api_key=api_key, base_url=self.api_url,
-                       http_client=httpx.Client(proxy=self.proxies, timeout=7200))
+        model = tools.get_openai_client(api_key, self.api_url, proxy=self.proxies)
 
         response = model.chat.completions.create(
             model=config.params["gemini_model"],
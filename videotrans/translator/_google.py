@@ -3,12 +3,12 @@ import re
 from dataclasses import dataclass
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import NO_RETRY_EXCEPT, StopRetry
 from videotrans.translator._base import BaseTrans
+from videotrans.util import tools
 
 RETRY_NUMS = 3
 RETRY_DELAY = 5
@@ -38,7 +38,7 @@ class Google(BaseTrans):
         headers = {
             'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1'
         }
-        response = requests.get(url, headers=headers, timeout=300, proxies=self.proxies, verify=False)
+        response = tools.get_session(url).get(url, headers=headers, timeout=300, proxies=self.proxies, verify=False)
         response.raise_for_status()
         config.logger.info(f'[Google]返回数据:{response.status_code=}')
 
@@ -4,7 +4,6 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -24,6 +23,7 @@ class HuoShan(BaseTrans):
         super().__post_init__()
 
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.proxies = {"http": "", "https": ""}
         self.model_name = config.params["zijiehuoshan_model"]
 
@@ -47,7 +47,7 @@ class HuoShan(BaseTrans):
             "model": config.params['zijiehuoshan_model'],
             "messages": message
         }
-        resp = requests.post("https://ark.cn-beijing.volces.com/api/v3/chat/completions",
+        resp = tools.get_session("https://ark.cn-beijing.volces.com").post("https://ark.cn-beijing.volces.com/api/v3/chat/completions",
                              proxies=self.proxies, json=req, headers={
                 "Accept": "application/json",
                 "Content-Type": "application/json",
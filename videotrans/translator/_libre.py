@@ -4,7 +4,6 @@ import re
 from dataclasses import dataclass
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -49,7 +48,7 @@ class Libre(BaseTrans):
         }
         config.logger.info(f'[Libre]发送请求数据,{jsondata=}')
 
-        response = requests.post(url=self.api_url, json=jsondata, proxies=self.proxies)
+        response = tools.get_session(self.api_url).post(url=self.api_url, json=jsondata, proxies=self.proxies)
         response.raise_for_status()
         result = response.json()
         result = tools.cleartext(result['translatedText'])
@@ -5,7 +5,6 @@ from dataclasses import dataclass, field
 from typing import List, Union
 
 import httpx
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -25,6 +24,7 @@ class LocalLLM(BaseTrans):
         super().__post_init__()
 
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.api_url = config.params['localllm_api']
         self.model_name = config.params["localllm_model"]
 
@@ -49,8 +49,7 @@ class LocalLLM(BaseTrans):
            after=after_log(config.logger, logging.INFO))
     def _item_task(self, data: Union[List[str], str]) -> str:
         if self._exit(): return
-        model = OpenAI(api_key=config.params['localllm_key'], base_url=self.api_url,
-                       http_client=httpx.Client(proxy=self.proxies))
+        model = tools.get_openai_client(config.params['localllm_key'], self.api_url, proxy=self.proxies, timeout=600)
         text = "\n".join([i.strip() for i in data]) if isinstance(data, list) else data
         message = [
             {'role': 'system',
@@ -0,0 +1,218 @@
+import atexit
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from videotrans.configure import config
+
+"""
+逐行翻译记忆库
+
+原先以整批字幕+渠道设置的 md5 为键，每批一个 txt 保存在 translate_cache，修改每批行数、重试次数
+或其中任意一行都会导致整批失效。现在以 (源语言, 目标语言, 渠道, 模型, 提示词和术语表hash, 规范化原文) 为键
+逐行保存译文，翻译前先查询，只把未命中的行组成批次发送，trans_memory 为 False 时不使用
+
+数据保存在 TEMP_DIR/translate_cache/translate_memory.db (SQLite WAL 模式)，软件退出时保留，多个线程/任务可同时读写，
+超过 trans_memory_max 行时删除最久未使用的记录，可导出/导入为 jsonl 以便多台机器共享
+"""
+
+DB_FILE = 'translate_memory.db'
+# 命中记录的使用时间先缓存在内存，攒够后再批量写入，避免每次命中都写库
+_TOUCH_BATCH = 200
+
+
+def normalize_text(text):
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._inserted = 0
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS memory (
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            context TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            source_text TEXT NOT NULL,
+            target_text TEXT NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (source_lang, target_lang, provider, model, context, source_hash)
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_memory_last_used ON memory (last_used)')
+        conn.commit()
+
+    def _conn(self):
+        # sqlite 连接不能跨线程使用，每个线程一个连接
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @property
+    def max_rows(self):
+        try:
+            return int(float(config.settings.get('trans_memory_max', 200000)))
+        except (TypeError, ValueError):
+            return 200000
+
+    def lookup(self, scope, texts):
+        """
+        scope: (source_lang, target_lang, provider, model, context)，context 为提示词和术语表的 hash
+        texts: 原文列表，返回 {序号: 译文}，只包含命中的行
+        """
+        hashes = {}
+        for i, text in enumerate(texts):
+            text = normalize_text(text)
+            if text:
+                hashes.setdefault(_hash(text), []).append(i)
+        if not hashes:
+            return {}
+        found = {}
+        conn = self._conn()
+        keys = list(hashes.keys())
+        # sqlite 单条语句的参数数量有上限，分段查询
+        for n in range(0, len(keys), 500):
+            part = keys[n:n + 500]
+            rows = conn.execute(
+                f'SELECT source_hash, target_text FROM memory WHERE source_lang=? AND target_lang=? AND provider=? AND model=? AND context=? AND source_hash IN ({",".join("?" * len(part))})',
+                [*scope, *part]).fetchall()
+            for source_hash, target_text in rows:
+                for i in hashes[source_hash]:
+                    found[i] = target_text
+        if found:
+            now = time.time()
+            with self._lock:
+                for source_hash in {_hash(normalize_text(texts[i])) for i in found}:
+                    self._touched[(*scope, source_hash)] = now
+                if len(self._touched) >= _TOUCH_BATCH:
+                    self._flush_touched()
+        return found
+
+    def store(self, scope, pairs):
+        """pairs: [(原文, 译文), ...]，译文为空的行不保存"""
+        now = time.time()
+        rows = []
+        for source, target in pairs:
+            source = normalize_text(source)
+            if source and target and target.strip():
+                rows.append((*scope, _hash(source), source, target.strip(), now))
+        if not rows:
+            return
+        conn = self._conn()
+        conn.executemany('INSERT OR REPLACE INTO memory VALUES (?,?,?,?,?,?,?,?,?)', rows)
+        conn.commit()
+        with self._lock:
+            self._inserted += len(rows)
+            if self._inserted >= _TOUCH_BATCH:
+                self._inserted = 0
+                self._evict()
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        conn = self._conn()
+        conn.executemany(
+            'UPDATE memory SET last_used=? WHERE source_lang=? AND target_lang=? AND provider=? AND model=? AND context=? AND source_hash=?',
+            [(t, *key) for key, t in touched.items()])
+        conn.commit()
+
+    def _evict(self):
+        max_rows = self.max_rows
+        if max_rows <= 0:
+            return
+        conn = self._conn()
+        total = conn.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+        if total <= max_rows:
+            return
+        self._flush_touched()
+        conn.execute(
+            'DELETE FROM memory WHERE rowid IN (SELECT rowid FROM memory ORDER BY last_used LIMIT ?)',
+            (total - max_rows,))
+        conn.commit()
+        config.logger.info(f'翻译记忆库超过{max_rows}行，删除最久未使用的{total - max_rows}行')
+
+    def flush(self):
+        with self._lock:
+            try:
+                self._flush_touched()
+            except Exception as e:
+                config.logger.warning(f'更新翻译记忆库使用时间失败:{e}')
+
+    def iter_jsonl(self):
+        """逐行生成全部记录的 jsonl 文本，用于导出"""
+        self.flush()
+        fields = ['source_lang', 'target_lang', 'provider', 'model', 'context', 'source_text', 'target_text',
+                  'last_used']
+        # 使用独立连接，生成器可能在其他线程中被逐步读取
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            for row in conn.execute(f'SELECT {", ".join(fields)} FROM memory'):
+                yield json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n"
+        finally:
+            conn.close()
+
+    def export_jsonl(self, file):
+        """导出全部记录为 jsonl，返回导出的行数"""
+        n = 0
+        with open(file, 'w', encoding='utf-8') as f:
+            for line in self.iter_jsonl():
+                f.write(line)
+                n += 1
+        return n
+
+    def import_jsonl(self, file):
+        """导入 export_jsonl 导出的文件，已存在的记录保留较新的一条，返回导入的行数"""
+        rows = []
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                it = json.loads(line)
+                source = normalize_text(it['source_text'])
+                if not source or not it.get('target_text'):
+                    continue
+                rows.append((it['source_lang'], it['target_lang'], it['provider'], it['model'], it.get('context', ''),
+                             _hash(source), source, it['target_text'], float(it.get('last_used') or time.time())))
+        conn = self._conn()
+        conn.executemany('''INSERT INTO memory VALUES (?,?,?,?,?,?,?,?,?)
+            ON CONFLICT(source_lang, target_lang, provider, model, context, source_hash) DO UPDATE SET
+            target_text=excluded.target_text, last_used=excluded.last_used
+            WHERE excluded.last_used > memory.last_used''', rows)
+        conn.commit()
+        with self._lock:
+            self._evict()
+        return len(rows)
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            Path(config.TEMP_DIR + '/translate_cache').mkdir(parents=True, exist_ok=True)
+            _memory = TranslationMemory(config.TEMP_DIR + f'/translate_cache/{DB_FILE}')
+            atexit.register(_memory.flush)
+        return _memory
@@ -3,12 +3,12 @@ import logging
 from dataclasses import dataclass
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import NO_RETRY_EXCEPT
 from videotrans.translator._base import BaseTrans
+from videotrans.util import tools
 
 RETRY_NUMS = 3
 RETRY_DELAY = 5
@@ -33,7 +33,7 @@ class Microsoft(BaseTrans):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
 
-        auth = requests.get('https://edge.microsoft.com/translate/auth', headers=headers,
+        auth = tools.get_session('https://edge.microsoft.com').get('https://edge.microsoft.com/translate/auth', headers=headers,
                             proxies=self.proxies, verify=False)
         auth.raise_for_status()
 
@@ -45,7 +45,7 @@ class Microsoft(BaseTrans):
         url = f"https://api-edge.cognitive.microsofttranslator.com/translate?from=&to={tocode}&api-version=3.0&includeSentenceLength=true"
         headers['Authorization'] = f"Bearer {auth.text}"
         config.logger.info(f'[Mircosoft]请求数据:{url=},{auth.text=}')
-        response = requests.post(url, json=[{"Text": "\n".join(data)}], proxies=self.proxies, headers=headers,
+        response = tools.get_session(url).post(url, json=[{"Text": "\n".join(data)}], proxies=self.proxies, headers=headers,
                                  verify=False, timeout=300)
         config.logger.info(f'[Mircosoft]返回:{response.text=}')
         response.raise_for_status()
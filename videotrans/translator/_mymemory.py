@@ -4,12 +4,12 @@ from dataclasses import dataclass
 from typing import List, Union
 from urllib.parse import quote
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import NO_RETRY_EXCEPT
 from videotrans.translator._base import BaseTrans
+from videotrans.util import tools
 
 RETRY_NUMS = 3
 RETRY_DELAY = 5
@@ -36,7 +36,7 @@ class MyMemory(BaseTrans):
         text = "\n".join(data)
         url = f"https://api.mymemory.translated.net/get?q={quote(text)}&langpair={self.source_code}|{self.target_code}"
         config.logger.info(f'[mymemory]请求数据:{url=}')
-        response = requests.get(url, proxies=self.proxies, headers=headers, verify=False, timeout=300)
+        response = tools.get_session(url).get(url, proxies=self.proxies, headers=headers, verify=False, timeout=300)
         config.logger.info(f'[mymemory]返回:{response.text=}')
         response.raise_for_status()
 
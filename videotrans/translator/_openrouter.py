@@ -4,8 +4,6 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Union
 
-import httpx
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -27,6 +25,7 @@ class OpenRouter(BaseTrans):
         super().__post_init__()
 
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.model_name = config.params.get('openrouter_model', "")
         self.api_url = 'https://openrouter.ai/api/v1'
 
@@ -52,7 +51,7 @@ class OpenRouter(BaseTrans):
         config.logger.info(f"\n[openrouter]发送请求数据:{message=}")
         pro = self._set_proxy(type='set')
 
-        model = OpenAI(api_key=self.api_key, base_url=self.api_url, http_client=httpx.Client(proxy=pro, timeout=7200))
+        model = tools.get_openai_client(self.api_key, self.api_url, proxy=pro)
         response = model.chat.completions.create(
             model=self.model_name,
             messages=message,
@@ -2,12 +2,12 @@ import logging
 from dataclasses import dataclass
 from typing import List, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import NO_RETRY_EXCEPT
 from videotrans.translator._base import BaseTrans
+from videotrans.util import tools
 
 RETRY_NUMS = 3
 RETRY_DELAY = 5
@@ -41,7 +41,7 @@ class OTT(BaseTrans):
             "source": "auto",
             "target": self.target_code[:2]
         }
-        response = requests.post(url=self.api_url, json=jsondata, proxies=self.proxies)
+        response = tools.get_session(self.api_url).post(url=self.api_url, json=jsondata, proxies=self.proxies)
         response.raise_for_status()
         result = response.json()
         if "error" in result:
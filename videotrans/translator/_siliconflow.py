@@ -4,7 +4,6 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Union
 
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -24,6 +23,7 @@ class SILICONFLOW(BaseTrans):
     def __post_init__(self):
         super().__post_init__()
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.model_name = config.params.get('guiji_model', '')
         self.api_url = "https://api.siliconflow.cn/v1"
 
@@ -47,7 +47,7 @@ class SILICONFLOW(BaseTrans):
         ]
 
         config.logger.info(f"\n[siliconflow]发送请求数据:{message=}")
-        model = OpenAI(api_key=self.api_key, base_url=self.api_url)
+        model = tools.get_openai_client(self.api_key, self.api_url, timeout=600)
 
         response = model.chat.completions.create(
             model=self.model_name,
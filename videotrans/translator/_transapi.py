@@ -3,12 +3,12 @@ from dataclasses import dataclass
 from typing import List, Union
 from urllib.parse import quote
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
 from videotrans.configure._except import NO_RETRY_EXCEPT
 from videotrans.translator._base import BaseTrans
+from videotrans.util import tools
 
 RETRY_NUMS = 3
 RETRY_DELAY = 5
@@ -39,7 +39,7 @@ class TransAPI(BaseTrans):
         text = quote("\n".join(data))
         requrl = f"{self.api_url}target_language={self.target_code}&source_language={self.source_code[:2] if self.source_code else ''}&text={text}&secret={config.params['trans_secret']}"
         config.logger.info(f'[TransAPI]请求数据：{requrl=}')
-        response = requests.get(url=requrl, proxies=self.proxies)
+        response = tools.get_session(requrl).get(url=requrl, proxies=self.proxies)
         config.logger.info(f'[TransAPI]返回:{response.text=}')
         response.raise_for_status()
         jsdata = response.json()
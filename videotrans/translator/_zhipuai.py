@@ -4,7 +4,6 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Union
 
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log
 
 from videotrans.configure import config
@@ -25,6 +24,7 @@ class ZhipuAI(BaseTrans):
         super().__post_init__()
 
         self.trans_thread = int(config.settings.get('aitrans_thread', 50))
+        self.max_in_flight = int(config.settings.get('aitrans_concurrent', 1))
         self.model_name = config.params.get('zhipu_model', "glm-4-flash")
         self.api_url = 'https://open.bigmodel.cn/api/paas/v4/'
 
@@ -48,7 +48,7 @@ class ZhipuAI(BaseTrans):
         ]
 
         config.logger.info(f"\n[zhipuai]发送请求数据:{message=}")
-        model = OpenAI(api_key=self.api_key, base_url=self.api_url)
+        model = tools.get_openai_client(self.api_key, self.api_url, timeout=600)
         response = model.chat.completions.create(
             model=self.model_name,
             messages=message,
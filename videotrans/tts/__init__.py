@@ -439,7 +439,6 @@ def run(*, queue_tts=None, language=None, inst=None, uuid=None, play=False, is_t
         return
     if config.exit_soft or (not is_test and config.current_status != 'ing' and config.box_tts != 'ing'):
         return
-    tts_type = queue_tts[0]['tts_type']
     kwargs = {
         "queue_tts": queue_tts,
         "language": language,
@@ -448,6 +447,24 @@ def run(*, queue_tts=None, language=None, inst=None, uuid=None, play=False, is_t
         "play": play,
         "is_test": is_test
     }
+    # 试听和测试不使用缓存
+    if play or is_test:
+        _run_channel(queue_tts[0]['tts_type'], kwargs)
+        return
+
+    # 命中缓存和重复的字幕不再请求配音渠道
+    from videotrans.tts._cache import CachedDubbing
+    cached = CachedDubbing(queue_tts, language, uuid)
+    kwargs['queue_tts'] = cached.prepare()
+    try:
+        if kwargs['queue_tts']:
+            _run_channel(queue_tts[0]['tts_type'], kwargs)
+    finally:
+        # 出错时也保存已成功的配音，异常照常抛出
+        cached.finish()
+
+
+def _run_channel(tts_type, kwargs):
     if tts_type == AZURE_TTS:
         from videotrans.tts._azuretts import AzureTTS
         AzureTTS(**kwargs).run()
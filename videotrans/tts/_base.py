@@ -199,6 +199,12 @@ class BaseTTS(BaseCon):
     def _base64_to_audio(self, encoded_str: str, output_path: str) -> None:
         if not encoded_str:
             raise ValueError("Base64 encoded string is empty.")
+        # 输出 wav 时解码后直接在内存中转为配音统一格式，无需写中间文件再调用 ffmpeg
+        if Path(output_path).suffix.lower() == '.wav':
+            if encoded_str.startswith('data:'):
+                encoded_str = encoded_str.split(',', 1)[1]
+            self.convert_to_wav(base64.b64decode(encoded_str), output_path)
+            return
         # 如果存在data前缀，则按照前缀中包含的音频格式保存为转换格式
         if encoded_str.startswith('data:audio/'):
             output_ext = Path(output_path).suffix.lower()[1:]
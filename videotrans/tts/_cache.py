@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from videotrans.configure import config
+from videotrans.tts import COSYVOICE_TTS, CHATTTS, AI302_TTS, FISHTTS, AZURE_TTS, GPTSOVITS_TTS, CLONE_VOICE_TTS, \
+    OPENAI_TTS, ELEVENLABS_TTS, TTS_API, VOLCENGINE_TTS, F5_TTS, KOKORO_TTS, GOOGLECLOUD_TTS, GEMINI_TTS, \
+    CHATTERBOX_TTS, QWEN_TTS
+from videotrans.util import tools
+
+"""
+配音结果缓存
+
+以 规范化文本+角色+语速/音量/音调+渠道/模型 为键保存配音结果，与字幕时间和行号无关，
+因此时间轴变化、字幕行移动、同一文件中的重复句子都无需再次请求配音渠道
+
+缓存文件保存在 TEMP_DIR/dubbing_cache/store 下，index.json 记录各条目大小和最近使用时间，
+启动时会将目录中未记录在 index.json 的文件补入索引，
+总大小超过 dubbing_cache_size MB 时按最近最少使用淘汰，0 表示不使用缓存
+软件退出时保留该目录，以便下次运行继续使用
+"""
+
+STORE_NAME = 'store'
+
+# 影响配音结果的渠道配置，除了角色语速等之外，这些值变化时也要重新配音
+_PROVIDER_PARAMS = {
+    COSYVOICE_TTS: ('cosyvoice_url',),
+    CHATTTS: ('chattts_api',),
+    AI302_TTS: ('ai302tts_model',),
+    FISHTTS: ('fishtts_url',),
+    AZURE_TTS: ('azure_speech_region',),
+    GPTSOVITS_TTS: ('gptsovits_url', 'gptsovits_isv2', 'gptsovits_extra'),
+    CLONE_VOICE_TTS: ('clone_api',),
+    OPENAI_TTS: ('openaitts_api', 'openaitts_model', 'openaitts_instructions'),
+    ELEVENLABS_TTS: ('elevenlabstts_models',),
+    TTS_API: ('ttsapi_url', 'ttsapi_extra', 'ttsapi_language_boost', 'ttsapi_emotion'),
+    VOLCENGINE_TTS: ('volcenginetts_cluster',),
+    F5_TTS: ('f5tts_url', 'f5tts_model', 'f5tts_ttstype'),
+    KOKORO_TTS: ('kokoro_api',),
+    GOOGLECLOUD_TTS: ('gcloud_language_code', 'gcloud_voice_name', 'gcloud_audio_encoding', 'gcloud_ssml_gender'),
+    GEMINI_TTS: ('gemini_ttsmodel', 'gemini_ttsstyle'),
+    CHATTERBOX_TTS: ('chatterbox_url', 'chatterbox_cfg_weight', 'chatterbox_exaggeration'),
+    QWEN_TTS: ('qwentts_model',),
+}
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text or '')
+    text = re.sub(r'\[?spk\-?\d{1,}\]', '', text, flags=re.I)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def make_key(item, language):
+    """返回该条配音的缓存键，不可缓存时返回 None"""
+    # 克隆音色使用原视频对应片段作为参考音频，每行都不同
+    if item.get('ref_wav') or item.get('role') == 'clone':
+        return None
+    text = normalize_text(item.get('text', ''))
+    if not text:
+        return None
+    tts_type = item.get('tts_type')
+    provider = [config.params.get(k, '') for k in _PROVIDER_PARAMS.get(tts_type, ())]
+    return tools.get_md5(json.dumps([
+        text,
+        item.get('role', ''),
+        item.get('rate', ''),
+        item.get('volume', ''),
+        item.get('pitch', ''),
+        tts_type,
+        language,
+        provider,
+        bool(config.settings.get('remove_silence'))
+    ], ensure_ascii=False, default=str))
+
+
+class DubbingCache:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_file = self.root / 'index.json'
+        self._lock = threading.Lock()
+        # key -> {"file":文件名, "size":字节数, "atime":最近使用时间}，按使用先后排序
+        self._index = OrderedDict()
+        self._total = 0
+        self._load()
+
+    @property
+    def max_bytes(self):
+        try:
+            return int(float(config.settings.get('dubbing_cache_size', 1024)) * 1024 * 1024)
+        except (TypeError, ValueError):
+            return 1024 * 1024 * 1024
+
+    def _load(self):
+        try:
+            data = json.loads(self.index_file.read_text(encoding='utf-8'))
+        except Exception:
+            data = {}
+        # index.json 只在任务结束时写入，异常退出时目录中会有未记录的文件，按文件修改时间补入索引
+        files = {}
+        if self.root.is_dir():
+            for f in self.root.iterdir():
+                if f.suffix == '.part':
+                    f.unlink(missing_ok=True)
+                elif f.is_file() and f != self.index_file and f.suffix != '.tmp':
+                    files[f.name] = f
+        for key, it in data.items():
+            if files.pop(it.get('file'), None) is None:
+                data[key] = None
+        for name, f in files.items():
+            st = f.stat()
+            data[f.name.split('.')[0]] = {"file": name, "size": st.st_size, "atime": st.st_mtime}
+        for key, it in sorted(((k, v) for k, v in data.items() if v), key=lambda kv: kv[1].get('atime', 0)):
+            self._index[key] = it
+            self._total += it['size']
+        max_bytes = self.max_bytes
+        while max_bytes > 0 and self._total > max_bytes and self._index:
+            self._remove(next(iter(self._index)))
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self._index, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, self.index_file)
+
+    def _remove(self, key):
+        it = self._index.pop(key, None)
+        if it:
+            self._total -= it['size']
+            Path(self.root / it['file']).unlink(missing_ok=True)
+
+    def get(self, key, out_file):
+        """命中时将缓存复制到 out_file 并返回 True"""
+        with self._lock:
+            it = self._index.get(key)
+            if not it:
+                return False
+            src = self.root / it['file']
+            if not src.is_file():
+                self._remove(key)
+                return False
+            it['atime'] = time.time()
+            self._index.move_to_end(key)
+        shutil.copyfile(src, out_file)
+        return True
+
+    def put(self, key, src_file):
+        max_bytes = self.max_bytes
+        size = Path(src_file).stat().st_size
+        if size > max_bytes:
+            return
+        name = key + Path(src_file).suffix
+        self.root.mkdir(parents=True, exist_ok=True)
+        # 先复制为临时文件再改名，避免其他任务读到不完整的文件
+        tmp = self.root / f'{name}.{threading.get_ident()}.part'
+        shutil.copyfile(src_file, tmp)
+        with self._lock:
+            self._remove(key)
+            os.replace(tmp, self.root / name)
+            self._index[key] = {"file": name, "size": size, "atime": time.time()}
+            self._total += size
+            while self._total > max_bytes and self._index:
+                self._remove(next(iter(self._index)))
+
+    def flush(self):
+        with self._lock:
+            try:
+                self._save()
+            except Exception as e:
+                config.logger.warning(f'保存配音缓存索引失败:{e}')
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_dubbing_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DubbingCache(config.TEMP_DIR + f'/dubbing_cache/{STORE_NAME}')
+        return _cache
+
+
+class CachedDubbing:
+    """
+    一次配音任务的缓存处理
+    prepare() 将命中的条目直接复制到目标文件，并把相同键的条目合并为一条，返回实际需要配音的条目
+    finish() 将新配音结果写入缓存，并复制给合并掉的重复条目
+    """
+
+    def __init__(self, queue_tts, language, uuid=None):
+        self.queue_tts = queue_tts
+        self.language = language
+        self.uuid = uuid
+        self.cache = get_dubbing_cache()
+        # dubbing_cache_size 为 0 时不读写缓存，只合并同一任务内的重复条目
+        self.enabled = self.cache.max_bytes > 0
+        # key -> [需要配音的条目, 重复条目...]
+        self.groups = {}
+        self.hits = 0
+        self.misses = 0
+        self.dups = 0
+
+    def prepare(self):
+        pending = []
+        for it in self.queue_tts:
+            key = make_key(it, self.language)
+            if key is None:
+                pending.append(it)
+                continue
+            if key in self.groups:
+                self.groups[key].append(it)
+                self.dups += 1
+                continue
+            try:
+                if self.enabled and self.cache.get(key, it['filename']):
+                    self.hits += 1
+                    self.groups[key] = [None, it]
+                    continue
+            except Exception as e:
+                config.logger.warning(f'读取配音缓存失败:{e}')
+            self.misses += 1
+            self.groups[key] = [it]
+            pending.append(it)
+        return pending
+
+    def finish(self):
+        for key, items in self.groups.items():
+            src, rest = items[0], items[1:]
+            if src is None:
+                src, rest = rest[0], rest[1:]
+            elif not tools.vail_file(src['filename']):
+                continue
+            elif self.enabled:
+                try:
+                    self.cache.put(key, src['filename'])
+                except Exception as e:
+                    config.logger.warning(f'写入配音缓存失败:{e}')
+            for it in rest:
+                try:
+                    shutil.copyfile(src['filename'], it['filename'])
+                except Exception as e:
+                    config.logger.warning(f'复制重复配音失败:{e}')
+        if self.enabled:
+            self.cache.flush()
+        config.logger.info(
+            f'[配音缓存]{self.uuid or ""} 共{len(self.queue_tts)}条，命中{self.hits}，未命中{self.misses}，重复合并{self.dups}')
@@ -7,9 +7,6 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Union
 
-import httpx
-import requests
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -49,8 +46,7 @@ class ChatterBoxTTS(BaseTTS):
                 if self.inst and self.inst.precent < 80:
                     self.inst.precent += 0.1
                 return
-            client = OpenAI(api_key='123456', base_url=self.api_url + '/v1',
-                            http_client=httpx.Client(proxy=None, timeout=7200))
+            client = tools.get_openai_client('123456', self.api_url + '/v1')
             response = client.audio.speech.create(
                 model="chatterbox-tts",  # 这是一个兼容性参数
                 voice=self.language,  # 这也是一个兼容性参数
@@ -101,7 +97,7 @@ class ChatterBoxTTS(BaseTTS):
                 'language': self.language
             }
             # 发送POST请求，设置合理的超时时间
-            response = requests.post(
+            response = tools.get_session(self.api_url).post(
                 self.api_url + '/v2/audio/speech_with_prompt',
                 data=form_data,
                 files=files_payload,
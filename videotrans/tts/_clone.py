@@ -6,7 +6,6 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Set
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -61,7 +60,7 @@ class CloneVoice(BaseTTS):
                 with open(data_item['ref_wav'], 'rb') as f:
                     chunk = f.read()
                 files = {"audio": chunk}
-            res = requests.post(f"{self.api_url}/apitts", data=data, files=files, proxies=self.proxies,
+            res = tools.get_session(self.api_url).post(f"{self.api_url}/apitts", data=data, files=files, proxies=self.proxies,
                                 timeout=3600)
             res.raise_for_status()
             config.logger.info(f'clone-voice:{data=},{res.text=}')
@@ -80,12 +79,9 @@ class CloneVoice(BaseTTS):
                 self._signal(text=f'{config.transobj["kaishipeiyin"]} {self.has_done}/{self.len}')
                 return
 
-            resb = requests.get(res['url'], proxies=self.proxies)
+            resb = tools.get_session(res['url']).get(res['url'], proxies=self.proxies)
             resb.raise_for_status()
-            with open(data_item['filename'] + ".wav", 'wb') as f:
-                f.write(resb.content)
-            time.sleep(1)
-            self.convert_to_wav(data_item['filename'] + ".wav", data_item['filename'])
+            self.convert_to_wav(resb.content, data_item['filename'])
 
             if self.inst and self.inst.precent < 80:
                 self.inst.precent += 0.1
@@ -8,6 +8,7 @@ from edge_tts.exceptions import NoAudioReceived
 
 from videotrans.configure import config
 from videotrans.tts._base import BaseTTS
+from videotrans.util import tools
 
 # --- 常量定义 ---
 # 最大并发数，可以根据需要调整，或者放入配置文件
@@ -67,8 +68,15 @@ class EdgeTTS(BaseTTS):
                         proxy=self.proxies,
                         pitch=self.pitch
                     )
-                    await communicate.save(item['filename'] + ".mp3")
-                    self.convert_to_wav(item['filename'] + ".mp3", item['filename'])
+                    # 网络接收留在事件循环中，音频块直接收集在内存，不再写中间 mp3 文件
+                    audio_data = bytearray()
+                    async for chunk in communicate.stream():
+                        if chunk["type"] == "audio":
+                            audio_data.extend(chunk["data"])
+                    if not audio_data:
+                        raise NoAudioReceived('No audio was received')
+                    # 解码转换在解码线程池中执行，不阻塞事件循环中其他正在进行的配音请求
+                    await asyncio.wrap_future(tools.submit_decode(bytes(audio_data), item['filename']))
 
                     # 成功后，更新进度并立即返回
                     if self.inst:
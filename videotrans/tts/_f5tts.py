@@ -69,7 +69,7 @@ class F5TTS(BaseTTS):
         if data['ref_text'] and len(data['ref_text']) < 10:
             speed = 0.5
         try:
-            client = Client(self.api_url, httpx_kwargs={"timeout": 7200}, ssl_verify=False)
+            client = tools.get_gradio_client(self.api_url, ssl_verify=False, timeout=7200)
         except Exception as e:
             raise StopRetry( f'{e}')
         try:
@@ -122,7 +122,7 @@ class F5TTS(BaseTTS):
         if not Path(data['ref_wav']).exists():
             raise StopRetry( f'{role} 角色不存在')
         try:
-            client = Client(self.api_url, httpx_kwargs={"timeout": 7200}, ssl_verify=False)
+            client = tools.get_gradio_client(self.api_url, ssl_verify=False, timeout=7200)
         except Exception as e:
             raise StopRetry( f'{e}')
         try:
@@ -173,7 +173,7 @@ class F5TTS(BaseTTS):
             raise StopRetry(  f'{role} 角色不存在')
         config.logger.info(f'index-tts {data=}')
         try:
-            client = Client(self.api_url, httpx_kwargs={"timeout": 7200}, ssl_verify=False)
+            client = tools.get_gradio_client(self.api_url, ssl_verify=False, timeout=7200)
         except Exception as e:
             raise StopRetry(str(e))
         
@@ -438,7 +438,7 @@ class F5TTS(BaseTTS):
             raise StopRetry(f'{role} 角色不存在' if config.defaulelang == 'zh' else f'Role {role} does not exist')
 
         try:
-            client = Client(self.api_url, httpx_kwargs={"timeout": 7200}, ssl_verify=False)
+            client = tools.get_gradio_client(self.api_url, ssl_verify=False, timeout=7200)
         except Exception as e:
             raise StopRetry(str(e))
 
@@ -507,7 +507,7 @@ class F5TTS(BaseTTS):
             self.error = f'{role} 角色不存在'
             raise StopRetry(self.error)
         try:
-            client = Client(self.api_url, httpx_kwargs={"timeout": 7200, "proxy": None}, ssl_verify=False)
+            client = tools.get_gradio_client(self.api_url, ssl_verify=False, timeout=7200, proxy=None)
         except Exception as e:
             raise StopRetry(str(e))
         try:
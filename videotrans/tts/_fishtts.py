@@ -1,11 +1,9 @@
 import os
 import logging
 import os
-import time
 from dataclasses import dataclass
 from typing import List, Dict, Union
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -53,18 +51,12 @@ class FishTTS(BaseTTS):
                 raise StopRetry(f'参考音频不存在:{audio_path}\n请确保该音频存在')
 
             config.logger.info(f'fishTTS-post:{data=},{self.proxies=}')
-            response = requests.post(f"{self.api_url}", json=data, proxies=self.proxies, timeout=3600)
+            response = tools.get_session(self.api_url).post(f"{self.api_url}", json=data, proxies=self.proxies, timeout=3600)
 
             response.raise_for_status()
 
             # 如果是WAV音频流，获取原始音频数据
-            with open(data_item['filename'] + ".wav", 'wb') as f:
-                f.write(response.content)
-            time.sleep(1)
-            if not os.path.exists(data_item['filename'] + ".wav"):
-                time.sleep(RETRY_DELAY)
-                raise RuntimeError(f'FishTTS合成声音失败-2')
-            self.convert_to_wav(data_item['filename'] + ".wav", data_item['filename'])
+            self.convert_to_wav(response.content, data_item['filename'])
 
             if self.inst and self.inst.precent < 80:
                 self.inst.precent += 0.1
@@ -1,13 +1,10 @@
-import os
 import logging
-import os
 import sys
 import time
 from dataclasses import dataclass, field
 from typing import List, Dict
 from typing import Union, Set
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -87,7 +84,7 @@ class GPTSoVITS(BaseTTS):
 
             config.logger.info(f'GPT-SoVITS get:{data=}\n{self.api_url=}')
             # 克隆声音
-            response = requests.get(f"{self.api_url}", params=data, proxies={"http": "", "https": ""}, timeout=3600)
+            response = tools.get_session(self.api_url).get(f"{self.api_url}", params=data, proxies={"http": "", "https": ""}, timeout=3600)
 
             content_type = response.headers.get('Content-Type')
             if 'application/json' in content_type:
@@ -103,13 +100,7 @@ class GPTSoVITS(BaseTTS):
 
             if 'audio/wav' in content_type or 'audio/x-wav' in content_type:
                 # 如果是WAV音频流，获取原始音频数据
-                with open(data_item['filename'] + ".wav", 'wb') as f:
-                    f.write(response.content)
-                time.sleep(1)
-                if not os.path.exists(data_item['filename'] + ".wav"):
-                    time.sleep(RETRY_DELAY)
-                    raise RuntimeError(f'GPT-SoVITS合成声音失败-2')
-                self.convert_to_wav(data_item['filename'] + ".wav", data_item['filename'])
+                self.convert_to_wav(response.content, data_item['filename'])
 
             if self.inst and self.inst.precent < 80:
                 self.inst.precent += 0.1
@@ -1,7 +1,6 @@
 import logging
 from dataclasses import dataclass
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -43,7 +42,7 @@ class KokoroTTS(BaseTTS):
                 return
 
             data = {"input": data_item['text'], "voice": data_item['role'], "speed": speed}
-            res = requests.post(self.api_url, json=data, proxies=self.proxies, timeout=3600)
+            res = tools.get_session(self.api_url).post(self.api_url, json=data, proxies=self.proxies, timeout=3600)
             res.raise_for_status()
             with open(data_item['filename'] + ".mp3", 'wb') as f:
                 f.write(res.content)
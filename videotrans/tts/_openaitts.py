@@ -3,8 +3,6 @@ import logging
 import re
 from dataclasses import dataclass
 
-import httpx
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -48,8 +46,7 @@ class OPENAITTS(BaseTTS):
             if self._exit() or tools.vail_file(data_item['filename']):
                 return
 
-            client = OpenAI(api_key=config.params.get('openaitts_key', ''), base_url=self.api_url,
-                            http_client=httpx.Client(proxy=self.proxies, timeout=7200))
+            client = tools.get_openai_client(config.params.get('openaitts_key', ''), self.api_url, proxy=self.proxies)
             with client.audio.speech.with_streaming_response.create(
                     model=config.params['openaitts_model'],
                     voice=role,
@@ -3,7 +3,6 @@ import time
 from dataclasses import dataclass
 
 import dashscope
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -57,11 +56,9 @@ class QWENTTS(BaseTTS):
                 time.sleep(RETRY_DELAY)
                 raise RuntimeError( f"{response.message if hasattr(response, 'message') else str(response)}")
 
-            resurl = requests.get(response.output.audio["url"])
+            resurl = tools.get_session(response.output.audio["url"]).get(response.output.audio["url"])
             resurl.raise_for_status()  # 检查请求是否成功
-            with open(data_item['filename'] + '.wav', 'wb') as f:
-                f.write(resurl.content)
-            self.convert_to_wav(data_item['filename'] + ".wav", data_item['filename'])
+            self.convert_to_wav(resurl.content, data_item['filename'])
 
             if self.inst and self.inst.precent < 80:
                 self.inst.precent += 0.1
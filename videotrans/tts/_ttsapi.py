@@ -69,24 +69,23 @@ class TTSAPI(BaseTTS):
             if 'data' not in res or not res['data']:
                 time.sleep(RETRY_DELAY)
                 raise RuntimeError( '未返回有效音频地址' if config.defaulelang == 'zh' else 'No valid audio address returned')
-            # 返回的是音频url地址
-            tmp_filename = data_item['filename'] + ".mp3"
+            # 返回的是音频url地址，音频数据保留在内存中直接解码
             if isinstance(res['data'], str) and res['data'].startswith('http'):
                 url = res['data']
-                res = requests.get(url)
+                res = tools.get_session(url).get(url)
                 res.raise_for_status()
-                with open(tmp_filename, 'wb') as f:
-                    f.write(res.content)
+                audio_data = res.content
             elif isinstance(res['data'], str) and res['data'].startswith('data:audio'):
                 # 返回 base64数据
-                self._base64_to_audio(res['data'], tmp_filename)
+                self._base64_to_audio(res['data'], data_item['filename'])
+                audio_data = None
             elif isinstance(res['data'], dict) and 'audio' in res['data']:
-                with open(tmp_filename, 'wb') as f:
-                    f.write(bytes.fromhex(res['data']['audio']))
+                audio_data = bytes.fromhex(res['data']['audio'])
             else:
                 time.sleep(RETRY_DELAY)
                 raise RuntimeError('未返回有效音频地址或音频base64数据' if config.defaulelang == 'zh' else 'No valid audio address or base64 audio data returned' )
-            self.convert_to_wav(tmp_filename, data_item['filename'])
+            if audio_data is not None:
+                self.convert_to_wav(audio_data, data_item['filename'])
 
             if self.inst and self.inst.precent < 80:
                 self.inst.precent += 0.1
@@ -112,7 +111,7 @@ class TTSAPI(BaseTTS):
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
         }
         config.logger.info(f'发送数据 {data=}')
-        resraw = requests.post(f"{self.api_url}", data=data, verify=False, headers=headers, proxies=None)
+        resraw = tools.get_session(self.api_url).post(f"{self.api_url}", data=data, verify=False, headers=headers, proxies=None)
         resraw.raise_for_status()
         return resraw.json()
 
@@ -6,7 +6,6 @@ import time
 from dataclasses import dataclass, field
 from typing import Dict, Optional, ClassVar
 
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_not_exception_type, before_log, after_log, \
     RetryError
 
@@ -113,7 +112,7 @@ class VolcEngineTTS(BaseTTS):
 
                 }
             }
-            resp = requests.post(api_url, json.dumps(request_json), headers=header,
+            resp = tools.get_session(api_url).post(api_url, json.dumps(request_json), headers=header,
                                  proxies={"http": "", "https": ""},verify=False)
             resp.raise_for_status()
             resp_json = resp.json()
@@ -103,10 +103,23 @@ class Ui_setini(object):
                 "lang": "设置软件界面语言，修改后需要重启软件",
                 "countdown_sec": "当单个视频翻译时，暂停时倒计时秒数",
                 "bgm_split_time": "设置分离背景音时切割片段，防止视频过长卡死，默认300s",
+                "separate_batch": "分离背景音时每次推理的窗口数，越大速度越快但占用内存/显存越多，1=逐窗口推理(默认)，0=根据可用内存自动决定",
                 "homedir": "家目录，用于保存视频分离、字幕配音、字幕翻译等结果的位置，默认用户家目录",
                 "llm_chunk_size": "LLM大模型重新断句时，每次发送多少个字或单词，该值越大断句效果越好，一次性发送全部字幕最佳，但受限于大模型输出token，过长输入可能导致失败",
                 "llm_ai_type": "LLM重新断句时使用的AI渠道，目前支持openai或deepseek渠道",
-                "gemini_recogn_chunk": "使用gemini识别语音时，每次发送音频切片数，越大效果越好，但失败率会升高"
+                "gemini_recogn_chunk": "使用gemini识别语音时，每次发送音频切片数，越大效果越好，但失败率会升高",
+                "recogn_concurrent": "Gemini/OpenAI/Google等在线语音识别时，每个API Key同时发送的请求数，大于1时多个音频片段并发识别，结果仍按顺序合并，Gemini填写多个key(英文逗号分隔)时可成倍提高速度",
+                "recogn_rpm": "在线语音识别时每个API Key每分钟最多发送的请求数，用于避免触发接口频率限制，0=不限制",
+                "sensevoice_batch_s": "FunASR SenseVoiceSmall 识别时，每批送入模型的语音片段总秒数，越大速度越快但占用内存/显存越多",
+                "whisper_batch_size": "faster-whisper 均等分割模式下，大于1时多个片段作为一批同时推理(BatchedInferencePipeline)，CPU上速度明显提高，要求均等分割秒数不超过30，0=不批量",
+                "prepare_workers": "同时执行预处理的任务数，需重启软件生效",
+                "recogn_workers": "同时执行语音识别的任务数，使用GPU本地模型时建议为1，需重启软件生效",
+                "trans_workers": "同时执行字幕翻译的任务数，需重启软件生效",
+                "dubb_workers": "同时执行配音的任务数，需重启软件生效",
+                "align_workers": "同时执行声画对齐的任务数，需重启软件生效",
+                "assemb_workers": "同时执行合成输出的任务数，需重启软件生效",
+                "api_threads": "api.py 服务的工作线程数，每个 /task_events 进度推送连接在断开前一直占用一个线程，需重启api生效",
+                "api_max_streams": "api.py 同时保持的 /task_events 进度推送连接数上限，超出时返回503，至少为其他请求保留2个线程，需重启api生效"
             },
 
             "video": {
@@ -136,6 +149,11 @@ class Ui_setini(object):
             "trans": {
                 "trans_thread": "传统翻译每次发送字幕行数",
                 "aitrans_thread": "AI翻译每次发送字幕行数",
+                "trans_concurrent": "传统翻译同时发送的请求数，大于1时多批字幕并发翻译，结果仍按顺序合并，免费接口建议保持1以免被限流",
+                "aitrans_concurrent": "AI翻译同时发送的请求数，大于1时多批字幕并发翻译，结果仍按顺序合并，请根据接口的频率限制设置",
+                "http_pool_size": "翻译和配音接口每个主机复用的最大连接数，多个字幕和任务之间共用连接，无需每次重新建立，空闲10分钟后释放",
+                "trans_memory": "翻译记忆库：相同语言、渠道、模型、提示词和术语表下已翻译过的字幕行直接使用保存的译文，不再发送",
+                "trans_memory_max": "翻译记忆库最多保存的字幕行数，相同语言、渠道和模型下已翻译过的行不再发送，超出后删除最久未使用的，0=不限制",
                 "retries": "翻译出错时的重试次数",
                 "translation_wait": "每次翻译后暂停时间/秒,用于限制请求频率",
                 "google_trans_newadd": "批量字幕翻译功能当选择Google渠道时，可在此填写新的目标语言代码，请填写ISO-639 代码,多个以英文逗号分隔，语言代码在此查看  https://cloud.google.com/translate/docs/languages",
@@ -145,12 +163,15 @@ class Ui_setini(object):
             "dubbing": {
                 "dubbing_thread": "同时配音的字幕条数",
                 "dubbing_wait": "每次配音后暂停时间/秒,用于限制请求频率",
+                "dubbing_cache_size": "配音结果缓存的最大占用空间/MB，相同文字、角色、语速音量音调和渠道的字幕直接复用已有配音，超出后删除最久未使用的，0=不使用缓存",
                 "save_segment_audio": "保留每条字幕的配音文件",
                 "azure_lines": "azureTTS一次配音行数",
                 "chattts_voice": "chatTTS 音色值"
             },
             "justify": {
                 "remove_silence": "是否移除配音末尾空白",
+                "video_cut_thread": "视频慢速对齐时同时裁切的视频片段数，0=自动根据CPU核数决定，CPU核数较多时可调大",
+                "video_rate_engine": "视频慢速处理方式，concat=逐个裁切片段再拼接，filter=生成滤镜图一次性完成重定时，只编码一次，速度更快",
             },
             "whisper": {
                 "vad": "是否在faster-whisper字幕整体识别模式时启用VAD",
@@ -165,6 +186,7 @@ class Ui_setini(object):
                 "interval_split": "均等分割模式下每个片段时长秒数",
                 "model_list": "faster模式和openai模式下的模型名字列表，英文逗号分隔",
                 "cuda_com_type": "faster模式时cuda数据类型，int8=消耗资源少，速度快，精度低，float32=消耗资源多，速度慢，精度高，int8_float16=设备自选",
+                "whisper_model_ttl": "faster-whisper模型识别结束后保留在内存中的秒数，期间再次识别无需重新加载模型，0=识别后立即释放",
                 "beam_size": "字幕识别时精度调整，1-5，1=消耗显存最低，5=消耗显存最多",
                 "best_of": "字幕识别时精度调整，1-5，1=消耗显存最低，5=消耗显存最多",
                 "condition_on_previous_text": "若开启将占用更多GPU，效果也更好",
@@ -209,6 +231,18 @@ class Ui_setini(object):
             "llm_ai_type": "LLM重新断句时使用的AI渠道",
             "prompt_init":"Whisper模型提示词",
             "gemini_recogn_chunk": "Gemini语音识别时，单次发送音频切片数",
+            "recogn_concurrent": "在线识别每Key并发请求数",
+            "recogn_rpm": "在线识别每Key每分钟请求数",
+            "sensevoice_batch_s": "SenseVoice每批音频秒数",
+            "whisper_batch_size": "均等分割批量推理片段数",
+            "prepare_workers": "预处理并发任务数",
+            "recogn_workers": "语音识别并发任务数",
+            "trans_workers": "字幕翻译并发任务数",
+            "dubb_workers": "配音并发任务数",
+            "align_workers": "声画对齐并发任务数",
+            "assemb_workers": "合成输出并发任务数",
+            "api_threads": "API服务线程数",
+            "api_max_streams": "API进度推送连接上限",
             "ai302_models": "302.ai翻译模型列表",
             "llm_chunk_size": "LLM重新断句每批次发送字或单词数",
             "ai302tts_models": "302.aiTTS模型列表",
@@ -228,7 +262,10 @@ class Ui_setini(object):
             "zijiehuoshan_model": "字节火山推理接入点",
             "model_list": "faster和openai的模型列表",
             "remove_silence": "移除配音末尾空白",
+            "video_cut_thread": "视频片段并行裁切数",
+            "video_rate_engine": "视频慢速处理方式",
             "bgm_split_time": "背景音分离切割片段/s",
+            "separate_batch": "背景音分离批量窗口数",
             "vad": "启用VAD",
 
             "threshold": "语音阈值",
@@ -242,12 +279,19 @@ class Ui_setini(object):
             "interval_split": "均等分割时片段时长/s",
             "trans_thread": "传统翻译每次发送字幕行数",
             "aitrans_thread": "AI翻译每次发送字幕行数",
+            "trans_concurrent": "传统翻译并发请求数",
+            "aitrans_concurrent": "AI翻译并发请求数",
+            "http_pool_size": "每主机最大复用连接数",
+            "trans_memory": "使用翻译记忆库",
+            "trans_memory_max": "翻译记忆库最大行数",
             "retries": "翻译出错重试数",
             "dubbing_thread": "同时配音字幕数",
+            "dubbing_cache_size": "配音缓存上限/MB",
             "countdown_sec": "暂停倒计时/s",
             "backaudio_volume": "背景音量倍数",
             "loop_backaudio": "循环播放背景音",
             "cuda_com_type": "CUDA数据类型",
+            "whisper_model_ttl": "模型空闲释放时间/s",
             "beam_size": "字幕识别准确度控制beam_size",
             "best_of": "字幕识别准确度控制best_of",
             "condition_on_previous_text": "上下文感知",
@@ -323,10 +367,23 @@ class Ui_setini(object):
                     "lang": "Set the software interface language, a restart is required after modification",
                     "countdown_sec": "Countdown seconds when pausing during single video translation",
                     "bgm_split_time": "Set the segment length for splitting background audio to prevent freezing on long videos, default is 300s",
+                    "separate_batch": "Number of windows per inference when separating background audio. Larger is faster but uses more memory, 1 = one window at a time (default), 0 = decide automatically from available memory",
                     "homedir": "Home directory, used to save the results of video separation, subtitle dubbing, subtitle translation, etc. Default user home directory",
                     "llm_chunk_size": "When the LLM large model re-segmentation, how many words to send each time to prevent the subtitles from being too long and exceeding the LLM output limit",
                     "llm_ai_type": "The AI channel used when LLM re-segmentation, currently supports openai or deepseek channels",
-                    "gemini_recogn_chunk": "When using Gemini to recognize speech, the larger the number of audio slices sent each time, the better the effect, but the failure rate will increase"
+                    "gemini_recogn_chunk": "When using Gemini to recognize speech, the larger the number of audio slices sent each time, the better the effect, but the failure rate will increase",
+                    "recogn_concurrent": "Number of requests sent at the same time per API key by online speech recognition such as Gemini/OpenAI/Google. Above 1, audio chunks are recognized concurrently and still merged in order. With several comma-separated Gemini keys the speed multiplies",
+                    "recogn_rpm": "Maximum requests per minute per API key for online speech recognition, to stay below the rate limit of the API, 0 = unlimited",
+                    "sensevoice_batch_s": "Total seconds of speech fed to FunASR SenseVoiceSmall per batch. Larger is faster but uses more memory/VRAM",
+                    "whisper_batch_size": "In faster-whisper equal-division mode, above 1 several chunks are inferred together as one batch (BatchedInferencePipeline), much faster on CPU. Requires chunks of at most 30s, 0 = no batching",
+                    "prepare_workers": "Number of tasks preprocessed at the same time, takes effect after restart",
+                    "recogn_workers": "Number of tasks running speech recognition at the same time, 1 is recommended for local GPU models, takes effect after restart",
+                    "trans_workers": "Number of tasks translating subtitles at the same time, takes effect after restart",
+                    "dubb_workers": "Number of tasks dubbing at the same time, takes effect after restart",
+                    "align_workers": "Number of tasks aligning audio and video at the same time, takes effect after restart",
+                    "assemb_workers": "Number of tasks assembling output at the same time, takes effect after restart",
+                    "api_threads": "Number of worker threads of the api.py server. Each /task_events progress stream holds one thread until it disconnects, takes effect after restarting the api",
+                    "api_max_streams": "Maximum number of simultaneous /task_events progress streams in api.py, more return 503. At least 2 threads stay free for other requests, takes effect after restarting the api"
                 },
                 "video": {
                     "crf": "Loss control during video transcoding, 0 = minimum loss, 51 = maximum loss, default is 13",
@@ -362,6 +419,11 @@ class Ui_setini(object):
                 "trans": {
                     "trans_thread": "Number of subtitles translated simultaneously",
                     "aitrans_thread": "Number of subtitles AI translated simultaneously",
+                    "trans_concurrent": "Number of requests sent at the same time by traditional translation. Above 1, batches are translated concurrently and still merged in order. Keep 1 for free APIs to avoid rate limits",
+                    "aitrans_concurrent": "Number of requests sent at the same time by AI translation. Above 1, batches are translated concurrently and still merged in order. Set it according to the rate limit of the API",
+                    "http_pool_size": "Maximum reused connections per host for translation and dubbing APIs. Connections are shared across subtitles and tasks instead of being reopened each time, and released after 10 minutes idle",
+                    "trans_memory": "Translation memory: lines already translated with the same languages, channel, model, prompt and glossary reuse the saved translation and are not sent again",
+                    "trans_memory_max": "Maximum number of subtitle lines kept in the translation memory. Lines already translated with the same languages, channel and model are not sent again. The least recently used lines are removed when full, 0 = unlimited",
                     "retries": "Number of retries when translation fails",
                     "translation_wait": "Pause time in seconds after each translation, used to limit request frequency",
                     "google_trans_newadd": "Batch Subtitle Translation Function When selecting Google channel, you can fill in the new target language code here, please fill in the ISO-639 code, the language code can be viewed here.  https://cloud.google.com/translate/docs/languages",
@@ -370,12 +432,15 @@ class Ui_setini(object):
                 "dubbing": {
                     "dubbing_thread": "Number of subtitles dubbed simultaneously",
                     "dubbing_wait": "Pause time in seconds after each dubbing, used to limit request frequency",
+                    "dubbing_cache_size": "Maximum size in MB of the dubbing result cache. Lines with the same text, voice, rate/volume/pitch and channel reuse existing audio. The least recently used entries are removed when full, 0 = no cache",
                     "save_segment_audio": "Save the dubbing file of each subtitle",
                     "azure_lines": "Number of lines dubbed at once by azureTTS",
                     "chattts_voice": "chatTTS voice tone"
                 },
                 "justify": {
                     "remove_silence": "Whether to remove silence at the end of the dubbing",
+                    "video_cut_thread": "Number of video clips cut simultaneously during video slow-down alignment, 0 = decide automatically from the CPU core count",
+                    "video_rate_engine": "How video slow-down is processed. concat = cut each clip and then join them, filter = retime the whole video with one filter graph, encoding only once, which is faster",
                 },
                 "whisper": {
                     "vad": "Enable VAD in faster-whisper overall subtitle recognition mode",
@@ -390,6 +455,7 @@ class Ui_setini(object):
 
                     "model_list": "Model names list for faster mode and openai mode, separated by commas",
                     "cuda_com_type": "Data type for cuda in faster mode, int8 = less resource usage, faster speed, lower precision, float32 = more resource usage, slower speed, higher precision, int8_float16 = device auto-select",
+                    "whisper_model_ttl": "Seconds a faster-whisper model stays in memory after recognition, so the next recognition does not need to reload it. 0 = release right after recognition",
                     "beam_size": "Precision adjustment during subtitle recognition, 1-5, 1 = lowest memory usage, 5 = highest memory usage",
                     "best_of": "Precision adjustment during subtitle recognition, 1-5, 1 = lowest memory usage, 5 = highest memory usage",
                     "condition_on_previous_text": "true = more GPU usage and better performance, false = less GPU usage but slightly worse performance",
@@ -446,6 +512,18 @@ class Ui_setini(object):
                 "llm_ai_type": "The AI channel used when LLM re-segmentation",
                 "prompt_init":"Whisper model prompt initial",
                 "gemini_recogn_chunk": "Gemini to recognize speech,number of audio slices sent",
+                "recogn_concurrent": "Concurrent Recognition Requests per Key",
+                "recogn_rpm": "Recognition Requests per Minute per Key",
+                "sensevoice_batch_s": "SenseVoice Seconds per Batch",
+                "whisper_batch_size": "Equal-Division Batch Size",
+                "prepare_workers": "Concurrent Preprocessing Tasks",
+                "recogn_workers": "Concurrent Recognition Tasks",
+                "trans_workers": "Concurrent Translation Tasks",
+                "dubb_workers": "Concurrent Dubbing Tasks",
+                "align_workers": "Concurrent Alignment Tasks",
+                "assemb_workers": "Concurrent Assembly Tasks",
+                "api_threads": "API Server Threads",
+                "api_max_streams": "API Max Progress Streams",
                 "homedir": "Set Home directory",
                 "llm_chunk_size": "LLM re-segmentation sends each batch of words",
                 "ai302_models": "302.ai Translation Models",
@@ -466,7 +544,10 @@ class Ui_setini(object):
                 "zijiehuoshan_model": "Byte Volcano Inference Access Point",
                 "model_list": "Models for Faster and OpenAI",
                 "remove_silence": "Remove End Silence in Dubbing",
+                "video_cut_thread": "Parallel Video Clip Cutting",
+                "video_rate_engine": "Video Slow-down Engine",
                 "bgm_split_time": "bgm segment time/s",
+                "separate_batch": "Separation Batch Windows",
 
                 "max_speech_duration_s": "max speech duration sec.",
                 "threshold": "Threshold for determining whether a voice",
@@ -480,12 +561,19 @@ class Ui_setini(object):
                 "interval_split": "Segment Duration in Equal Division",
                 "trans_thread": "Number of Subtitles Translated Simultaneously",
                 "aitrans_thread": "Number of Subtitles AI Translated Simultaneously",
+                "trans_concurrent": "Concurrent Translation Requests",
+                "aitrans_concurrent": "Concurrent AI Translation Requests",
+                "http_pool_size": "Max Reused Connections per Host",
+                "trans_memory": "Use Translation Memory",
+                "trans_memory_max": "Translation Memory Max Lines",
                 "retries": "Number of Retries on Translation Failure",
                 "dubbing_thread": "Number of Subtitles Dubbed Simultaneously",
+                "dubbing_cache_size": "Dubbing Cache Limit/MB",
                 "countdown_sec": "Countdown Seconds on Pause",
                 "backaudio_volume": "Background Volume Multiplier",
                 "loop_backaudio": "Loop Background Audio",
                 "cuda_com_type": "CUDA Data Type",
+                "whisper_model_ttl": "Model Idle Release Time/s",
                 "beam_size": "Subtitle Recognition Accuracy Control 1",
                 "best_of": "Subtitle Recognition Accuracy Control 2",
                 "condition_on_previous_text": "Context Awareness",
@@ -610,6 +698,17 @@ class Ui_setini(object):
                     tmp.addStretch(1)
                     box.layout().addLayout(tmp)
                     continue
+                if key == 'video_rate_engine':
+                    engines = ['concat', 'filter']
+                    tmp1 = QtWidgets.QComboBox()
+                    tmp1.addItems(engines)
+                    tmp1.setObjectName(key)
+                    if val in engines:
+                        tmp1.setCurrentText(val)
+                    tmp.addWidget(tmp1)
+                    tmp.addStretch(1)
+                    box.layout().addLayout(tmp)
+                    continue
                 if key == 'preset':
                     presets = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'veryslow']
                     tmp1 = QtWidgets.QComboBox()
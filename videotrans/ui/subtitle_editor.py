@@ -83,37 +83,32 @@ class SignThread(QThread):
     def __init__(self, uuid=None, parent=None):
         super().__init__(parent=parent)
         self.uuid = uuid
+        # 创建时即订阅，需在任务加入队列前创建，以免遗漏消息
+        self.subscription = config.progress_bus.subscribe([uuid])
 
     def post(self, jsondata):
         self.uito.emit(json.dumps(jsondata))
 
     def run(self):
-        while 1:
-            if not self.uuid or config.exit_soft:
-                self.post({"type": "end"})
-                time.sleep(1)
-                return
-
-            if self.uuid in config.stoped_uuid_set:
-                self.uuid = None
-                return
-            q = config.uuid_logs_queue.get(self.uuid)
-            if not q:
-                return
-            try:
-                if q.empty():
-                    time.sleep(0.5)
-                    continue
-                data = q.get(block=False)
-                if not data:
-                    continue
-                self.post(data)
-                if data['type'] in ['error', 'succeed']:
+        try:
+            while 1:
+                if not self.uuid or config.exit_soft:
+                    self.post({"type": "end"})
+                    time.sleep(1)
+                    return
+
+                if self.uuid in config.stoped_uuid_set:
                     self.uuid = None
-                    config.stoped_uuid_set.add(self.uuid)
-                    del config.uuid_logs_queue[self.uuid]
-            except:
-                pass
+                    return
+                for event in self.subscription.get(timeout=0.5):
+                    data = event.to_dict()
+                    self.post(data)
+                    if data['type'] in ['error', 'succeed']:
+                        config.stoped_uuid_set.add(self.uuid)
+                        self.uuid = None
+                        break
+        finally:
+            self.subscription.close()
 
 
 class Ui_subtitleEditor(QWidget):
@@ -344,6 +339,8 @@ class Ui_subtitleEditor(QWidget):
         source_code = translator.get_code(show_text=self.fanyi_source.currentText())
         target_code = translator.get_code(show_text=target_language)
         config.box_trans = 'ing'
+        th = SignThread(uuid=it['uuid'], parent=self)
+        th.uito.connect(self.feed)
         trk = TranslateSrt({
             "out_format": 0,
             "translate_type": self.translate_type.currentIndex(),
@@ -355,8 +352,6 @@ class Ui_subtitleEditor(QWidget):
             "source_code": source_code,
             "target_code": target_code
         }, it)
-        th = SignThread(uuid=it['uuid'], parent=self)
-        th.uito.connect(self.feed)
         th.start()
         config.trans_queue.append(trk)
         self.fanyi_button.setDisabled(True)
@@ -0,0 +1,164 @@
+import io
+import os
+import threading
+from pathlib import Path
+
+# 配音流程统一使用的中间音频格式：各配音渠道的输出在此转换一次，
+# 之后对齐、拼接等环节都直接按此格式读取，不再重复重采样
+DUBBING_SAMPLE_RATE = 44100
+DUBBING_CHANNELS = 2
+
+# 进程内解码/重采样的线程池，限制同时占用的 CPU 数，配音请求线程数可能远多于 CPU 核数
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+
+def _get_decode_pool():
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _decode_pool = ThreadPoolExecutor(max_workers=max(2, min(8, os.cpu_count() or 2)),
+                                              thread_name_prefix='audio_decode')
+        return _decode_pool
+
+
+def _resample(data, sr_in, sr_out):
+    """data: (帧数, 声道) float32，优先使用 scipy 多相滤波重采样，不可用时线性插值"""
+    import numpy as np
+    if sr_in == sr_out or len(data) == 0:
+        return data
+    try:
+        from math import gcd
+        from scipy.signal import resample_poly
+        g = gcd(int(sr_in), int(sr_out))
+        return resample_poly(data, sr_out // g, sr_in // g, axis=0).astype(np.float32)
+    except ImportError:
+        pass
+    frames = int(round(len(data) * sr_out / sr_in))
+    x_old = np.arange(len(data), dtype=np.float64) / sr_in
+    x_new = np.arange(frames, dtype=np.float64) / sr_out
+    return np.stack([np.interp(x_new, x_old, data[:, c]) for c in range(data.shape[1])], axis=1).astype(np.float32)
+
+
+def _to_channels(data, channels):
+    import numpy as np
+    if data.shape[1] == channels:
+        return data
+    if channels == 1:
+        return data.mean(axis=1, keepdims=True)
+    if data.shape[1] == 1:
+        return np.repeat(data, channels, axis=1)
+    return data[:, :channels]
+
+
+def _decode(src):
+    # src 为文件路径或 bytes，返回 (float32 数组(帧数, 声道), 采样率)，libsndfile 不支持的格式会抛出异常
+    import soundfile as sf
+    if isinstance(src, (bytes, bytearray)):
+        src = io.BytesIO(src)
+    data, sr = sf.read(src, dtype='float32', always_2d=True)
+    return data, sr
+
+
+def _write_canonical(data, sr, output_wav_file_path, sample_rate, channels):
+    import numpy as np
+    import soundfile as sf
+    # 重采样可能产生略超出 [-1,1] 的值，转为 16 位前先截断，避免溢出成爆音
+    data = np.clip(_to_channels(_resample(data, sr, sample_rate), channels), -1.0, 1.0)
+    # 先写临时文件再改名，输入输出为同一文件时也不会损坏
+    tmp = f'{output_wav_file_path}.{threading.get_ident()}.tmp.wav'
+    sf.write(tmp, data, sample_rate, subtype='PCM_16', format='WAV')
+    os.replace(tmp, output_wav_file_path)
+
+
+def _ffmpeg_to_wav(input_file, output_wav_file_path, sample_rate, channels):
+    from . import help_ffmpeg
+    return help_ffmpeg.runffmpeg([
+        "-y", "-i", input_file,
+        "-ar", str(sample_rate), "-ac", str(channels), "-c:a", "pcm_s16le",
+        output_wav_file_path
+    ], force_cpu=True)
+
+
+def _convert(src, output_wav_file_path, sample_rate, channels):
+    from videotrans.configure import config
+    try:
+        data, sr = _decode(src)
+    except Exception as e:
+        if isinstance(src, (bytes, bytearray)):
+            # 内存中的数据无法直接交给 ffmpeg，写入临时文件后转换
+            tmp = f'{output_wav_file_path}.{threading.get_ident()}.raw'
+            Path(tmp).write_bytes(src)
+            try:
+                return _ffmpeg_to_wav(tmp, output_wav_file_path, sample_rate, channels)
+            finally:
+                Path(tmp).unlink(missing_ok=True)
+        config.logger.info(f'进程内解码失败，使用ffmpeg转换:{src} {e}')
+        return _ffmpeg_to_wav(src, output_wav_file_path, sample_rate, channels)
+    _write_canonical(data, sr, output_wav_file_path, sample_rate, channels)
+    return True
+
+
+def submit_decode(src, output_wav_file_path, sample_rate=DUBBING_SAMPLE_RATE, channels=DUBBING_CHANNELS):
+    """同 decode_to_wav，但不等待，返回 concurrent.futures.Future，异步代码中可用 asyncio.wrap_future 等待"""
+    return _get_decode_pool().submit(_convert, src, output_wav_file_path, sample_rate, channels)
+
+
+def decode_to_wav(src, output_wav_file_path, sample_rate=DUBBING_SAMPLE_RATE, channels=DUBBING_CHANNELS):
+    """
+    将音频文件或内存中的音频数据转为 pcm_s16le wav，默认为配音统一格式 44100Hz 双声道
+    优先进程内用 soundfile 解码并重采样，wav/flac/ogg/mp3 等都无需启动 ffmpeg，解码失败时回退到 ffmpeg
+    在共享的解码线程池中执行，调用方阻塞等待结果
+    """
+    return submit_decode(src, output_wav_file_path, sample_rate, channels).result()
+
+
+def load_audio_array(src, sample_rate=16000):
+    """
+    将音频文件或内存中的音频数据解码为单声道 float32 numpy 数组，供语音识别/VAD 直接使用
+    soundfile 无法解码时先用 ffmpeg 转为 wav 再读取
+    """
+    from videotrans.configure import config
+    try:
+        data, sr = _decode(src)
+    except Exception as e:
+        if isinstance(src, (bytes, bytearray)):
+            raise
+        config.logger.info(f'进程内解码失败，使用ffmpeg转换:{src} {e}')
+        tmp = f'{config.TEMP_DIR}/{threading.get_ident()}-{Path(src).stem}-{sample_rate}.wav'
+        Path(config.TEMP_DIR).mkdir(parents=True, exist_ok=True)
+        _ffmpeg_to_wav(src, tmp, sample_rate, 1)
+        try:
+            data, sr = _decode(tmp)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+    return _resample(_to_channels(data, 1), sr, sample_rate)[:, 0]
+
+
+def is_dubbing_wav(file):
+    """是否已经是配音统一格式的 wav，是则无需再次转换"""
+    try:
+        import soundfile as sf
+        info = sf.info(file)
+    except Exception:
+        return False
+    return (info.format == 'WAV' and info.subtype == 'PCM_16' and info.samplerate == DUBBING_SAMPLE_RATE
+            and info.channels == DUBBING_CHANNELS)
+
+
+def read_dubbing_wav(file):
+    """读取统一格式 wav 为 int16 数组(帧数, 声道)，格式不符时返回 None"""
+    if not is_dubbing_wav(file):
+        return None
+    import soundfile as sf
+    data, _ = sf.read(file, dtype='int16', always_2d=True)
+    return data
+
+
+def get_dubbing_wav_ms(file):
+    """统一格式 wav 直接读取文件头得到时长/毫秒，无需 ffprobe，格式不符时返回 None"""
+    if not is_dubbing_wav(file):
+        return None
+    import soundfile as sf
+    return int(sf.info(file).frames * 1000 / DUBBING_SAMPLE_RATE)
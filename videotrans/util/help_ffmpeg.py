@@ -7,7 +7,10 @@ import re
 import shutil
 import subprocess
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
@@ -188,8 +191,9 @@ def _build_hw_command(args: list, hw_codec: str):
         ('.mp4', '.mkv', '.mov', '.ts', '.txt'))
 
     # 无字幕嵌入时可尝试硬件解码
-    # 有字幕或 -vf 滤镜时不使用，容易出错且需要上传下载数据
-    if "-c:s" not in new_args and "-vf" not in new_args and is_input_media and is_output_mp4 and config.settings.get(
+    # 有字幕或 -vf/-filter_complex 滤镜时不使用，容易出错且需要上传下载数据
+    has_filter = any(it in new_args for it in ["-vf", "-filter_complex", "-filter_complex_script"])
+    if "-c:s" not in new_args and not has_filter and is_input_media and is_output_mp4 and config.settings.get(
             'cuda_decode', False):
         if encoder_family == 'nvenc':
             hw_decode_opts = ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda']
@@ -517,6 +521,85 @@ def runffprobe(cmd):
         raise
 
 
+# ffprobe 结果缓存，进程内共享。以路径为键，值为 (文件尺寸, 修改时间, 探测结果)，文件变化后自动失效
+_PROBE_CACHE_MAX = 512
+_probe_cache = OrderedDict()
+_probe_lock = threading.Lock()
+_probe_stats = {"hits": 0, "misses": 0}
+
+
+def _probe_signature(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def probe_media_info(file_path):
+    """
+    获取 ffprobe -show_format -show_streams 的解析结果（dict），带 LRU 缓存。
+    文件尺寸或修改时间变化后缓存自动失效，同一文件在任务中多次探测时只启动一次 ffprobe 进程。
+    """
+    key = Path(file_path).resolve().as_posix()
+    signature = _probe_signature(key)
+    with _probe_lock:
+        cached = _probe_cache.get(key)
+        if cached and cached[0] == signature:
+            _probe_cache.move_to_end(key)
+            _probe_stats['hits'] += 1
+            return copy.deepcopy(cached[1])
+        _probe_stats['misses'] += 1
+
+    out_json = runffprobe(['-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', key])
+    if not out_json:
+        raise Exception('ffprobe error: dont get media information')
+    try:
+        out = json.loads(out_json)
+    except json.JSONDecodeError as e:
+        raise Exception('ffprobe error: failed to parse JSON output') from e
+
+    with _probe_lock:
+        _probe_cache[key] = (signature, out)
+        _probe_cache.move_to_end(key)
+        while len(_probe_cache) > _PROBE_CACHE_MAX:
+            _probe_cache.popitem(last=False)
+    return copy.deepcopy(out)
+
+
+def probe_media_batch(file_list, max_workers=8):
+    """
+    批量探测多个文件，命中缓存的直接返回，未命中的并发启动 ffprobe。
+    返回与 file_list 顺序一致的列表，探测失败的位置为 None。
+    """
+    results = [None] * len(file_list)
+
+    def _probe(index):
+        try:
+            results[index] = probe_media_info(file_list[index])
+        except Exception:
+            results[index] = None
+
+    indexs = [i for i, it in enumerate(file_list) if it and Path(it).is_file()]
+    if len(indexs) <= 1:
+        for i in indexs:
+            _probe(i)
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(indexs)))) as pool:
+        list(pool.map(_probe, indexs))
+    return results
+
+
+def get_probe_cache_stats():
+    """返回 ffprobe 缓存的命中数、未命中数及当前缓存条目数，命中数即节省的 ffprobe 进程数"""
+    with _probe_lock:
+        return {**_probe_stats, "size": len(_probe_cache)}
+
+
+def clear_probe_cache():
+    with _probe_lock:
+        _probe_cache.clear()
+        _probe_stats['hits'] = 0
+        _probe_stats['misses'] = 0
+
+
 def get_video_info(mp4_file, *, video_fps=False, video_scale=False, video_time=False, get_codec=False):
     """
     (兼容性接口) 获取视频信息。
@@ -525,21 +608,11 @@ def get_video_info(mp4_file, *, video_fps=False, video_scale=False, video_time=F
     if not Path(mp4_file).exists():
         raise Exception(f'{mp4_file} is not exists')
     try:
-        out_json = runffprobe(
-            ['-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', mp4_file]
-        )
-        if not out_json:
-            raise Exception('ffprobe error: dont get video information')
+        out = probe_media_info(mp4_file)
     except Exception as e:
         # 确保抛出的异常与旧版本一致
         raise Exception(f'ffprobe error: {e}. {mp4_file=}') from e
 
-    # 解析 JSON 并填充结果字典
-    try:
-        out = json.loads(out_json)
-    except json.JSONDecodeError as e:
-        raise Exception('ffprobe error: failed to parse JSON output') from e
-
     result = {
         "video_fps": 30,
         "video_codec_name": "",
@@ -753,11 +826,8 @@ def send_notification(title, message):
 
 # 获取音频时长
 def get_audio_time(audio_file):
-    # 如果存在缓存并且没有禁用缓存
-    out = runffprobe(['-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', audio_file])
-    if out is False:
-        raise Exception(f'ffprobe error:dont get video information')
-    out = json.loads(out)
+    # 使用进程内 ffprobe 缓存，文件未变化时不再重复探测
+    out = probe_media_info(audio_file)
     return float(out['format']['duration'])
 
 
@@ -0,0 +1,234 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+# 共享 HTTP 客户端注册表
+# 以 (类型, base_url, proxy, auth, ...) 为键复用 requests.Session / httpx.Client / OpenAI / gradio Client，
+# 多条字幕、多个任务之间共用长连接，避免每次请求都重新握手，gradio 也无需每次重新获取 view_api
+# 每个客户端记录正在进行的请求数和最近一次请求结束的时间，没有进行中的请求且空闲超过 _IDLE_SECONDS 的
+# 客户端从注册表移除并关闭，释放其连接池；请求可能长达 timeout(7200s)，进行中的客户端不会被关闭
+# 只提供同步客户端：唯一的异步渠道 edge-tts 由 edge_tts 库自行为每条字幕建立 websocket 连接，无法复用
+
+_IDLE_SECONDS = 600
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class _Usage:
+    """客户端使用情况，with 期间视为有一个请求正在进行"""
+    __slots__ = ('active', 'last_used')
+
+    def __init__(self):
+        self.active = 0
+        self.last_used = time.time()
+
+    def __enter__(self):
+        with _clients_lock:
+            self.active += 1
+            self.last_used = time.time()
+        return self
+
+    def __exit__(self, *args):
+        with _clients_lock:
+            self.active -= 1
+            self.last_used = time.time()
+
+    def idle(self, now):
+        return self.active <= 0 and now - self.last_used > _IDLE_SECONDS
+
+
+def _pool_size():
+    # 每个主机的最大连接数
+    from videotrans.configure import config
+    try:
+        return max(1, int(config.settings.get('http_pool_size', 10)))
+    except (TypeError, ValueError):
+        return 10
+
+
+def _host(url):
+    if not url:
+        return ''
+    parts = urlsplit(url if '://' in url else f'http://{url}')
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def _close(client):
+    try:
+        if hasattr(client, 'close'):
+            client.close()
+    except Exception:
+        pass
+
+
+def _evict_idle(now):
+    # 返回被移除的客户端，由调用方在锁外关闭
+    return [_clients.pop(k)[0] for k in [k for k, v in _clients.items() if v[1].idle(now)]]
+
+
+def _get_or_create(key, factory):
+    """factory(usage) 创建客户端，客户端发出的每个请求都需在 with usage 中进行"""
+    now = time.time()
+    with _clients_lock:
+        evicted = _evict_idle(now)
+        item = _clients.get(key)
+        if item is not None:
+            item[1].last_used = now
+    for client in evicted:
+        _close(client)
+    if item is not None:
+        return item[0]
+    # 创建可能较慢(如 gradio 获取 view_api)，不在锁内进行
+    usage = _Usage()
+    client = factory(usage)
+    with _clients_lock:
+        item = _clients.get(key)
+        if item is None:
+            _clients[key] = [client, usage]
+            return client
+        item[1].last_used = now
+    # 其他线程已创建，丢弃这个
+    _close(client)
+    return item[0]
+
+
+_session_class = None
+_httpx_client_class = None
+
+
+def _get_session_class():
+    global _session_class
+    if _session_class is None:
+        import requests
+
+        class TrackedSession(requests.Session):
+            usage = None
+
+            def request(self, *args, **kwargs):
+                # 未使用 stream=True，返回时响应已读取完毕
+                with self.usage:
+                    return super().request(*args, **kwargs)
+
+        _session_class = TrackedSession
+    return _session_class
+
+
+def _get_httpx_client_class():
+    global _httpx_client_class
+    if _httpx_client_class is None:
+        import httpx
+
+        class ReleasingStream(httpx.SyncByteStream):
+            # 流式响应在关闭时才算请求结束
+            def __init__(self, stream, usage):
+                self._stream = stream
+                self._usage = usage
+
+            def __iter__(self):
+                yield from self._stream
+
+            def close(self):
+                try:
+                    if hasattr(self._stream, 'close'):
+                        self._stream.close()
+                finally:
+                    usage, self._usage = self._usage, None
+                    if usage is not None:
+                        usage.__exit__()
+
+        class TrackedClient(httpx.Client):
+            usage = None
+
+            def send(self, request, **kwargs):
+                # OpenAI/Anthropic 等 SDK 的请求都经由 send 发出
+                self.usage.__enter__()
+                try:
+                    response = super().send(request, **kwargs)
+                except BaseException:
+                    self.usage.__exit__()
+                    raise
+                if kwargs.get('stream'):
+                    response.stream = ReleasingStream(response.stream, self.usage)
+                else:
+                    self.usage.__exit__()
+                return response
+
+        _httpx_client_class = TrackedClient
+    return _httpx_client_class
+
+
+def get_session(base_url='', proxy=None, auth=None):
+    """
+    返回复用连接的 requests.Session，用法同 requests，proxies 等参数仍在每次请求时传入
+    base_url 用于区分主机，同一主机共用连接池
+    """
+
+    def _create(usage):
+        from requests.adapters import HTTPAdapter
+        size = _pool_size()
+        session = _get_session_class()()
+        session.usage = usage
+        adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    return _get_or_create(('requests', _host(base_url), str(proxy), str(auth)), _create)
+
+
+def _new_httpx_client(usage, proxy=None, timeout=7200):
+    import httpx
+    size = _pool_size()
+    client = _get_httpx_client_class()(
+        proxy=proxy if proxy else None,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=size, max_keepalive_connections=size, keepalive_expiry=60)
+    )
+    client.usage = usage
+    return client
+
+
+def get_httpx_client(base_url='', proxy=None, timeout=7200, auth=None):
+    """返回复用连接的 httpx.Client，代理和超时在创建时确定，因此也作为键的一部分"""
+    return _get_or_create(('httpx', _host(base_url), str(proxy), timeout, str(auth)),
+                          lambda usage: _new_httpx_client(usage, proxy, timeout))
+
+
+def get_openai_client(api_key, base_url, proxy=None, timeout=7200):
+    """返回复用连接的 OpenAI 客户端，timeout 同时作为 OpenAI SDK 的请求超时"""
+
+    def _create(usage):
+        from openai import OpenAI
+        # 内部 httpx.Client 归该客户端所有，移除时随之关闭，二者共用使用计数
+        return OpenAI(api_key=api_key, base_url=base_url, http_client=_new_httpx_client(usage, proxy, timeout))
+
+    return _get_or_create(('openai', base_url, str(proxy), timeout, api_key), _create)
+
+
+def get_gradio_client(api_url, ssl_verify=False, **httpx_kwargs):
+    """返回复用的 gradio Client，只在首次创建时获取 view_api"""
+
+    def _create(usage):
+        from gradio_client import Client
+
+        class TrackedGradioClient(Client):
+            def predict(self, *args, **kwargs):
+                with usage:
+                    return super().predict(*args, **kwargs)
+
+            def view_api(self, *args, **kwargs):
+                with usage:
+                    return super().view_api(*args, **kwargs)
+
+        return TrackedGradioClient(api_url, httpx_kwargs=httpx_kwargs, ssl_verify=ssl_verify)
+
+    return _get_or_create(('gradio', api_url, ssl_verify, str(sorted(httpx_kwargs.items()))), _create)
+
+
+def close_http_clients():
+    """退出时关闭所有客户端"""
+    with _clients_lock:
+        items = list(_clients.values())
+        _clients.clear()
+    for client, _ in items:
+        _close(client)
@@ -311,3 +311,40 @@ def pygameaudio(filepath):
     from .playmp3 import AudioPlayer
     player = AudioPlayer(filepath)
     player.start()
+
+
+def run_in_order(items, fetch, on_result, workers=1, should_exit=None):
+    """
+    并发执行 fetch 并按原顺序回调，用于翻译批次和识别片段的并发发送
+    fetch(i, item) 在工作线程中执行，返回该项结果
+    on_result(i, item, result) 在当前线程按序号顺序调用，先完成的项等待前面的项完成后再回调
+    workers 为同时执行数，为 1 时在当前线程逐个执行；should_exit() 返回 True 时停止并返回 False
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    workers = max(1, min(workers, len(items)))
+    if workers == 1:
+        for i, it in enumerate(items):
+            if should_exit and should_exit():
+                return False
+            on_result(i, it, fetch(i, it))
+        return True
+
+    done_results = {}
+    next_index = 0
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {pool.submit(fetch, i, it): i for i, it in enumerate(items)}
+    pending = set(futures)
+    try:
+        while pending:
+            finished, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            if should_exit and should_exit():
+                return False
+            for fu in finished:
+                done_results[futures[fu]] = fu.result()
+            while next_index in done_results:
+                on_result(next_index, items[next_index], done_results.pop(next_index))
+                next_index += 1
+    finally:
+        # 出错或停止时取消尚未开始的项，不等待已开始的
+        pool.shutdown(wait=False, cancel_futures=True)
+    return True
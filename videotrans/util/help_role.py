@@ -470,7 +470,8 @@ def get_clone_role(set_p=False):
 
 # 综合写入日志，默认sp界面
 # type=logs|error|subtitle|end|stop|succeed|set_precent|replace_subtitle|.... 末尾显示类型，
-# uuid 任务的唯一id，用于确定插入哪个子队列
+# uuid 任务的唯一id，为空时是全局消息
+# 发布到 config.progress_bus，由界面、api 等订阅者接收
 # nologs=False不写入日志
 def set_process(*, text="", type="logs", uuid=None, nologs=False):
     from videotrans.configure import config
@@ -481,10 +482,6 @@ def set_process(*, text="", type="logs", uuid=None, nologs=False):
                 text = text.replace('\\n', ' ').strip()
         if type == 'logs':
             text = text[:150]
-        log = {"text": text, "type": type, "uuid": uuid}
-        if uuid:
-            config.push_queue(uuid, log)
-        else:
-            config.global_msg.append(log)
+        config.progress_bus.publish(uuid, type, text)
     except:
         pass
@@ -276,39 +276,74 @@ def get_srt_from_list(srt_list):
     return txt
 
 
-def set_ass_font(srtfile=None):
-    from . import help_ffmpeg
+def ms_to_ass_time(ms=0):
+    """毫秒转为 ass 时间格式 H:MM:SS.cc"""
+    cs = max(0, int(ms)) // 10
+    return f'{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}'
+
+
+def _ass_style():
+    # 字幕样式取自高级设置
     from videotrans.configure import config
+    return 'Style: Default,{fontname},{fontsize},{fontcolor},{fontcolor},{fontbordercolor},{backgroundcolor},0,0,0,0,100,100,0,0,{borderstyle},{outline},{shadow},{subtitle_position},{marginL},{marginR},{marginV},1'.format(
+        fontname=config.settings['fontname'],
+        fontsize=config.settings['fontsize'],
+        fontcolor=config.settings['fontcolor'],
+        fontbordercolor=config.settings['fontbordercolor'],
+        backgroundcolor=config.settings['backgroundcolor'],
+        borderstyle=int(config.settings.get('borderStyle', 1)),  # 1轮廓风格，3背景色块风格
+        outline=config.settings.get('outline', 1),
+        shadow=config.settings.get('shadow', 1),
+        subtitle_position=int(config.settings.get('subtitle_position', 2)),
+        marginL=int(config.settings.get('marginL', 10)),
+        marginR=int(config.settings.get('marginR', 10)),
+        marginV=int(config.settings.get('marginV', 10))
+    )
+
+
+def _ass_text(text):
+    # 解析 srt 时已去掉 <i> 等简单标签，这里去掉 <font ...>，换行和连续2个空格转为 ass 换行符
+    text = re.sub(r'</?font[^>]*>', '', text.replace('\r', '')).strip()
+    # 先转义 \ { }，避免字幕文字被当作 ass 覆盖标签或 \N \n \h 转义序列
+    # ass 没有 \\ 转义，反斜杠后加不可见的 U+2060 使其不与后一字符组成转义，{ } 转为 \{ \}
+    text = text.replace('\\', '\\\u2060').replace('{', '\\{').replace('}', '\\}')
+    return text.replace('\n', '\\N').replace('  ', '\\N')
+
+
+def set_ass_font(srtfile=None):
+    """
+    srt 字幕转为使用高级设置样式的 ass 字幕，返回 ass 文件路径
+    直接由字幕列表生成，不再调用 ffmpeg 转换后再改写样式行
+    头部与 ffmpeg 转换的结果一致(PlayResX 384 x PlayResY 288)，相同字号的显示大小不变
+    """
     if not os.path.exists(srtfile) or os.path.getsize(srtfile) == 0:
         return os.path.basename(srtfile)
-    help_ffmpeg.runffmpeg(['-y', '-i', srtfile, f'{srtfile}.ass'])
     assfile = f'{srtfile}.ass'
-
-    with open(assfile, 'r', encoding='utf-8') as f:
-        ass_str = f.readlines()
-
-    for i, it in enumerate(ass_str):
-        if it.find('Style: ') == 0:
-            ass_str[
-                i] = 'Style: Default,{fontname},{fontsize},{fontcolor},{fontcolor},{fontbordercolor},{backgroundcolor},0,0,0,0,100,100,0,0,{borderstyle},{outline},{shadow},{subtitle_position},{marginL},{marginR},{marginV},1'.format(
-                fontname=config.settings['fontname'],
-                fontsize=config.settings['fontsize'],
-                fontcolor=config.settings['fontcolor'],
-                fontbordercolor=config.settings['fontbordercolor'],
-                backgroundcolor=config.settings['backgroundcolor'],
-                borderstyle=int(config.settings.get('borderStyle', 1)),  # 1轮廓风格，3背景色块风格
-                outline=config.settings.get('outline', 1),
-                shadow=config.settings.get('shadow', 1),
-                subtitle_position=int(config.settings.get('subtitle_position', 2)),
-                marginL=int(config.settings.get('marginL', 10)),
-                marginR=int(config.settings.get('marginR', 10)),
-                marginV=int(config.settings.get('marginV', 10))
-            )
-        elif it.find('Dialogue: ') == 0:
-            ass_str[i] = it.replace('  ', '\\N')
+    ass_str = [
+        "[Script Info]",
+        "; Script generated by pyVideoTrans",
+        "ScriptType: v4.00+",
+        "PlayResX: 384",
+        "PlayResY: 288",
+        "ScaledBorderAndShadow: yes",
+        "YCbCr Matrix: None",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        _ass_style(),
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for it in get_subtitle_from_srt(srtfile):
+        text = _ass_text(it['text'])
+        if not text:
+            continue
+        ass_str.append(
+            f"Dialogue: 0,{ms_to_ass_time(it['start_time'])},{ms_to_ass_time(it['end_time'])},Default,,0,0,0,,{text}")
 
     with open(assfile, 'w', encoding='utf-8') as f:
-        f.write("".join(ass_str))
+        f.write("\n".join(ass_str) + "\n")
     return assfile
 
 def textwrap(text, maxlen=15):
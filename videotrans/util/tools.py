@@ -3,6 +3,7 @@
 
 import importlib
 import inspect  # 我们需要 inspect 来替代 os.listdir
+import threading
 
 # --- 步骤 1: 直接硬编码模块列表，不再扫描文件系统 ---
 # 这个列表应该和你 .spec 文件里的 hiddenimports 部分保持一致
@@ -10,10 +11,13 @@ _helper_module_names = [
     'help_role',
     'help_ffmpeg',
     'help_srt',
-    'help_misc'
+    'help_misc',
+    'help_http',
+    'help_audio'
 ]
 
 _function_map = None
+_function_map_lock = threading.Lock()
 
 
 def _build_function_map_from_imports():
@@ -24,9 +28,15 @@ def _build_function_map_from_imports():
     global _function_map
     if _function_map is not None:
         return
+    with _function_map_lock:
+        if _function_map is not None:
+            return
+        # 先构建完整再赋值，避免其他线程读到未填充完的映射
+        _function_map = _scan_helper_modules()
 
-    _function_map = {}
 
+def _scan_helper_modules():
+    function_map = {}
     for module_name in _helper_module_names:
         try:
             # 动态导入模块
@@ -35,12 +45,13 @@ def _build_function_map_from_imports():
             # 遍历模块成员，找出所有公开函数
             for name, member in inspect.getmembers(module):
                 if inspect.isfunction(member) and not name.startswith('_'):
-                    if name in _function_map:
+                    if name in function_map:
                         print(
-                            f"Warning: Function '{name}' is defined in both '{_function_map[name]}' and '{module_name}'. The latter will be used.")
-                    _function_map[name] = module_name
+                            f"Warning: Function '{name}' is defined in both '{function_map[name]}' and '{module_name}'. The latter will be used.")
+                    function_map[name] = module_name
         except ImportError as e:
             print(f"Warning: Could not import and inspect module '{module_name}'. Reason: {e}")
+    return function_map
 
 
 # --- 步骤 2 & 3: __getattr__ 和 __dir__ 保持不变，但调用新的构建函数 ---
@@ -20,44 +20,38 @@ def openwin():
         def __init__(self, uuid_list=None, parent=None):
             super().__init__(parent=parent)
             self.uuid_list = uuid_list
+            # 创建时即订阅，需在任务加入队列前创建，以免遗漏消息
+            self.subscription = config.progress_bus.subscribe(uuid_list)
 
         def post(self, jsondata):
             self.uito.emit(json.dumps(jsondata))
 
         def run(self):
             length = len(self.uuid_list)
-            while 1:
-                if len(self.uuid_list) == 0 or config.exit_soft:
-                    self.post({"type": "end"})
-                    time.sleep(1)
-                    return
-
-                for uuid in self.uuid_list:
-                    if uuid in config.stoped_uuid_set:
-                        try:
+            try:
+                while 1:
+                    if len(self.uuid_list) == 0 or config.exit_soft:
+                        self.post({"type": "end"})
+                        time.sleep(1)
+                        return
+
+                    for uuid in list(self.uuid_list):
+                        if uuid in config.stoped_uuid_set:
                             self.uuid_list.remove(uuid)
-                        except:
-                            pass
-                        continue
-                    q = config.uuid_logs_queue.get(uuid)
-                    if not q:
-                        continue
-                    try:
-                        if q.empty():
-                            time.sleep(0.5)
-                            continue
-                        data = q.get(block=False)
-                        if not data:
+                            self.subscription.remove(uuid)
+                    # 在进度总线上等待这些任务的消息，超时只用于检查是否已停止
+                    for event in self.subscription.get(timeout=0.5):
+                        if event.uuid not in self.uuid_list:
                             continue
+                        data = event.to_dict()
                         self.post(data)
                         if data['type'] in ['error', 'succeed']:
-                            self.uuid_list.remove(uuid)
+                            self.uuid_list.remove(event.uuid)
                             self.post(
                                 {"type": "jindu", "text": f'{int((length - len(self.uuid_list)) * 100 / length)}%'})
-                            config.stoped_uuid_set.add(uuid)
-                            del config.uuid_logs_queue[uuid]
-                    except:
-                        pass
+                            config.stoped_uuid_set.add(event.uuid)
+            finally:
+                self.subscription.close()
 
     # ==================== 语言字典 (完整版) ====================
     langname_dict = {
@@ -226,6 +220,8 @@ def openwin():
         config.box_tts = 'ing'
         video_obj = tools.format_video(winobj.srt_path, None)
         uuid = video_obj['uuid']
+        th = SignThread(uuid_list=[uuid], parent=winobj)
+        th.uito.connect(feed)
 
         trk = DubbingSrt(cfg={
             "voice_role": role,  # Default role
@@ -243,8 +239,6 @@ def openwin():
         }, obj=video_obj)
         config.dubb_queue.append(trk)
 
-        th = SignThread(uuid_list=[uuid], parent=winobj)
-        th.uito.connect(feed)
         th.start()
 
         winobj.hecheng_startbtn.setText(config.transobj["running"])